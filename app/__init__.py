@@ -1,10 +1,18 @@
 from flask import Flask
-from .extensions import ma, limiter, cache
+from .extensions import ma, limiter, cache, init_token_store
 from .models import db
 from .blueprints.customers import customers_bp
 from .blueprints.mechanics import mechanics_bp
 from .blueprints.service_ticket import tickets_bp
 from .blueprints.items import items_bp
+from .blueprints.monitoring import monitoring_bp
+from .blueprints.reports import reports_bp
+from .blueprints.search import search_bp
+from .blueprints.jobs import jobs_bp
+from .utils.database import configure_engine_options, register_engine_events
+from .utils.serialization import configure_json_provider
+from .utils.metrics import register_metrics
+from .cli import register_commands
 from flask_swagger_ui import get_swaggerui_blueprint
 
 SWAGGER_URL = '/api/docs'  # URL for exposing Swagger UI (without trailing '/')
@@ -21,18 +29,29 @@ swaggerui_blueprint = get_swaggerui_blueprint(
 def create_app(config_name):
     app = Flask(__name__)
     app.config.from_object(f'config.{config_name}')
+    configure_engine_options(app)
+    configure_json_provider(app)
     
     # Initialize extensions
     ma.init_app(app)
     db.init_app(app)
+    register_engine_events(app)
+    register_metrics(app)
     limiter.init_app(app)
     cache.init_app(app)
+    init_token_store(app)
     
     # Register blueprints
     app.register_blueprint(customers_bp, url_prefix='/customers')
     app.register_blueprint(mechanics_bp, url_prefix='/mechanics')
     app.register_blueprint(tickets_bp, url_prefix='/service-tickets')
     app.register_blueprint(items_bp, url_prefix='/inventory')
+    app.register_blueprint(reports_bp, url_prefix='/reports')
+    app.register_blueprint(search_bp, url_prefix='/search')
+    app.register_blueprint(jobs_bp, url_prefix='/jobs')
+    app.register_blueprint(monitoring_bp)
     app.register_blueprint(swaggerui_blueprint, url_prefix=SWAGGER_URL)
+
+    register_commands(app)
     
     return app
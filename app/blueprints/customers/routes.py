@@ -1,13 +1,23 @@
-from flask import request, jsonify
+from flask import request, jsonify, g
 from marshmallow import ValidationError
 from sqlalchemy import select
-from .schemas import customer_schema, customers_schema, login_schema
+from .schemas import customer_schema, customers_schema, customer_rows, customer_filters, login_schema, refresh_token_schema, logout_schema
 from app.models import Customer, db
 from . import customers_bp
 from app.extensions import limiter, cache
-from app.utils.util import encode_token, token_required
+from app.utils.util import encode_token, encode_refresh_token, decode_refresh_token, token_required, revoke_token, claim_token
+from app.utils.pagination import paginated_response
+from app.utils.serialization import paginate_serialized
+from app.utils.conditional import page_validators, entity_response
+from app.utils.streaming import wants_stream, stream_response
+from app.utils.caching import get_cached_entity
+from app.utils.passwords import hash_password, hash_passwords, verify_password
+from app.utils.bulk import check_payload, load_rows, reject_duplicate_emails, create_rows, bulk_result, bulk_response
+from app.utils.jobs import job_handler, submit_job, wants_async, job_accepted
+from app.blueprints.jobs.schemas import job_schema
 
 @customers_bp.route("/login", methods=['POST'])
+@limiter.limit("20 per minute")
 def login():
     try:
         credentials = login_schema.load(request.json)
@@ -19,19 +29,63 @@ def login():
     query =select(Customer).where(Customer.email == email) 
     user = db.session.execute(query).scalars().first() #Query user table for a user with this email
 
-    if user and user.password == password: #if we have a user associated with the username, validate the password
+    valid, new_hash = verify_password(user.password, password) if user else (False, None)
+
+    if valid: #if we have a user associated with the username, validate the password
+        if new_hash: #stored password was plaintext or hashed with old parameters
+            user.password = new_hash
+            db.session.commit()
+
         token = encode_token(user.id)
 
         response = {
             "status": "success",
             "message": "Successfully Logged In",
-            "token": token
+            "token": token,
+            "refresh_token": encode_refresh_token(user.id)
         }
         
         return jsonify(response), 200
     else:
         return jsonify({'message': "Invalid email or password"}), 401
 
+@customers_bp.route("/logout", methods=['POST'])
+@token_required
+def logout(customer_id):
+    try:
+        data = logout_schema.load(request.get_json(silent=True) or {})
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    revoke_token(g.token_claims)
+    if 'refresh_token' in data:
+        refresh_claims = decode_refresh_token(data['refresh_token'])
+        if refresh_claims and refresh_claims['sub'] == customer_id:
+            revoke_token(refresh_claims)
+    return jsonify({"status": "success", "message": "Successfully Logged Out"}), 200
+
+# Issues a new access token (and rotates the refresh token) from the token
+# claims alone, without touching the customers table
+@customers_bp.route("/token/refresh", methods=['POST'])
+def refresh_token():
+    try:
+        data = refresh_token_schema.load(request.json)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    claims = decode_refresh_token(data['refresh_token'])
+    #each refresh token can only be used once
+    if not claims or not claim_token(claims):
+        return jsonify({'message': "Invalid refresh token"}), 401
+
+    response = {
+        "status": "success",
+        "message": "Token refreshed",
+        "token": encode_token(claims['sub']),
+        "refresh_token": encode_refresh_token(claims['sub'])
+    }
+    return jsonify(response), 200
+
 # CREATE CUSTOMER
 @customers_bp.route("/", methods=['POST'])
 @limiter.limit("5 per hour")
@@ -46,33 +100,74 @@ def create_customer():
     
     if(existing_customer): return jsonify({"error": "Email already used"}), 400
     
+    customer_data['password'] = hash_password(customer_data['password'])
     new_customer = Customer(**customer_data)
     db.session.add(new_customer)
     db.session.commit()
     return customer_schema.jsonify(new_customer), 201
 
+# BULK CREATE CUSTOMERS
+@customers_bp.route("/bulk", methods=['POST'])
+@limiter.limit("10 per hour")
+def bulk_create_customers():
+    try:
+        check_payload(request.json)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    if wants_async():
+        params = {'rows': hash_payload_passwords(request.json), 'hashed': True}
+        return job_accepted(submit_job('bulk-customers', params), job_schema)
+    return bulk_response(create_customers(request.json))
+
+# The payload of a queued job is stored in jobs.params, so passwords are
+# hashed before it is queued and never kept in plaintext. The job params mark
+# the rows as hashed; a password is never treated as a hash because of its
+# shape, since a client could send one that looks like a hash.
+def hash_payload_passwords(payload):
+    payload = [dict(row) if isinstance(row, dict) else row for row in payload]
+    rows = [row for row in payload if isinstance(row, dict) and isinstance(row.get('password'), str)]
+    for row, password in zip(rows, hash_passwords([row['password'] for row in rows])):
+        row['password'] = password
+    return payload
+
+@job_handler('bulk-customers')
+def create_customers_job(job_id, params):
+    return create_customers(params['rows'], hashed=params['hashed'])
+
+def create_customers(payload, hashed=False):
+    rows, errors = load_rows(customers_schema, payload)
+    reject_duplicate_emails(Customer, rows, errors)
+    if not hashed:
+        indexes = sorted(rows)
+        for index, password in zip(indexes, hash_passwords([rows[index]['password'] for index in indexes])):
+            rows[index]['password'] = password
+    return bulk_result(create_rows(Customer, rows, natural_key='email'), errors)
+
 #GET ALL CUSTOMERS
 @customers_bp.route("/", methods=['GET'])
 def get_customers():
     try:
-        page = int(request.args.get('page'))
-        per_page = int(request.args.get('per_page'))
-        query = select(Customer)
-        customers = db.paginate(query, page=page, per_page=per_page)
-        return customers_schema.jsonify(customers), 200
-    except:
-        query = select(Customer)
-        customers = db.session.execute(query).scalars().all()
+        query, sort = customer_filters.apply(select(Customer))
+        if wants_stream():
+            return stream_response(query, Customer.id, customer_schema)
+
+        validators = page_validators(query, Customer.id, Customer.updated_at, **sort)
+        if validators.not_modified():
+            return validators.not_modified_response()
+        serializer, customers, next_cursor = paginate_serialized(query, Customer.id, customers_schema, customer_rows, **sort)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
 
-        return customers_schema.jsonify(customers), 200
+    return validators.apply(paginated_response(serializer, customers, next_cursor)), 200
 
 #GET SPECIFIC CUSTOMER
 @customers_bp.route("/<int:customer_id>", methods=['GET'])
 def get_customer(customer_id):
-    customer = db.session.get(Customer, customer_id)
+    customer = get_cached_entity('customer', customer_id, customer_schema, lambda id: db.session.get(Customer, id))
 
     if customer:
-        return customer_schema.jsonify(customer), 200
+        return entity_response(customer)
     return jsonify({"error": "Customer not found."}), 404
 
 #UPDATE SPECIFIC CUSTOMER
@@ -90,6 +185,7 @@ def update_customer(customer_id):
     except ValidationError as e:
         return jsonify(e.messages), 400
     
+    customer_data['password'] = hash_password(customer_data['password'])
     for key, value in customer_data.items():
         setattr(customer, key, value)
 
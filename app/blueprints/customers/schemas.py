@@ -1,10 +1,25 @@
 from app.extensions import ma
 from app.models import Customer
+from marshmallow import fields
+from app.utils.serialization import RowSerializer
+from app.utils.filtering import ListFilters
 
 class CustomerSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Customer
+        dump_only = ('updated_at',)
+        load_only = ('password',)
+    
+class RefreshTokenSchema(ma.Schema):
+    refresh_token = fields.Str(required=True)
+
+class LogoutSchema(ma.Schema):
+    refresh_token = fields.Str()
     
 customer_schema =CustomerSchema()
 customers_schema = CustomerSchema(many=True)
+customer_rows = RowSerializer(Customer, customers_schema)
+customer_filters = ListFilters(filters=[Customer.email, Customer.name], sorts=[Customer.name])
 login_schema =CustomerSchema(exclude=['name', 'phone'])
+refresh_token_schema = RefreshTokenSchema()
+logout_schema = LogoutSchema()
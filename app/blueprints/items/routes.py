@@ -1,9 +1,17 @@
 from flask import request, jsonify
 from marshmallow import ValidationError
 from sqlalchemy import select
-from .schemas import item_schema, items_schema
+from .schemas import item_schema, items_schema, item_rows, item_filters
 from app.models import Item, db
 from . import items_bp
+from app.utils.pagination import paginated_response
+from app.utils.serialization import paginate_serialized
+from app.utils.conditional import page_validators, entity_response
+from app.utils.streaming import wants_stream, stream_response
+from app.utils.caching import get_cached_entity
+from app.utils.bulk import check_payload, load_rows, create_rows, bulk_result, bulk_response
+from app.utils.jobs import job_handler, submit_job, wants_async, job_accepted
+from app.blueprints.jobs.schemas import job_schema
 
 # CREATE INVENTORY ITEM
 @items_bp.route("/", methods=['POST'])
@@ -18,20 +26,50 @@ def create_item():
     db.session.commit()
     return item_schema.jsonify(new_item), 201
 
+# BULK CREATE INVENTORY ITEMS
+@items_bp.route("/bulk", methods=['POST'])
+def bulk_create_items():
+    try:
+        check_payload(request.json)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    if wants_async():
+        return job_accepted(submit_job('bulk-items', request.json), job_schema)
+    return bulk_response(create_items(request.json))
+
+@job_handler('bulk-items')
+def create_items_job(job_id, payload):
+    return create_items(payload)
+
+def create_items(payload):
+    rows, errors = load_rows(items_schema, payload)
+    return bulk_result(create_rows(Item, rows), errors)
+
 #GET ALL INVENTORY ITEMS
 @items_bp.route("/", methods=['GET'])
 def get_items():
-    query = select(Item)
-    items = db.session.execute(query).scalars().all()
-    return items_schema.jsonify(items), 200
+    try:
+        query, sort = item_filters.apply(select(Item))
+        if wants_stream():
+            return stream_response(query, Item.id, item_schema)
+
+        validators = page_validators(query, Item.id, Item.updated_at, **sort)
+        if validators.not_modified():
+            return validators.not_modified_response()
+        serializer, items, next_cursor = paginate_serialized(query, Item.id, items_schema, item_rows, **sort)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    return validators.apply(paginated_response(serializer, items, next_cursor)), 200
 
 #GET SPECIFIC INVENTORY ITEM
 @items_bp.route("/<int:item_id>", methods=['GET'])
 def get_item(item_id):
-    item = db.session.get(Item, item_id)
+    item = get_cached_entity('item', item_id, item_schema, lambda id: db.session.get(Item, id))
 
     if item:
-        return item_schema.jsonify(item), 200
+        return entity_response(item)
     return jsonify({"error": "Item not found."}), 404
 
 #UPDATE SPECIFIC INVENTORY ITEM
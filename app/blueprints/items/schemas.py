@@ -1,9 +1,14 @@
 from app.extensions import ma
 from app.models import Item
+from app.utils.serialization import RowSerializer
+from app.utils.filtering import ListFilters
 
 class ItemSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Item
+        dump_only = ('updated_at',)
     
 item_schema =ItemSchema()
 items_schema = ItemSchema(many=True)
+item_rows = RowSerializer(Item, items_schema)
+item_filters = ListFilters(filters=[Item.name], ranges=[Item.price], sorts=[Item.name, Item.price])
@@ -0,0 +1,29 @@
+import os
+from flask import jsonify, send_file
+from .schemas import job_schema
+from app.models import Job, db
+from . import jobs_bp
+from app.extensions import limiter
+from app.utils.jobs import job_file_path
+from app.utils.streaming import NDJSON_MIMETYPE
+
+#GET JOB STATUS AND RESULT
+@jobs_bp.route("/<job_id>", methods=['GET'])
+@limiter.limit("120 per minute")
+def get_job(job_id):
+    job = db.session.get(Job, job_id)
+    if not job:
+        return jsonify({"error": "Job not found."}), 404
+    return job_schema.jsonify(job), 200
+
+#DOWNLOAD EXPORT FILE OF A FINISHED JOB
+@jobs_bp.route("/<job_id>/download", methods=['GET'])
+@limiter.limit("120 per minute")
+def download_job_file(job_id):
+    job = db.session.get(Job, job_id)
+    if not job:
+        return jsonify({"error": "Job not found."}), 404
+    path = job_file_path(job.id, '.ndjson')
+    if job.status != 'succeeded' or not os.path.exists(path):
+        return jsonify({"error": "Job has no file to download."}), 404
+    return send_file(path, mimetype=NDJSON_MIMETYPE, as_attachment=True, download_name=f'{job.kind}-{job.id}.ndjson')
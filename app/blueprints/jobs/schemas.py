@@ -0,0 +1,18 @@
+import json
+from app.extensions import ma
+from marshmallow import fields
+
+class JobSchema(ma.Schema):
+    id = fields.Str()
+    type = fields.Str(attribute='kind')
+    status = fields.Str()
+    result = fields.Method('get_result')
+    error = fields.Str(allow_none=True)
+    created_at = fields.DateTime()
+    started_at = fields.DateTime(allow_none=True)
+    finished_at = fields.DateTime(allow_none=True)
+
+    def get_result(self, job):
+        return json.loads(job.result) if job.result is not None else None
+
+job_schema = JobSchema()
@@ -1,10 +1,18 @@
 from flask import request, jsonify
 from marshmallow import ValidationError
-from sqlalchemy import select
-from .schemas import mechanic_schema, mechanics_schema
-from app.models import Mechanic, db
+from sqlalchemy import select, func, and_
+from .schemas import mechanic_schema, mechanics_schema, mechanic_rows, mechanic_filters, most_worked_query_schema
+from app.models import Mechanic, ServiceTicket, ticket_mechanic, db
 from . import mechanics_bp
 from app.extensions import limiter
+from app.utils.pagination import paginated_response
+from app.utils.serialization import paginate_serialized
+from app.utils.conditional import page_validators, entity_response
+from app.utils.streaming import wants_stream, stream_response
+from app.utils.caching import get_cached_entity
+from app.utils.bulk import check_payload, load_rows, reject_duplicate_emails, create_rows, bulk_result, bulk_response
+from app.utils.jobs import job_handler, submit_job, wants_async, job_accepted
+from app.blueprints.jobs.schemas import job_schema
 
 # CREATE MECHANIC
 @mechanics_bp.route("/", methods=['POST'])
@@ -25,21 +33,52 @@ def create_mechanic():
     db.session.commit()
     return mechanic_schema.jsonify(new_mechanic), 201
 
+# BULK CREATE MECHANICS
+@mechanics_bp.route("/bulk", methods=['POST'])
+@limiter.limit("10 per day")
+def bulk_create_mechanics():
+    try:
+        check_payload(request.json)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    if wants_async():
+        return job_accepted(submit_job('bulk-mechanics', request.json), job_schema)
+    return bulk_response(create_mechanics(request.json))
+
+@job_handler('bulk-mechanics')
+def create_mechanics_job(job_id, payload):
+    return create_mechanics(payload)
+
+def create_mechanics(payload):
+    rows, errors = load_rows(mechanics_schema, payload)
+    reject_duplicate_emails(Mechanic, rows, errors)
+    return bulk_result(create_rows(Mechanic, rows, natural_key='email'), errors)
+
 #GET ALL MECHANICS
 @mechanics_bp.route("/", methods=['GET'])
 def get_mechanics():
-    query = select(Mechanic)
-    mechanics = db.session.execute(query).scalars().all()
+    try:
+        query, sort = mechanic_filters.apply(select(Mechanic))
+        if wants_stream():
+            return stream_response(query, Mechanic.id, mechanic_schema)
+
+        validators = page_validators(query, Mechanic.id, Mechanic.updated_at, **sort)
+        if validators.not_modified():
+            return validators.not_modified_response()
+        serializer, mechanics, next_cursor = paginate_serialized(query, Mechanic.id, mechanics_schema, mechanic_rows, **sort)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
 
-    return mechanics_schema.jsonify(mechanics)
+    return validators.apply(paginated_response(serializer, mechanics, next_cursor)), 200
 
 #GET SPECIFIC MECHANIC
 @mechanics_bp.route("/<int:mechanic_id>", methods=['GET'])
 def get_mechanic(mechanic_id):
-    mechanic = db.session.get(Mechanic, mechanic_id)
+    mechanic = get_cached_entity('mechanic', mechanic_id, mechanic_schema, lambda id: db.session.get(Mechanic, id))
 
     if mechanic:
-        return mechanic_schema.jsonify(mechanic), 200
+        return entity_response(mechanic)
     return jsonify({"error": "Mechanic not found."}), 404
 
 #UPDATE SPECIFIC MECHANIC
@@ -75,11 +114,38 @@ def delete_mechanic(mechanic_id):
     db.session.commit()
     return jsonify({"message": f'Mechanic id: {mechanic_id}, successfully deleted.'}), 200
 
+#GET MECHANICS RANKED BY NUMBER OF SERVICE TICKETS
 @mechanics_bp.route("/most-worked", methods=['GET'])
 def most_worked_mechanics():
-    query = select(Mechanic)
-    mechanics = db.session.execute(query).scalars().all()
-    
-    mechanics.sort(key=lambda mechanic: len(mechanic.service_tickets), reverse=True)
-    
-    return mechanics_schema.jsonify(mechanics), 200
+    try:
+        params = most_worked_query_schema.load(request.args)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    # The date window goes into the join condition so mechanics without
+    # tickets in the window are still ranked, with a count of zero.
+    ticket_join = ServiceTicket.id == ticket_mechanic.c.ticket_id
+    if 'start_date' in params:
+        ticket_join = and_(ticket_join, ServiceTicket.service_date >= params['start_date'])
+    if 'end_date' in params:
+        ticket_join = and_(ticket_join, ServiceTicket.service_date <= params['end_date'])
+
+    ticket_count = func.count(ServiceTicket.id)
+    query = (
+        select(Mechanic, ticket_count.label('ticket_count'), func.rank().over(order_by=ticket_count.desc()).label('rank'))
+        .outerjoin(ticket_mechanic, ticket_mechanic.c.mechanic_id == Mechanic.id)
+        .outerjoin(ServiceTicket, ticket_join)
+        .group_by(Mechanic.id)
+        .order_by(ticket_count.desc(), Mechanic.id)
+    )
+    if 'limit' in params:
+        query = query.limit(params['limit'])
+
+    leaderboard = []
+    for mechanic, count, rank in db.session.execute(query):
+        entry = mechanic_schema.dump(mechanic)
+        entry['ticket_count'] = count
+        entry['rank'] = rank
+        leaderboard.append(entry)
+
+    return jsonify(leaderboard), 200
@@ -1,9 +1,29 @@
 from app.extensions import ma
 from app.models import Mechanic
+from marshmallow import fields, validate, validates_schema, ValidationError, EXCLUDE
+from app.utils.serialization import RowSerializer
+from app.utils.filtering import ListFilters
 
 class MechanicSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Mechanic
+        dump_only = ('updated_at',)
     
+class MostWorkedQuerySchema(ma.Schema):
+    limit = fields.Int(validate=validate.Range(min=1))
+    start_date = fields.Date()
+    end_date = fields.Date()
+
+    class Meta:
+        unknown = EXCLUDE
+
+    @validates_schema
+    def validate_window(self, data, **kwargs):
+        if 'start_date' in data and 'end_date' in data and data['start_date'] > data['end_date']:
+            raise ValidationError("start_date must be on or before end_date.", "start_date")
+
 mechanic_schema =MechanicSchema()
-mechanics_schema = MechanicSchema(many=True)
\ No newline at end of file
+mechanics_schema = MechanicSchema(many=True)
+mechanic_rows = RowSerializer(Mechanic, mechanics_schema)
+mechanic_filters = ListFilters(filters=[Mechanic.email, Mechanic.name], sorts=[Mechanic.name])
+most_worked_query_schema = MostWorkedQuerySchema()
@@ -0,0 +1,5 @@
+from flask import Blueprint
+
+monitoring_bp = Blueprint("monitoring_bp", __name__)
+
+from . import routes
\ No newline at end of file
@@ -0,0 +1,17 @@
+from flask import current_app, jsonify
+from . import monitoring_bp
+from app.extensions import limiter
+from app.utils.database import pool_status
+from app.utils.metrics import render_metrics
+
+#GET DATABASE CONNECTION POOL STATUS
+@monitoring_bp.route("/pool-stats", methods=['GET'])
+@limiter.exempt
+def get_pool_stats():
+    return jsonify(pool_status()), 200
+
+#GET REQUEST AND SQL METRICS (PROMETHEUS TEXT FORMAT)
+@monitoring_bp.route("/metrics", methods=['GET'])
+@limiter.exempt
+def get_metrics():
+    return current_app.response_class(render_metrics(), mimetype='text/plain; version=0.0.4'), 200
@@ -0,0 +1,101 @@
+from datetime import date
+from sqlalchemy import Date, cast, func, select
+from app.models import Customer, Item, Mechanic, ServiceItems, ServiceTicket, ticket_mechanic, db
+from app.utils.invoices import round_money
+
+# Aggregate queries behind the /reports endpoints. Each one is a single
+# GROUP BY over the tables involved; revenue comes from the stored
+# ServiceTicket.parts_total where possible so line items aren't rescanned.
+
+def _dialect():
+    return db.session.get_bind().dialect.name
+
+# 'YYYY-MM' of a date column
+def month_of(column):
+    dialect = _dialect()
+    if dialect == 'sqlite':
+        return func.strftime('%Y-%m', column)
+    if dialect == 'mysql':
+        return func.date_format(column, '%Y-%m')
+    if dialect == 'postgresql':
+        return func.to_char(column, 'YYYY-MM')
+    raise NotImplementedError(f"Reports are not supported on {dialect}.")
+
+# Monday of the (ISO) week of a date column
+def week_of(column):
+    dialect = _dialect()
+    if dialect == 'sqlite':
+        return func.date(column, 'weekday 0', '-6 days')
+    if dialect == 'mysql':
+        return func.subdate(column, func.weekday(column))
+    if dialect == 'postgresql':
+        return cast(func.date_trunc('week', column), Date)
+    raise NotImplementedError(f"Reports are not supported on {dialect}.")
+
+def _in_range(query, params):
+    if 'start_date' in params:
+        query = query.where(ServiceTicket.service_date >= params['start_date'])
+    if 'end_date' in params:
+        query = query.where(ServiceTicket.service_date <= params['end_date'])
+    return query
+
+def _limit(query, params):
+    if 'limit' in params:
+        query = query.limit(params['limit'])
+    return query
+
+def revenue_by_month(params):
+    month = month_of(ServiceTicket.service_date).label('month')
+    query = (
+        select(month, func.count(ServiceTicket.id).label('ticket_count'),
+               func.coalesce(func.sum(ServiceTicket.parts_total), 0).label('revenue'))
+        .where(ServiceTicket.service_date.is_not(None))
+        .group_by(month)
+        .order_by(month)
+    )
+    return db.session.execute(_in_range(query, params)).mappings().all()
+
+def parts_usage(params):
+    quantity = func.sum(ServiceItems.quantity).label('quantity')
+    query = (
+        select(Item.id.label('item_id'), Item.name, quantity,
+               round_money(func.sum(Item.price * ServiceItems.quantity)).label('revenue'))
+        .select_from(ServiceItems)
+        .join(Item, Item.id == ServiceItems.item_id)
+        .join(ServiceTicket, ServiceTicket.id == ServiceItems.service_id)
+        .group_by(Item.id, Item.name)
+        .order_by(quantity.desc(), Item.id)
+    )
+    return db.session.execute(_limit(_in_range(query, params), params)).mappings().all()
+
+def mechanic_workload(params):
+    week = week_of(ServiceTicket.service_date).label('week')
+    query = (
+        select(Mechanic.id.label('mechanic_id'), Mechanic.name, week,
+               func.count(ServiceTicket.id).label('ticket_count'))
+        .select_from(ticket_mechanic)
+        .join(Mechanic, Mechanic.id == ticket_mechanic.c.mechanic_id)
+        .join(ServiceTicket, ServiceTicket.id == ticket_mechanic.c.ticket_id)
+        .where(ServiceTicket.service_date.is_not(None))
+        .group_by(Mechanic.id, Mechanic.name, week)
+        .order_by(week, Mechanic.id)
+    )
+    rows = db.session.execute(_in_range(query, params)).mappings().all()
+    # SQLite hands the week back as text
+    return [
+        dict(row, week=date.fromisoformat(row['week']) if isinstance(row['week'], str) else row['week'])
+        for row in rows
+    ]
+
+def top_customers(params):
+    total_spend = func.coalesce(func.sum(ServiceTicket.parts_total), 0).label('total_spend')
+    query = (
+        select(Customer.id.label('customer_id'), Customer.name,
+               func.count(ServiceTicket.id).label('ticket_count'), total_spend)
+        .join(ServiceTicket, ServiceTicket.customer_id == Customer.id)
+        .group_by(Customer.id, Customer.name)
+        .order_by(total_spend.desc(), Customer.id)
+    )
+    params = dict(params)
+    params.setdefault('limit', 10)
+    return db.session.execute(_limit(_in_range(query, params), params)).mappings().all()
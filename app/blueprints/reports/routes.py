@@ -0,0 +1,65 @@
+from flask import current_app, request, jsonify
+from marshmallow import ValidationError
+from .schemas import (report_query_schema, revenue_by_month_schema, parts_usage_schema,
+                      mechanic_workload_schema, top_customers_schema)
+from .queries import revenue_by_month, parts_usage, mechanic_workload, top_customers
+from . import reports_bp
+from app.extensions import cache, cache_key
+from app.utils.jobs import job_handler, submit_job, wants_async, job_accepted
+from app.blueprints.jobs.schemas import job_schema
+
+# name -> (query, schema)
+REPORTS = {
+    'revenue-by-month': (revenue_by_month, revenue_by_month_schema),
+    'parts-usage': (parts_usage, parts_usage_schema),
+    'mechanic-workload': (mechanic_workload, mechanic_workload_schema),
+    'top-customers': (top_customers, top_customers_schema),
+}
+
+# Reports are cached per report and parameters (date range, limit). They are
+# not evicted on writes, so a report can be up to REPORT_CACHE_TIMEOUT
+# seconds behind.
+def build_report(name, params):
+    run, schema = REPORTS[name]
+    key = cache_key('report:{}:{}:{}:{}'.format(
+        name, params.get('start_date', ''), params.get('end_date', ''), params.get('limit', ''),
+    ))
+    report = cache.get(key)
+    if report is None:
+        report = schema.dump(run(params))
+        cache.set(key, report, timeout=current_app.config['REPORT_CACHE_TIMEOUT'])
+    return report
+
+def report_response(name):
+    try:
+        params = report_query_schema.load(request.args)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    if wants_async():
+        return job_accepted(submit_job('report', {'name': name, 'args': request.args.to_dict()}), job_schema)
+    return jsonify(build_report(name, params)), 200
+
+@job_handler('report')
+def build_report_job(job_id, params):
+    return build_report(params['name'], report_query_schema.load(params['args']))
+
+#REVENUE BY MONTH
+@reports_bp.route("/revenue-by-month", methods=['GET'])
+def revenue_by_month_report():
+    return report_response('revenue-by-month')
+
+#PARTS USAGE BY ITEM
+@reports_bp.route("/parts-usage", methods=['GET'])
+def parts_usage_report():
+    return report_response('parts-usage')
+
+#TICKETS PER MECHANIC PER WEEK
+@reports_bp.route("/mechanic-workload", methods=['GET'])
+def mechanic_workload_report():
+    return report_response('mechanic-workload')
+
+#TOP CUSTOMERS BY SPEND
+@reports_bp.route("/top-customers", methods=['GET'])
+def top_customers_report():
+    return report_response('top-customers')
@@ -0,0 +1,44 @@
+from app.extensions import ma
+from marshmallow import fields, validate, validates_schema, ValidationError, EXCLUDE
+
+class ReportQuerySchema(ma.Schema):
+    start_date = fields.Date()
+    end_date = fields.Date()
+    limit = fields.Int(validate=validate.Range(min=1, max=500))
+
+    class Meta:
+        unknown = EXCLUDE
+
+    @validates_schema
+    def validate_window(self, data, **kwargs):
+        if 'start_date' in data and 'end_date' in data and data['start_date'] > data['end_date']:
+            raise ValidationError("start_date must be on or before end_date.", "start_date")
+
+class RevenueByMonthSchema(ma.Schema):
+    month = fields.Str()
+    ticket_count = fields.Int()
+    revenue = fields.Decimal(places=2)
+
+class PartsUsageSchema(ma.Schema):
+    item_id = fields.Int()
+    name = fields.Str()
+    quantity = fields.Int()
+    revenue = fields.Decimal(places=2)
+
+class MechanicWorkloadSchema(ma.Schema):
+    mechanic_id = fields.Int()
+    name = fields.Str()
+    week = fields.Date()
+    ticket_count = fields.Int()
+
+class TopCustomerSchema(ma.Schema):
+    customer_id = fields.Int()
+    name = fields.Str()
+    ticket_count = fields.Int()
+    total_spend = fields.Decimal(places=2)
+
+report_query_schema = ReportQuerySchema()
+revenue_by_month_schema = RevenueByMonthSchema(many=True)
+parts_usage_schema = PartsUsageSchema(many=True)
+mechanic_workload_schema = MechanicWorkloadSchema(many=True)
+top_customers_schema = TopCustomerSchema(many=True)
@@ -0,0 +1,31 @@
+from sqlalchemy import null, select
+from app.models import Customer, Item, ServiceTicket, db
+from app.utils.search import search
+
+# What a result shows for each kind of record: (label, detail)
+RESULT_COLUMNS = {
+    'ticket': (ServiceTicket, ServiceTicket.vin, ServiceTicket.service_description),
+    'customer': (Customer, Customer.name, Customer.email),
+    'item': (Item, Item.name, null()),
+}
+
+# Ranked matches with one query per kind of record found to fill in labels
+def search_results(params):
+    matches = search(params['q'], [params['type']] if 'type' in params else None, params['limit'])
+
+    ids_by_kind = {}
+    for kind, entity_id, _ in matches:
+        ids_by_kind.setdefault(kind, []).append(entity_id)
+
+    labels = {}
+    for kind, ids in ids_by_kind.items():
+        model, label, detail = RESULT_COLUMNS[kind]
+        query = select(model.id, label, detail).where(model.id.in_(ids))
+        for entity_id, label_value, detail_value in db.session.execute(query):
+            labels[kind, entity_id] = (label_value, detail_value)
+
+    return [
+        {'type': kind, 'id': entity_id, 'label': labels[kind, entity_id][0],
+         'detail': labels[kind, entity_id][1], 'score': round(score, 3)}
+        for kind, entity_id, score in matches if (kind, entity_id) in labels
+    ]
@@ -0,0 +1,15 @@
+from flask import request, jsonify
+from marshmallow import ValidationError
+from .schemas import search_query_schema, search_results_schema
+from .queries import search_results
+from . import search_bp
+
+#SEARCH TICKETS, CUSTOMERS AND ITEMS
+@search_bp.route("/", methods=['GET'])
+def search():
+    try:
+        params = search_query_schema.load(request.args)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    return search_results_schema.jsonify(search_results(params)), 200
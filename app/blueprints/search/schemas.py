@@ -0,0 +1,21 @@
+from app.extensions import ma
+from marshmallow import fields, validate, EXCLUDE
+from app.utils.search import SEARCHABLE
+
+class SearchQuerySchema(ma.Schema):
+    q = fields.Str(required=True, validate=validate.Length(min=1, max=100))
+    type = fields.Str(validate=validate.OneOf(list(SEARCHABLE)))
+    limit = fields.Int(load_default=10, validate=validate.Range(min=1, max=50))
+
+    class Meta:
+        unknown = EXCLUDE
+
+class SearchResultSchema(ma.Schema):
+    type = fields.Str()
+    id = fields.Int()
+    label = fields.Str()
+    detail = fields.Str(allow_none=True)
+    score = fields.Float()
+
+search_query_schema = SearchQuerySchema()
+search_results_schema = SearchResultSchema(many=True)
@@ -0,0 +1,175 @@
+from datetime import timedelta
+from sqlalchemy import select, insert, delete, update, func, tuple_
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import selectinload
+from app.models import ServiceTicket, ServiceItems, Mechanic, Item, TicketChange, ticket_mechanic, db, utcnow
+from app.utils.caching import invalidate_entities
+from app.utils.changes import record_ticket_changes
+from app.utils.invoices import parts_total_subquery, round_money
+
+# Base query for every ticket read that gets serialized with TicketSchema.
+# Mechanics (through ticket_mechanic) and service items (with their item) are
+# loaded up front with one IN query each, so serializing N tickets costs the
+# same handful of statements as serializing one.
+def ticket_query():
+    return select(ServiceTicket).options(
+        selectinload(ServiceTicket.mechanics),
+        selectinload(ServiceTicket.service_items).joinedload(ServiceItems.item),
+    )
+
+def load_ticket(ticket_id):
+    query = ticket_query().where(ServiceTicket.id == ticket_id)
+    return db.session.execute(query).scalars().first()
+
+def load_tickets(ticket_ids):
+    query = ticket_query().where(ServiceTicket.id.in_(ticket_ids)).order_by(ServiceTicket.id)
+    return db.session.execute(query).scalars().all()
+
+# Core writes to ticket_mechanic/service_items bypass the ORM, so the
+# tickets' updated_at (and with it their ETags) is bumped and the change is
+# logged for delta sync explicitly. refresh_totals recomputes parts_total in
+# the same UPDATE.
+def touch_tickets(ticket_ids, refresh_totals=False):
+    values = {'updated_at': utcnow()}
+    if refresh_totals:
+        values['parts_total'] = parts_total_subquery()
+    db.session.execute(
+        update(ServiceTicket).where(ServiceTicket.id.in_(ticket_ids)).values(**values),
+        execution_options={'synchronize_session': False},
+    )
+    record_ticket_changes(ticket_ids)
+
+# Tickets whose latest logged change comes after change id `since`, in the
+# order of that change, as (ticket_id, change_id) rows. A ticket changed
+# several times appears once, at its last change, so paging by change_id
+# never skips a ticket. Fetches limit + 1 rows to tell whether more remain.
+#
+# Ids are handed out when a change is logged but become visible when its
+# transaction commits, so a slow transaction can commit a lower id after a
+# client has already synced past it. Entries younger than `settle_seconds`
+# are held back to give in-flight transactions time to commit.
+def changed_tickets(since, limit, settle_seconds=0):
+    last_change = func.max(TicketChange.id).label('change_id')
+    query = (
+        select(TicketChange.ticket_id, last_change)
+        .where(TicketChange.id > since)
+        .where(TicketChange.changed_at <= utcnow() - timedelta(seconds=settle_seconds))
+        .group_by(TicketChange.ticket_id)
+        .order_by(last_change)
+        .limit(limit + 1)
+    )
+    return db.session.execute(query).all()
+
+# Invoice lines for one ticket with the grand total computed alongside them
+# by a window sum, so the whole invoice is one aggregate join.
+def ticket_invoice_lines(ticket_id):
+    line_total = Item.price * ServiceItems.quantity
+    query = (
+        select(
+            Item.id.label('item_id'),
+            Item.name,
+            Item.price.label('unit_price'),
+            ServiceItems.quantity,
+            round_money(line_total).label('line_total'),
+            round_money(func.sum(line_total).over()).label('parts_total'),
+        )
+        .select_from(ServiceItems)
+        .join(Item, Item.id == ServiceItems.item_id)
+        .where(ServiceItems.service_id == ticket_id)
+        .order_by(ServiceItems.id)
+    )
+    return db.session.execute(query).mappings().all()
+
+def missing_ticket_ids(ticket_ids):
+    query = select(ServiceTicket.id).where(ServiceTicket.id.in_(ticket_ids))
+    found = set(db.session.execute(query).scalars())
+    return sorted(set(ticket_ids) - found)
+
+def missing_item_ids(item_ids):
+    query = select(Item.id).where(Item.id.in_(item_ids))
+    found = set(db.session.execute(query).scalars())
+    return sorted(set(item_ids) - found)
+
+# Apply mechanic assignment changes to any number of tickets with a fixed
+# number of statements: one IN query to resolve the mechanic ids, one to read
+# the affected ticket_mechanic rows, a single executemany insert and a single
+# delete, then one statement each to bump updated_at and log the change.
+# `changes` maps ticket_id -> (add_mechanic_ids, remove_mechanic_ids). As
+# before, ids that don't belong to a mechanic are ignored and a removal wins
+# over an addition of the same mechanic.
+def apply_mechanic_changes(changes):
+    requested_ids = set()
+    for add_ids, remove_ids in changes.values():
+        requested_ids.update(add_ids)
+        requested_ids.update(remove_ids)
+    if not requested_ids:
+        return
+
+    query = select(Mechanic.id).where(Mechanic.id.in_(requested_ids))
+    mechanic_ids = set(db.session.execute(query).scalars())
+
+    query = select(ticket_mechanic.c.ticket_id, ticket_mechanic.c.mechanic_id).where(
+        ticket_mechanic.c.ticket_id.in_(changes.keys()),
+        ticket_mechanic.c.mechanic_id.in_(mechanic_ids),
+    )
+    assigned = set(db.session.execute(query).tuples())
+
+    to_insert = set()
+    to_delete = set()
+    for ticket_id, (add_ids, remove_ids) in changes.items():
+        removals = {(ticket_id, mechanic_id) for mechanic_id in remove_ids if mechanic_id in mechanic_ids}
+        additions = {(ticket_id, mechanic_id) for mechanic_id in add_ids if mechanic_id in mechanic_ids}
+        to_insert |= additions - removals - assigned
+        to_delete |= removals & assigned
+
+    changed_ticket_ids = {ticket_id for ticket_id, _ in to_insert | to_delete}
+    invalidate_entities('ticket', changed_ticket_ids)
+    if to_insert:
+        db.session.execute(
+            insert(ticket_mechanic),
+            [{'ticket_id': ticket_id, 'mechanic_id': mechanic_id} for ticket_id, mechanic_id in sorted(to_insert)],
+        )
+    if to_delete:
+        db.session.execute(
+            delete(ticket_mechanic).where(
+                tuple_(ticket_mechanic.c.ticket_id, ticket_mechanic.c.mechanic_id).in_(sorted(to_delete))
+            )
+        )
+    if changed_ticket_ids:
+        touch_tickets(sorted(changed_ticket_ids))
+
+# Add quantities of parts to a ticket in one statement. The insert relies on
+# the (service_id, item_id) unique constraint: existing lines have their
+# quantity incremented inside the database, so concurrent requests adding the
+# same part never lose an update the way a read-modify-write would.
+# `quantities` maps item_id -> quantity to add.
+def upsert_service_items(ticket_id, quantities):
+    add_service_item_rows([
+        {'service_id': ticket_id, 'item_id': item_id, 'quantity': quantity}
+        for item_id, quantity in sorted(quantities.items())
+    ])
+    touch_tickets([ticket_id], refresh_totals=True)
+    invalidate_entities('ticket', [ticket_id])
+
+# The upsert itself, for any number of tickets. Rows must not repeat a
+# (service_id, item_id) pair; callers refresh the tickets afterwards.
+def add_service_item_rows(rows):
+    table = ServiceItems.__table__
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == 'mysql':
+        statement = mysql.insert(table).values(rows)
+        statement = statement.on_duplicate_key_update(
+            quantity=table.c.quantity + statement.inserted.quantity
+        )
+    elif dialect in ('postgresql', 'sqlite'):
+        dialect_insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        statement = dialect_insert(table).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.service_id, table.c.item_id],
+            set_={'quantity': table.c.quantity + statement.excluded.quantity},
+        )
+    else:
+        raise NotImplementedError(f"Part upserts are not supported on {dialect}.")
+
+    db.session.execute(statement)
@@ -1,11 +1,22 @@
-from flask import request, jsonify
+from flask import current_app, request, jsonify
 from marshmallow import ValidationError
+from .schemas import (ticket_schema, tickets_schema, ticket_rows, ticket_filters, edit_ticket_schema, bulk_edit_tickets_schema, ticket_parts_schema,
+                      invoice_schema, ticket_totals_schema, ticket_totals_query_schema)
+from .queries import (ticket_query, load_ticket, load_tickets, changed_tickets, ticket_invoice_lines, missing_ticket_ids, missing_item_ids,
+                      apply_mechanic_changes, upsert_service_items)
 from sqlalchemy import select
-from .schemas import ticket_schema, tickets_schema, edit_ticket_schema
-from app.models import ServiceTicket, Mechanic, Customer, db, Item, ServiceItems
+from app.models import ServiceTicket, Customer, Mechanic, Item, db
 from . import tickets_bp
-from app.extensions import limiter, cache
+from app.extensions import limiter
 from app.utils.util import token_required
+from app.utils.pagination import page_args, encode_cursor, decode_cursor, paginate, paginated_response
+from app.utils.serialization import paginate_serialized
+from app.utils.conditional import page_validators, entity_response
+from werkzeug.datastructures import MultiDict
+from app.utils.streaming import wants_stream, stream_response, write_ndjson
+from app.utils.jobs import job_handler, submit_job, wants_async, job_accepted, job_file_path
+from app.blueprints.jobs.schemas import job_schema
+from app.utils.caching import get_cached_entity
 
 # CREATE SERVICE TICKET
 @tickets_bp.route("/", methods=['POST'])
@@ -27,31 +38,110 @@ def create_ticket():
 
 #GET ALL SERVICE TICKETS
 @tickets_bp.route("/", methods=['GET'])
-# @cache.cached(timeout=60)
 def get_tickets():
-    query = select(ServiceTicket)
-    tickets = db.session.execute(query).scalars().all()
+    try:
+        query, sort = ticket_filters.apply(ticket_query())
+        if wants_stream():
+            if wants_async(): #full export written to a file by a background job
+                return job_accepted(submit_job('ticket-export', {'args': list(request.args.items(multi=True))}), job_schema)
+            return stream_response(query, ServiceTicket.id, ticket_schema)
+
+        validators = page_validators(query, ServiceTicket.id, ServiceTicket.updated_at, related=(Mechanic, Item), **sort)
+        if validators.not_modified():
+            return validators.not_modified_response()
+        serializer, tickets, next_cursor = paginate_serialized(query, ServiceTicket.id, tickets_schema, ticket_rows, **sort)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
 
-    return tickets_schema.jsonify(tickets)
+    return validators.apply(paginated_response(serializer, tickets, next_cursor)), 200
+
+@job_handler('ticket-export')
+def export_tickets_job(job_id, params):
+    query, _ = ticket_filters.apply(ticket_query(), MultiDict(params['args']))
+    rows = write_ndjson(query, ServiceTicket.id, ticket_schema, job_file_path(job_id, '.ndjson'))
+    return {"rows": rows, "download": f"/jobs/{job_id}/download"}
+
+#GET SERVICE TICKETS CHANGED SINCE A CURSOR
+@tickets_bp.route("/changes", methods=['GET'])
+def get_ticket_changes():
+    try:
+        limit, _ = page_args()
+        since = decode_cursor(request.args['since'], 'since')[0] if request.args.get('since') else 0
+        if not isinstance(since, int):
+            raise ValidationError({"since": ["Invalid cursor."]})
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    changes = changed_tickets(since, limit, current_app.config['TICKET_CHANGES_SETTLE_SECONDS'])
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    tickets = load_tickets([ticket_id for ticket_id, _ in changes])
+    found = {ticket.id for ticket in tickets}
+    # tickets are returned by id, so clients should apply them as a set
+    return jsonify({
+        "tickets": tickets_schema.dump(tickets),
+        "deleted": [ticket_id for ticket_id, _ in changes if ticket_id not in found],
+        "cursor": encode_cursor([changes[-1][1] if changes else since]),
+        "has_more": has_more,
+    }), 200
+
+#GET PARTS TOTALS FOR ALL SERVICE TICKETS
+@tickets_bp.route("/totals", methods=['GET'])
+def get_ticket_totals():
+    try:
+        params = ticket_totals_query_schema.load(request.args)
+        sort_column = ServiceTicket.parts_total if params['sort'] == 'parts_total' else None
+        query = select(ServiceTicket.id, ServiceTicket.customer_id, ServiceTicket.service_date, ServiceTicket.parts_total)
+        tickets, next_cursor = paginate(query, ServiceTicket.id, scalars=False,
+                                        sort_column=sort_column, descending=params['order'] == 'desc')
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    return paginated_response(ticket_totals_schema, tickets, next_cursor), 200
+
+#GET SERVICE TICKET INVOICE
+@tickets_bp.route("/<int:ticket_id>/invoice", methods=['GET'])
+def get_ticket_invoice(ticket_id):
+    if missing_ticket_ids([ticket_id]):
+        return jsonify({"error": "Ticket not found."}), 404
+
+    lines = ticket_invoice_lines(ticket_id)
+    invoice = {
+        "ticket_id": ticket_id,
+        "lines": lines,
+        "parts_total": lines[0]['parts_total'] if lines else 0,
+    }
+    return invoice_schema.jsonify(invoice), 200
 
 #GET SPECIFIC SERVICE TICKET
 @tickets_bp.route("/<int:ticket_id>", methods=['GET'])
 def get_ticket(ticket_id):
-    ticket = db.session.get(ServiceTicket, ticket_id)
+    ticket = get_cached_entity('ticket', ticket_id, ticket_schema, load_ticket)
 
     if ticket:
-        return ticket_schema.jsonify(ticket), 200
+        return entity_response(ticket)
     return jsonify({"error": "Ticket not found."}), 404
 
 #GET SERVICE TICKETS BY CUSTOMER
 @tickets_bp.route("/my-tickets", methods=['GET'])
 @token_required
 def get_tickets_by_customer(customer_id):
-    query = select(ServiceTicket).where(ServiceTicket.customer_id == customer_id) 
-    tickets = db.session.execute(query).scalars().all()
+    try:
+        query, sort = ticket_filters.apply(ticket_query().where(ServiceTicket.customer_id == customer_id))
+        if wants_stream():
+            return stream_response(query, ServiceTicket.id, ticket_schema)
+
+        validators = page_validators(query, ServiceTicket.id, ServiceTicket.updated_at, related=(Mechanic, Item), **sort)
+        if validators.not_modified():
+            return validators.not_modified_response()
+        serializer, tickets, next_cursor = paginate_serialized(query, ServiceTicket.id, tickets_schema, ticket_rows, **sort)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
 
-    if tickets:
-        return tickets_schema.jsonify(tickets), 200
+    # an empty filtered or later page is just an empty list
+    if tickets or set(request.args) - {'limit'}:
+        return validators.apply(paginated_response(serializer, tickets, next_cursor)), 200
     return jsonify({"error": "No tickets associated with you"}), 404
 
 #DELETE SPECIFIC SERVICE TICKET
@@ -74,58 +164,72 @@ def edit_ticket(ticket_id):
     except ValidationError as e:
         return jsonify(e.messages), 400
     
-    query = select(ServiceTicket).where(ServiceTicket.id == ticket_id) 
-    ticket = db.session.execute(query).scalars().first()
-    
-    for mechanic_id in ticket_edits['add_mechanic_ids']:
-        query = select(Mechanic).where(Mechanic.id == mechanic_id)
-        mechanic = db.session.execute(query).scalars().first()
-        
-        if mechanic and mechanic not in ticket.mechanics:
-            ticket.mechanics.append(mechanic)
-
-    for mechanic_id in ticket_edits['remove_mechanic_ids']:
-        query = select(Mechanic).where(Mechanic.id == mechanic_id)
-        mechanic = db.session.execute(query).scalars().first()
-        
-        if mechanic and mechanic in ticket.mechanics:
-            ticket.mechanics.remove(mechanic)
+    if missing_ticket_ids([ticket_id]):
+        return jsonify({"error": "Ticket not found."}), 404
 
+    apply_mechanic_changes({ticket_id: (ticket_edits['add_mechanic_ids'], ticket_edits['remove_mechanic_ids'])})
     db.session.commit()
-    return ticket_schema.jsonify(ticket)
+    return ticket_schema.jsonify(load_ticket(ticket_id))
+
+# EDIT MECHANIC ASSIGNMENTS FOR MANY SERVICE TICKETS
+@tickets_bp.route("/edit", methods=['PUT'])
+def bulk_edit_tickets():
+    try:
+        ticket_edits = bulk_edit_tickets_schema.load(request.json)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    changes = {}
+    for ticket_edit in ticket_edits:
+        add_ids, remove_ids = changes.setdefault(ticket_edit['ticket_id'], ([], []))
+        add_ids.extend(ticket_edit['add_mechanic_ids'])
+        remove_ids.extend(ticket_edit['remove_mechanic_ids'])
+
+    if not changes:
+        return tickets_schema.jsonify([]), 200
+
+    missing_ids = missing_ticket_ids(changes.keys())
+    if missing_ids:
+        return jsonify({"error": "Tickets not found.", "ticket_ids": missing_ids}), 404
+
+    apply_mechanic_changes(changes)
+    db.session.commit()
+    return tickets_schema.jsonify(load_tickets(changes.keys())), 200
 
 @tickets_bp.route("/add-part/<int:item_id>/to-ticket/<int:ticket_id>", methods=['PUT'])
 def add_part_to_ticket(item_id, ticket_id):
-    query = select(ServiceTicket).where(ServiceTicket.id == ticket_id) 
-    ticket = db.session.execute(query).scalars().first()
-    
-    if not ticket:
+    if missing_ticket_ids([ticket_id]):
         return jsonify({"error": "Ticket not found."}), 404
     
-    query = select(Item).where(Item.id == item_id)
-    part = db.session.execute(query).scalars().first()
-    
-    if not part:
+    if missing_item_ids([item_id]):
         return jsonify({"error": "Part not found."}), 404
     
-    # Check if item already exists in this ticket
-    query = select(ServiceItems).where(
-        ServiceItems.service_id == ticket_id,
-        ServiceItems.item_id == item_id
-    )
-    existing_service_item = db.session.execute(query).scalar_one_or_none()
-    
-    if existing_service_item:
-        # Increment quantity if already exists
-        existing_service_item.quantity += 1
-    else:
-        # Create new ServiceItems entry with quantity 1
-        new_service_item = ServiceItems(
-            service_id=ticket_id,
-            item_id=item_id,
-            quantity=1
-        )
-        db.session.add(new_service_item)
-
+    # Creates the line with quantity 1, or increments it if the part is already on the ticket
+    upsert_service_items(ticket_id, {item_id: 1})
     db.session.commit()
-    return ticket_schema.jsonify(ticket)
+    return ticket_schema.jsonify(load_ticket(ticket_id))
+
+# ADD MANY PARTS TO A SERVICE TICKET
+@tickets_bp.route("/<int:ticket_id>/parts", methods=['PUT'])
+def add_parts_to_ticket(ticket_id):
+    try:
+        parts = ticket_parts_schema.load(request.json)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    if missing_ticket_ids([ticket_id]):
+        return jsonify({"error": "Ticket not found."}), 404
+
+    quantities = {}
+    for part in parts:
+        quantities[part['item_id']] = quantities.get(part['item_id'], 0) + part['quantity']
+
+    if quantities:
+        missing_ids = missing_item_ids(quantities.keys())
+        if missing_ids:
+            return jsonify({"error": "Parts not found.", "item_ids": missing_ids}), 404
+
+        upsert_service_items(ticket_id, quantities)
+        db.session.commit()
+
+    return ticket_schema.jsonify(load_ticket(ticket_id)), 200
@@ -1,6 +1,8 @@
 from app.extensions import ma
 from app.models import ServiceTicket, ServiceItems, Item
-from marshmallow import fields
+from marshmallow import fields, validate, EXCLUDE
+from app.utils.serialization import TicketRowSerializer
+from app.utils.filtering import ListFilters
 
 class ItemInTicketSchema(ma.Schema):
     id = fields.Int(attribute='item.id')
@@ -15,6 +17,7 @@ class TicketSchema(ma.SQLAlchemyAutoSchema):
     
     class Meta:
         model = ServiceTicket
+        dump_only = ('updated_at', 'parts_total')
 
 class EditTicketSchema(ma.Schema):
     add_mechanic_ids = fields.List(fields.Int(), required=True)
@@ -22,7 +25,56 @@ class EditTicketSchema(ma.Schema):
     
     class Meta:
         fields = ("add_mechanic_ids", "remove_mechanic_ids")
+
+class BulkEditTicketSchema(EditTicketSchema):
+    ticket_id = fields.Int(required=True)
+
+    class Meta:
+        fields = ("ticket_id", "add_mechanic_ids", "remove_mechanic_ids")
     
+class TicketPartSchema(ma.Schema):
+    item_id = fields.Int(required=True)
+    quantity = fields.Int(load_default=1, validate=validate.Range(min=1))
+
+    class Meta:
+        fields = ("item_id", "quantity")
+
+class InvoiceLineSchema(ma.Schema):
+    item_id = fields.Int()
+    name = fields.Str()
+    unit_price = fields.Float()
+    quantity = fields.Int()
+    line_total = fields.Decimal(places=2)
+
+class InvoiceSchema(ma.Schema):
+    ticket_id = fields.Int()
+    lines = fields.Nested(InvoiceLineSchema, many=True)
+    parts_total = fields.Decimal(places=2)
+
+class TicketTotalSchema(ma.Schema):
+    id = fields.Int()
+    customer_id = fields.Int()
+    service_date = fields.Date()
+    parts_total = fields.Decimal(places=2)
+
+class TicketTotalsQuerySchema(ma.Schema):
+    sort = fields.Str(load_default='parts_total', validate=validate.OneOf(['parts_total', 'id']))
+    order = fields.Str(load_default='desc', validate=validate.OneOf(['asc', 'desc']))
+
+    class Meta:
+        unknown = EXCLUDE
+
 ticket_schema = TicketSchema()
 tickets_schema = TicketSchema(many=True)
+ticket_rows = TicketRowSerializer(tickets_schema)
+ticket_filters = ListFilters(
+    filters=[ServiceTicket.vin, ServiceTicket.customer_id],
+    ranges=[ServiceTicket.service_date, ServiceTicket.parts_total],
+    sorts=[ServiceTicket.service_date, ServiceTicket.parts_total],
+)
 edit_ticket_schema = EditTicketSchema()
+bulk_edit_tickets_schema = BulkEditTicketSchema(many=True)
+ticket_parts_schema = TicketPartSchema(many=True)
+invoice_schema = InvoiceSchema()
+ticket_totals_schema = TicketTotalSchema(many=True)
+ticket_totals_query_schema = TicketTotalsQuerySchema()
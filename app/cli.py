@@ -0,0 +1,67 @@
+import click
+from app.models import db
+from app.utils.schema import upgrade_schema
+from app.utils.search import rebuild_search_index
+from app.utils.importer import IMPORT_ORDER, DEFAULT_BATCH_SIZE, Importer, file_format
+from app.utils.jobs import work
+
+@click.command('upgrade-db')
+def upgrade_db_command():
+    """Add missing tables, columns, indexes and unique keys to an existing database."""
+    applied = upgrade_schema()
+    for change in applied:
+        click.echo(change)
+    click.echo(f'Schema up to date ({len(applied)} changes applied).')
+
+@click.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Rebuild the search index from the tickets, customers and items tables."""
+    with db.engine.begin() as connection:
+        count = rebuild_search_index(connection)
+    click.echo(f'Search index rebuilt ({count} records indexed).')
+
+@click.command('import-data')
+@click.option('--customers', type=click.Path(exists=True, dir_okay=False), help='Customers file (.csv, .ndjson or .jsonl).')
+@click.option('--mechanics', type=click.Path(exists=True, dir_okay=False), help='Mechanics file.')
+@click.option('--items', type=click.Path(exists=True, dir_okay=False), help='Inventory items file.')
+@click.option('--tickets', type=click.Path(exists=True, dir_okay=False), help='Service tickets file, with mechanic_ids as a list (CSV: "3;7").')
+@click.option('--ticket-items', type=click.Path(exists=True, dir_okay=False), help='Ticket line items file (ticket_id, item_id, quantity).')
+@click.option('--batch-size', type=click.IntRange(1, 10000), default=DEFAULT_BATCH_SIZE, show_default=True, help='Rows inserted per transaction.')
+def import_data_command(batch_size, **paths):
+    """Import records from CSV or NDJSON files, in dependency order.
+
+    Ids in the files are the old system's ids; references between files of
+    the same run are resolved through them.
+    """
+    if not any(paths.values()):
+        raise click.UsageError('Pass at least one file to import.')
+    for kind, path in paths.items():
+        if path and file_format(path) is None:
+            raise click.BadParameter('expected a .csv, .ndjson or .jsonl file.', param_hint=f"--{kind.replace('_', '-')}")
+
+    importer = Importer(batch_size=batch_size)
+    for kind in IMPORT_ORDER:
+        path = paths[kind]
+        if not path:
+            continue
+        result = importer.import_file(kind, path)
+        click.echo(
+            f'{kind}: {result.created} imported, {result.rejected} rejected of {result.rows} rows '
+            f'in {result.seconds:.1f}s ({result.rows_per_second:.0f} rows/s)'
+        )
+        for line, errors in result.errors:
+            click.echo(f'  {path}:{line}: {errors}', err=True)
+        if result.rejected > len(result.errors):
+            click.echo(f'  ... {result.rejected - len(result.errors)} more rejected rows', err=True)
+
+@click.command('run-jobs')
+@click.option('--once', is_flag=True, help='Exit when the queue is empty instead of waiting for new jobs.')
+def run_jobs_command(once):
+    """Run queued background jobs, e.g. as a dedicated worker with JOB_WORKERS=0, and fail jobs abandoned by a stopped process."""
+    work(once=once)
+
+def register_commands(app):
+    app.cli.add_command(upgrade_db_command)
+    app.cli.add_command(rebuild_search_index_command)
+    app.cli.add_command(import_data_command)
+    app.cli.add_command(run_jobs_command)
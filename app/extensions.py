@@ -1,6 +1,7 @@
 from flask_marshmallow import Marshmallow
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from flask import current_app
 from flask_caching import Cache
 
 ma = Marshmallow()
@@ -9,3 +10,26 @@ limiter = Limiter(
     default_limits=["1000 per day", "150 per hour"],
 )
 cache = Cache()
+token_store = Cache()
+
+# Full key for `cache`. SimpleCache and FileSystemCache ignore
+# CACHE_KEY_PREFIX, so the environment and CACHE_VERSION are added here.
+def cache_key(key):
+    return f"{current_app.config['CACHE_NAMESPACE']}v{current_app.config['CACHE_VERSION']}:{key}"
+
+# Full key for `token_store`: per environment, never versioned
+def token_store_key(key):
+    return current_app.config['CACHE_NAMESPACE'] + key
+
+# Same backend as `cache` under its own Redis prefix or directory, so
+# cache.clear() never reaches it. FileSystemCache prunes files past
+# CACHE_THRESHOLD, which would drop revocations, so it gets no limit there
+# (0 would mean "keep nothing" for SimpleCache).
+def init_token_store(app):
+    config = {
+        'CACHE_KEY_PREFIX': app.config['TOKEN_STORE_KEY_PREFIX'],
+        'CACHE_DIR': app.config['TOKEN_STORE_DIR'],
+    }
+    if app.config['CACHE_TYPE'] == 'FileSystemCache':
+        config['CACHE_THRESHOLD'] = 0
+    token_store.init_app(app, config=config)
@@ -1,46 +1,78 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from datetime import date
-from typing import List
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import List, Optional
 
 class Base(DeclarativeBase):
     pass
 
 db = SQLAlchemy(model_class=Base)
 
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+# Last change to a row, used for ETag/Last-Modified validators. Microsecond
+# precision on MySQL too, so two changes within one second still differ.
+# Nullable only so it can be added to existing tables; upgrade_schema fills it in.
+def updated_at_column():
+    return mapped_column(
+        db.DateTime().with_variant(mysql.DATETIME(fsp=6), 'mysql'),
+        default=utcnow, onupdate=utcnow, index=True,
+    )
+
 ticket_mechanic = db.Table(
     'ticket_mechanic',
     Base.metadata,
-    db.Column('ticket_id', db.ForeignKey('service_tickets.id')),
-    db.Column('mechanic_id', db.ForeignKey('mechanics.id'))
+    db.Column('ticket_id', db.ForeignKey('service_tickets.id'), primary_key=True),
+    db.Column('mechanic_id', db.ForeignKey('mechanics.id'), primary_key=True),
+    # The primary key covers lookups by ticket; this one serves lookups by mechanic
+    db.Index('ix_ticket_mechanic_mechanic_id', 'mechanic_id'),
 )
 
 class Customer(Base):
     __tablename__ = 'customers'
+    __table_args__ = (
+        # ?name= filter and ?sort=name, id as the tiebreaker (keyset pagination)
+        db.Index('ix_customers_name', 'name', 'id'),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(db.String(255), nullable=False)
     email: Mapped[str] = mapped_column(db.String(254), nullable=False, unique=True)
     phone: Mapped[str] = mapped_column(db.String(25))
     password: Mapped[str] = mapped_column(db.String(255), nullable=False)
+    updated_at: Mapped[Optional[datetime]] = updated_at_column()
 
     service_tickets: Mapped[List['ServiceTicket']] = db.relationship(back_populates='customer')
 
 class ServiceTicket(Base):
     __tablename__ = 'service_tickets'
+    __table_args__ = (
+        # Sorting by total with id as the tiebreaker (keyset pagination)
+        db.Index('ix_service_tickets_parts_total', 'parts_total', 'id'),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
-    vin: Mapped[str] = mapped_column(db.String(25), nullable=False)
-    service_date: Mapped[date] = mapped_column(db.Date)
+    vin: Mapped[str] = mapped_column(db.String(25), nullable=False, index=True)
+    service_date: Mapped[date] = mapped_column(db.Date, index=True)
     service_description: Mapped[str] = mapped_column(db.String(360), nullable=False)
-    customer_id: Mapped[int] = mapped_column(db.ForeignKey('customers.id'))
+    customer_id: Mapped[int] = mapped_column(db.ForeignKey('customers.id'), index=True)
+    updated_at: Mapped[Optional[datetime]] = updated_at_column()
+    # sum(price * quantity) of the ticket's parts, maintained by app/utils/invoices.py
+    parts_total: Mapped[Optional[Decimal]] = mapped_column(db.Numeric(12, 2), default=0)
 
     customer: Mapped['Customer'] = db.relationship(back_populates='service_tickets')
-    mechanics: Mapped[List['Mechanic']] = db.relationship(secondary=ticket_mechanic, back_populates='service_tickets')
-    service_items: Mapped[List['ServiceItems']] = db.relationship(back_populates='service_ticket')
+    mechanics: Mapped[List['Mechanic']] = db.relationship(secondary=ticket_mechanic, back_populates='service_tickets', order_by='Mechanic.id')
+    service_items: Mapped[List['ServiceItems']] = db.relationship(back_populates='service_ticket', order_by='ServiceItems.id')
     
 class Mechanic(Base):
     __tablename__ = 'mechanics'
+    __table_args__ = (
+        db.Index('ix_mechanics_name', 'name', 'id'),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(db.String(255), nullable=False)
@@ -48,25 +80,87 @@ class Mechanic(Base):
     address: Mapped[str] = mapped_column(db.String(360), nullable=False)
     phone: Mapped[str] = mapped_column(db.String(25))
     salary: Mapped[float] = mapped_column(db.Numeric(10, 2))
+    updated_at: Mapped[Optional[datetime]] = updated_at_column()
     
     service_tickets: Mapped[List['ServiceTicket']] = db.relationship(secondary=ticket_mechanic, back_populates='mechanics')
 
 class Item(Base):
     __tablename__ = 'items'
+    __table_args__ = (
+        db.Index('ix_items_name', 'name', 'id'),
+        db.Index('ix_items_price', 'price', 'id'),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(db.String(255), nullable=False)
     price: Mapped[float] = mapped_column(db.Float(), nullable=False)
+    updated_at: Mapped[Optional[datetime]] = updated_at_column()
     
     service_items: Mapped[List['ServiceItems']] = db.relationship(back_populates='item')
 
 class ServiceItems(Base):
     __tablename__ = 'service_items'
+    __table_args__ = (
+        db.UniqueConstraint('service_id', 'item_id', name='uq_service_items_service_item'),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     service_id: Mapped[int] = mapped_column(db.ForeignKey('service_tickets.id'), nullable=False)
-    item_id: Mapped[int] = mapped_column(db.ForeignKey('items.id'), nullable=False)
+    item_id: Mapped[int] = mapped_column(db.ForeignKey('items.id'), nullable=False, index=True)
     quantity: Mapped[int] = mapped_column(nullable=False)
     
     service_ticket: Mapped['ServiceTicket'] = db.relationship(back_populates='service_items')
     item: Mapped['Item'] = db.relationship(back_populates='service_items')
+
+# Append-only log of ticket changes for delta sync (GET /service-tickets/changes).
+# One row per ticket per change; whether it was an update or a delete is read
+# off the ticket table when the log is served. No foreign key, so entries
+# for deleted tickets (tombstones) stay behind.
+class TicketChange(Base):
+    __tablename__ = 'ticket_changes'
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    ticket_id: Mapped[int] = mapped_column(index=True)
+    changed_at: Mapped[datetime] = mapped_column(db.DateTime, default=utcnow)
+
+# Trigram index behind GET /search, maintained by app/utils/search.py. One row
+# per distinct trigram of a record's searchable text; the primary key is the
+# lookup index by trigram, the second index finds a record's rows to replace.
+class SearchTrigram(Base):
+    __tablename__ = 'search_trigrams'
+    __table_args__ = (
+        db.Index('ix_search_trigrams_entity', 'kind', 'entity_id'),
+    )
+
+    trigram: Mapped[str] = mapped_column(db.String(3), primary_key=True)
+    kind: Mapped[str] = mapped_column(db.String(16), primary_key=True)
+    entity_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+
+# Background jobs (app/utils/jobs.py). params and result hold JSON text;
+# LONGTEXT on MySQL, where TEXT stops at 64 KB and a bulk create payload
+# can be larger.
+def json_text_column():
+    return mapped_column(db.Text().with_variant(mysql.LONGTEXT(), 'mysql'))
+
+class Job(Base):
+    __tablename__ = 'jobs'
+
+    id: Mapped[str] = mapped_column(db.String(32), primary_key=True)
+    kind: Mapped[str] = mapped_column(db.String(32), nullable=False)
+    status: Mapped[str] = mapped_column(db.String(16), nullable=False, default='queued', index=True)
+    params: Mapped[Optional[str]] = json_text_column()
+    result: Mapped[Optional[str]] = json_text_column()
+    error: Mapped[Optional[str]] = json_text_column()
+    created_at: Mapped[datetime] = mapped_column(db.DateTime, default=utcnow)
+    started_at: Mapped[Optional[datetime]] = mapped_column(db.DateTime)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(db.DateTime)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(db.DateTime)
+
+# Mechanic and part changes made through the ORM (e.g. ticket.mechanics.append)
+# only touch the association rows, so bump the ticket's updated_at here.
+# Core statements in service_ticket/queries.py do the same explicitly.
+@event.listens_for(db.session, 'before_flush')
+def _touch_changed_tickets(session, flush_context, instances):
+    for obj in session.dirty:
+        if isinstance(obj, ServiceTicket) and session.is_modified(obj):
+            obj.updated_at = utcnow()
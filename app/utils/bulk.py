@@ -0,0 +1,111 @@
+from flask import current_app, jsonify
+from marshmallow import ValidationError
+from sqlalchemy import insert, select, text
+from app.models import db, Customer, Mechanic, Item
+from app.utils.caching import invalidate_entities
+from app.utils.search import MODEL_KINDS, SEARCHABLE, index_records
+
+# Bulk create endpoints (POST /<resource>/bulk). The whole list is validated
+# with the blueprint's many=True schema, rows that fail are skipped, and the
+# rest are inserted with one executemany in a single transaction. Every row is
+# reported by its index in the request, so a client can fix and resend only
+# the rejected ones.
+
+# Checks the shape of the request body, before it is queued as a job
+def check_payload(payload):
+    if not isinstance(payload, list) or not payload:
+        raise ValidationError({"_schema": ["Expected a non-empty list of objects."]})
+    max_rows = current_app.config['BULK_MAX_ROWS']
+    if len(payload) > max_rows:
+        raise ValidationError({"_schema": [f"At most {max_rows} rows per request."]})
+
+# Returns ({index: data} of valid rows, {index: messages} of invalid ones)
+def load_rows(schema, payload):
+    check_payload(payload)
+    try:
+        return dict(enumerate(schema.load(payload))), {}
+    except ValidationError as e:
+        if not isinstance(e.valid_data, list):
+            raise
+        errors = e.messages
+        return {index: row for index, row in enumerate(e.valid_data) if index not in errors}, errors
+
+# Rejects rows whose email is taken, either by an existing record (one IN
+# query for the whole batch) or by an earlier row of the same request.
+def reject_duplicate_emails(model, rows, errors):
+    emails = {row['email'] for row in rows.values()}
+    taken = set(db.session.execute(select(model.email).where(model.email.in_(emails))).scalars()) if emails else set()
+    seen = set()
+    for index in sorted(rows):
+        email = rows[index]['email']
+        if email in taken:
+            errors[index] = {"email": ["Email already used"]}
+        elif email in seen:
+            errors[index] = {"email": ["Email appears more than once in this request"]}
+        seen.add(email)
+    for index in errors:
+        rows.pop(index, None)
+
+# Entity cache kind of each model with a bulk create endpoint
+CACHE_KINDS = {Customer: 'customer', Mechanic: 'mechanic', Item: 'item'}
+
+# Inserts the valid rows with Core rather than the ORM, which falls back to
+# one INSERT per row on MySQL, so the search index and entity cache are
+# updated here instead of by the flush hooks. Returns the new ids in order.
+def create_rows(model, rows, natural_key=None):
+    values = [rows[index] for index in sorted(rows)]
+    if not values:
+        return []
+    ids = insert_returning_ids(model.__table__, values, natural_key)
+    kind = MODEL_KINDS.get(model)
+    if kind is not None:
+        searchable = SEARCHABLE[kind][1]
+        index_records(db.session, kind, [
+            (new_id, *[row.get(column) for column in searchable]) for new_id, row in zip(ids, values)
+        ], replace=False)
+    invalidate_entities(CACHE_KINDS[model], ids)
+    db.session.commit()
+    return ids
+
+# Inserts the rows and returns their new primary keys in row order.
+# SQLite, PostgreSQL and MariaDB do it in one executemany with RETURNING.
+# MySQL has no RETURNING, so the ids are read back instead: by a unique
+# natural key when the table has one, otherwise from LAST_INSERT_ID() of
+# a multi-row INSERT, whose ids are consecutive when
+# innodb_autoinc_lock_mode is 0 or 1. Under mode 2 (the MySQL 8 default)
+# other sessions' inserts can interleave, so rows go one by one.
+# `autoinc_step` looks up that step; the importer caches it per run.
+def insert_returning_ids(table, rows, natural_key=None, autoinc_step=None):
+    dialect = db.session.get_bind().dialect
+    if dialect.insert_executemany_returning_sort_by_parameter_order:
+        statement = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+        return list(db.session.execute(statement, rows).scalars())
+    if natural_key is not None:
+        db.session.execute(insert(table), rows)
+        keys = [row[natural_key] for row in rows]
+        query = select(table.c[natural_key], table.c.id).where(table.c[natural_key].in_(keys))
+        ids = dict(db.session.execute(query).all())
+        return [ids[key] for key in keys]
+    step = (autoinc_step or consecutive_autoinc_step)(dialect)
+    if step:
+        first_id = db.session.execute(insert(table).values(rows)).lastrowid
+        return list(range(first_id, first_id + step * len(rows), step))
+    return [db.session.execute(insert(table), row).inserted_primary_key[0] for row in rows]
+
+# The auto-increment step when a multi-row INSERT is given consecutive ids,
+# None otherwise
+def consecutive_autoinc_step(dialect):
+    if dialect.name != 'mysql':
+        return None
+    lock_mode, step = db.session.execute(text('SELECT @@innodb_autoinc_lock_mode, @@auto_increment_increment')).one()
+    return step if lock_mode <= 1 else None
+
+def bulk_result(ids, errors):
+    return {
+        "created_count": len(ids),
+        "created_ids": ids,
+        "errors": [{"index": index, "errors": errors[index]} for index in sorted(errors)],
+    }
+
+def bulk_response(result):
+    return jsonify(result), 201 if result["created_count"] else 400
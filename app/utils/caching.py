@@ -0,0 +1,100 @@
+import uuid
+from flask import has_app_context
+from sqlalchemy import event
+from app.extensions import cache, cache_key
+from app.models import db, Customer, Mechanic, Item, ServiceTicket, ServiceItems
+from app.utils.metrics import serialization_timer
+
+# Read-through cache for single-entity GETs. Entries hold the already
+# serialized dict, so a hit skips both the database and marshmallow.
+#
+# Every entry is stamped with version tokens read *before* the row was
+# loaded, and is only served while those tokens are still current. A commit
+# replaces the tokens of what it changed with new random ones, so an entry
+# written by a reader that loaded the row before the commit is never served,
+# and an expired or evicted token can't come back to match an old entry.
+#
+# Tickets embed their mechanics and items, so a change to any mechanic or
+# item can make any cached ticket stale. Instead of tracking which tickets
+# reference what, ticket entries also carry the ('ticket', '*') token, which
+# is replaced whenever a mechanic or item changes.
+PENDING_KEY = 'entity_cache_invalidations'
+
+def entity_cache_key(kind, entity_id):
+    return cache_key(f'entity:{kind}:{entity_id}')
+
+def _version_key(kind, entity_id):
+    return cache_key(f'entity:{kind}:{entity_id}:version')
+
+def _new_version():
+    return uuid.uuid4().hex
+
+def _start_version(version_key):
+    version = _new_version()
+    if cache.add(version_key, version):
+        return version
+    return cache.get(version_key) or version
+
+def get_cached_entity(kind, entity_id, schema, load):
+    key = entity_cache_key(kind, entity_id)
+    version_keys = [_version_key(kind, entity_id)]
+    if kind == 'ticket':
+        version_keys.append(_version_key('ticket', '*'))
+    *versions, entry = cache.get_many(*version_keys, key)
+    versions = [version or _start_version(version_key) for version, version_key in zip(versions, version_keys)]
+    # anything else, e.g. an entry in an older shape, is a miss
+    if isinstance(entry, list) and len(entry) == 2 and entry[0] == versions:
+        return entry[1]
+
+    entity = load(entity_id)
+    if entity is None:
+        return None
+    with serialization_timer():
+        data = schema.dump(entity)
+    cache.set(key, [versions, data])
+    return data
+
+# Writes made with Core statements (ticket_mechanic, service_items upserts)
+# are invisible to the flush hooks below, so those helpers record the
+# affected entities here. Nothing is evicted until the transaction commits.
+def invalidate_entities(kind, entity_ids):
+    pending = db.session.info.setdefault(PENDING_KEY, set())
+    pending.update((kind, entity_id) for entity_id in entity_ids)
+
+def _entity_keys(session, obj, new, deleted):
+    if isinstance(obj, Customer):
+        return [('customer', obj.id)]
+    if isinstance(obj, ServiceTicket):
+        return [('ticket', obj.id)]
+    if isinstance(obj, ServiceItems):
+        return [('ticket', obj.service_id)]
+    if isinstance(obj, (Mechanic, Item)):
+        kind = 'mechanic' if isinstance(obj, Mechanic) else 'item'
+        keys = [(kind, obj.id)]
+        # A collection-only change (e.g. a backref append) leaves the
+        # serialized tickets untouched.
+        if obj in new or obj in deleted or session.is_modified(obj, include_collections=False):
+            keys.append(('ticket', '*'))
+        return keys
+    return []
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_invalidations(session, flush_context):
+    pending = session.info.setdefault(PENDING_KEY, set())
+    # session.new/dirty/deleted build a new set on every access, so read
+    # them once rather than per object (bulk creates flush thousands)
+    new, deleted = session.new, session.deleted
+    for obj in list(new) + list(session.dirty) + list(deleted):
+        pending.update(_entity_keys(session, obj, new, deleted))
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_invalidations(session):
+    pending = session.info.pop(PENDING_KEY, None)
+    if not pending or not has_app_context():
+        return
+
+    cache.set_many({_version_key(kind, entity_id): _new_version() for kind, entity_id in pending})
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_invalidations(session):
+    session.info.pop(PENDING_KEY, None)
@@ -0,0 +1,60 @@
+from sqlalchemy import event, insert, select
+from app.models import db, utcnow, Mechanic, Item, ServiceTicket, ServiceItems, TicketChange, ticket_mechanic
+
+# Records every ticket whose serialized form changes in ticket_changes:
+# the ticket itself, its mechanics and parts, and mechanics or items it
+# embeds. ORM changes are picked up from the session; Core writes in
+# service_ticket/queries.py call record_ticket_changes themselves. Log rows
+# are written in the same transaction as the change, so a rollback drops
+# them too.
+PENDING_KEY = 'ticket_changes'
+
+def _change_rows(ticket_ids):
+    now = utcnow()
+    return [{'ticket_id': ticket_id, 'changed_at': now} for ticket_id in sorted(set(ticket_ids))]
+
+def record_ticket_changes(ticket_ids):
+    if ticket_ids:
+        db.session.execute(insert(TicketChange.__table__), _change_rows(ticket_ids))
+
+def _pending(session):
+    return session.info.setdefault(PENDING_KEY, set())
+
+# Tickets embedding an edited or deleted mechanic/item have to be looked up
+# before the flush, while the association rows still exist.
+@event.listens_for(db.session, 'before_flush')
+def _collect_embedding_tickets(session, flush_context, instances):
+    mechanic_ids = set()
+    item_ids = set()
+    for obj in list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, (Mechanic, Item)) or obj.id is None:
+            continue
+        if obj in session.deleted or session.is_modified(obj, include_collections=False):
+            (mechanic_ids if isinstance(obj, Mechanic) else item_ids).add(obj.id)
+
+    if mechanic_ids:
+        query = select(ticket_mechanic.c.ticket_id).where(ticket_mechanic.c.mechanic_id.in_(mechanic_ids))
+        _pending(session).update(session.connection().execute(query).scalars())
+    if item_ids:
+        query = select(ServiceItems.service_id).where(ServiceItems.item_id.in_(item_ids))
+        _pending(session).update(session.connection().execute(query).scalars())
+
+@event.listens_for(db.session, 'after_flush')
+def _write_ticket_changes(session, flush_context):
+    pending = _pending(session)
+    new, dirty, deleted = session.new, session.dirty, session.deleted
+    for obj in list(new) + list(dirty) + list(deleted):
+        if isinstance(obj, ServiceTicket):
+            if obj in new or obj in deleted or session.is_modified(obj):
+                pending.add(obj.id)
+        elif isinstance(obj, ServiceItems):
+            pending.add(obj.service_id)
+    pending.discard(None)
+
+    if pending:
+        session.connection().execute(insert(TicketChange.__table__), _change_rows(pending))
+    session.info.pop(PENDING_KEY, None)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_ticket_changes(session):
+    session.info.pop(PENDING_KEY, None)
@@ -0,0 +1,62 @@
+import hashlib
+from datetime import datetime
+from flask import current_app, jsonify, request
+from sqlalchemy import func, select
+from werkzeug.http import is_resource_modified
+from app.models import db
+from app.utils.pagination import page_window
+from app.utils.metrics import serialization_timer
+
+# Conditional GET. Responses carry an ETag, and a request whose
+# If-None-Match still matches gets an empty 304.
+#
+# List pages build their ETag from one aggregate query over the keys and
+# updated_at of the rows on the page, so a 304 is answered before any row is
+# loaded or serialized. They send no Last-Modified: deleting a row doesn't
+# move the newest updated_at, so If-Modified-Since would keep answering 304.
+# Single entities come from the entity cache, so their ETag is simply a hash
+# of the cached body, and they also carry Last-Modified.
+
+class Validators:
+    def __init__(self, etag):
+        self.etag = etag
+
+    def not_modified(self):
+        return not is_resource_modified(request.environ, etag=self.etag)
+
+    def apply(self, response):
+        response.set_etag(self.etag)
+        return response
+
+    def not_modified_response(self):
+        return self.apply(current_app.response_class(status=304))
+
+# Validators for the page paginate() would return for `query`: the ETag hashes
+# the row count, sum of the keys and newest updated_at of those rows (including the
+# look-ahead row, which decides the X-Next-Cursor header). The key sum changes
+# whenever a row enters or leaves the page, e.g. when a filtered or sorted
+# column is edited. `related` models are tables whose rows are embedded in the
+# response (a ticket's mechanics and items); their row count and newest
+# updated_at are folded in, so editing or deleting one also changes the ETag.
+def page_validators(query, key_column, updated_column, related=(), sort_column=None, descending=False):
+    page = select(key_column.label('key'), updated_column.label('updated_at'))
+    if query.whereclause is not None:
+        page = page.where(query.whereclause)
+    page = page_window(page, key_column, sort_column, descending)[0].subquery()
+
+    columns = [func.count(), func.sum(page.c.key), func.max(page.c.updated_at)]
+    for model in related:
+        columns.append(select(func.count()).select_from(model).scalar_subquery())
+        columns.append(select(func.max(model.updated_at)).scalar_subquery())
+    values = tuple(db.session.execute(select(*columns).select_from(page)).one())
+
+    etag = hashlib.sha1(repr((request.full_path, values)).encode()).hexdigest()
+    return Validators(etag)
+
+def entity_response(data):
+    with serialization_timer():
+        response = jsonify(data)
+    response.add_etag()
+    if data.get('updated_at'):
+        response.last_modified = datetime.fromisoformat(data['updated_at'])
+    return response.make_conditional(request)
@@ -0,0 +1,125 @@
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from app.models import db
+
+# Process-wide connection pool counters, used to size DB_POOL_SIZE against
+# the gunicorn worker/thread count. A steadily growing wait time or any
+# timeouts mean requests are queueing for connections.
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.connects = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.checked_out = 0
+            self.peak_checked_out = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def on_checkout(self, *args):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def on_checkin(self, *args):
+        with self._lock:
+            self.checked_out = max(self.checked_out - 1, 0)
+
+    def on_connect(self, *args):
+        with self._lock:
+            self.connects += 1
+
+    def on_invalidate(self, *args):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'connects': self.connects,
+                'invalidations': self.invalidations,
+                'timeouts': self.timeouts,
+                'checked_out': self.checked_out,
+                'peak_checked_out': self.peak_checked_out,
+                'wait_seconds_total': round(self.wait_seconds_total, 6),
+                'wait_seconds_max': round(self.wait_seconds_max, 6),
+            }
+
+pool_metrics = PoolMetrics()
+
+# QueuePool that times how long each checkout waits, including waiting for a
+# free slot when the pool and its overflow are exhausted.
+class InstrumentedQueuePool(QueuePool):
+    # SQLAlchemy names pool loggers after the class's module, which would put
+    # this one under Flask's `app` logger and print every checkout at DEBUG
+    _sqla_logger_namespace = 'sqlalchemy.pool.impl.QueuePool'
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            pool_metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+def configure_engine_options(app):
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI') or ''
+    in_memory_sqlite = uri in ('sqlite://', 'sqlite:///:memory:')
+    if 'poolclass' not in options and not in_memory_sqlite:
+        options['poolclass'] = InstrumentedQueuePool
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+def _set_statement_timeout(dialect, timeout_ms):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if dialect == 'mysql':
+            cursor.execute(f'SET SESSION MAX_EXECUTION_TIME = {int(timeout_ms)}')
+        else:
+            cursor.execute(f'SET statement_timeout = {int(timeout_ms)}')
+        cursor.close()
+    return on_connect
+
+def register_engine_events(app):
+    with app.app_context():
+        engine = db.engine
+        event.listen(engine, 'checkout', pool_metrics.on_checkout)
+        event.listen(engine, 'checkin', pool_metrics.on_checkin)
+        event.listen(engine, 'connect', pool_metrics.on_connect)
+        event.listen(engine, 'invalidate', pool_metrics.on_invalidate)
+
+        timeout_ms = app.config.get('DB_STATEMENT_TIMEOUT_MS')
+        if timeout_ms and engine.dialect.name in ('mysql', 'postgresql'):
+            event.listen(engine, 'connect', _set_statement_timeout(engine.dialect.name, timeout_ms))
+
+def pool_status():
+    pool = db.engine.pool
+    status = {'pool_class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            overflow=pool.overflow(),
+            timeout=pool.timeout(),
+        )
+    status.update(pool_metrics.snapshot())
+    return status
@@ -0,0 +1,108 @@
+import math
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from flask import request
+from marshmallow import ValidationError
+
+# Declarative filtering and sorting for list endpoints, so lookups like
+# ?email= or ?vin= run as indexed WHERE clauses instead of clients paging
+# through the whole table. Each list declares which columns may be filtered
+# and sorted on; anything else is rejected with a 400.
+#
+#   ?vin=VIN123                       equality (repeat it to match any of several values)
+#   ?service_date[gte]=2026-01-01     range operators on columns declared in `ranges`
+#   ?sort=-service_date               order by a sortable column, '-' for descending
+#
+# Only indexed columns should be declared, and sortable columns need an index
+# on (column, id) since pagination orders by that pair (app/models.py).
+
+RANGE_OPERATORS = {
+    'lt': lambda column, value: column < value,
+    'lte': lambda column, value: column <= value,
+    'gt': lambda column, value: column > value,
+    'gte': lambda column, value: column >= value,
+}
+# Query arguments that belong to pagination and streaming, not filtering
+RESERVED_ARGS = {'limit', 'cursor', 'sort', 'stream'}
+
+FILTER_ARG = re.compile(r'^(\w+)\[(\w+)\]$')
+
+class ListFilters:
+    def __init__(self, filters=(), ranges=(), sorts=()):
+        self.filters = {column.key: column for column in list(filters) + list(ranges)}
+        self.ranges = {column.key for column in ranges}
+        self.sorts = {column.key: column for column in sorts}
+
+    # Returns the query with the filters applied and the paginate() keyword
+    # arguments for the requested sort order. `args` defaults to the query
+    # string of the current request.
+    def apply(self, query, args=None):
+        args = request.args if args is None else args
+        errors = {}
+        for arg in args:
+            if arg in RESERVED_ARGS:
+                continue
+            match = FILTER_ARG.match(arg)
+            name, operator = match.groups() if match else (arg, 'eq')
+            if name not in self.filters:
+                errors[arg] = ["Unknown filter."]
+                continue
+            if operator != 'eq' and (operator not in RANGE_OPERATORS or name not in self.ranges):
+                errors[arg] = [f"Unsupported operator for {name}."]
+                continue
+
+            column = self.filters[name]
+            try:
+                values = [_parse(column, value) for value in args.getlist(arg)]
+            except (InvalidOperation, ValueError):
+                errors[arg] = ["Not a valid value."]
+                continue
+            if operator != 'eq':
+                for value in values:
+                    query = query.where(RANGE_OPERATORS[operator](column, value))
+            elif len(values) > 1:
+                query = query.where(column.in_(values))
+            else:
+                query = query.where(column == values[0])
+
+        sort = self._sort(args, errors)
+        if errors:
+            raise ValidationError(errors)
+        return query, sort
+
+    def _sort(self, args, errors):
+        sort = args.get('sort')
+        if not sort:
+            return {}
+        name = sort.lstrip('-')
+        if name == 'id':
+            return {'descending': sort.startswith('-')}
+        if name not in self.sorts:
+            errors['sort'] = [f"Must be one of: {', '.join(['id'] + list(self.sorts))}."]
+            return {}
+        return {'sort_column': self.sorts[name], 'descending': sort.startswith('-')}
+
+# Query string values are converted to the column's type so they compare
+# (and use the index) the same way stored values do. NaN and infinity are
+# rejected: no stored value compares to them, and sNaN raises on comparison.
+def _parse(column, value):
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type in (date, datetime):
+        return python_type.fromisoformat(value)
+    if python_type is int:
+        return int(value)
+    if python_type is Decimal:
+        number = Decimal(value)
+        if not number.is_finite():
+            raise InvalidOperation(value)
+        return number
+    if python_type is float:
+        number = float(value)
+        if not math.isfinite(number):
+            raise ValueError(value)
+        return number
+    return value
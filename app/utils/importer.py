@@ -0,0 +1,284 @@
+import csv
+import json
+import os
+import re
+import time
+from itertools import islice
+from marshmallow import ValidationError, fields, validate
+from sqlalchemy import insert, select
+from app.extensions import ma
+from app.models import db, Customer, Mechanic, Item, ServiceTicket, ticket_mechanic
+from app.blueprints.customers.schemas import customer_schema
+from app.blueprints.mechanics.schemas import mechanic_schema
+from app.blueprints.items.schemas import item_schema
+from app.blueprints.service_ticket.schemas import TicketSchema
+from app.blueprints.service_ticket.queries import add_service_item_rows, touch_tickets
+from app.utils.bulk import consecutive_autoinc_step, insert_returning_ids, reject_duplicate_emails
+from app.utils.caching import invalidate_entities
+from app.utils.changes import record_ticket_changes
+from app.utils.passwords import hash_passwords, is_password_hash
+from app.utils.search import SEARCHABLE, index_records
+
+# Bulk import of customers, mechanics, items, tickets and ticket line items
+# from CSV or NDJSON files (`flask import-data`), for migrating data from
+# another system without going through the API one record at a time.
+#
+# Files are read as a stream and written in batches with Core executemany
+# inserts, one transaction per batch, so memory stays flat whatever the
+# file size. Rows are validated with the same schemas as the create
+# endpoints; invalid rows are skipped and reported by line number. The
+# derived data the ORM hooks keep up to date for API writes (search index,
+# ticket change log, parts totals) is written in the same batch.
+#
+# Records may carry their `id` from the old system. Those ids are mapped to
+# the new ones in memory, and customer_id, mechanic_ids, ticket_id and
+# item_id in later files of the same run are resolved through the map. For
+# a kind that is not imported in the run, references are taken as ids of
+# records already in the database.
+
+IMPORT_ORDER = ('customers', 'mechanics', 'items', 'tickets', 'ticket_items')
+FORMATS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+DEFAULT_BATCH_SIZE = 1000
+# Rejected rows echoed per file; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+class TicketImportSchema(TicketSchema):
+    # declared again: auto schema subclasses drop the parent's foreign key field
+    customer_id = fields.Int(required=True)
+    mechanic_ids = fields.List(fields.Int(), load_default=list)
+
+class TicketItemImportSchema(ma.Schema):
+    ticket_id = fields.Int(required=True)
+    item_id = fields.Int(required=True)
+    quantity = fields.Int(load_default=1, validate=validate.Range(min=1))
+
+class ImportResult:
+    def __init__(self, kind):
+        self.kind = kind
+        self.rows = 0
+        self.created = 0
+        self.rejected = 0
+        self.errors = []
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def reject(self, line, messages):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, messages))
+
+def file_format(path):
+    return FORMATS.get(os.path.splitext(path)[1].lower())
+
+# Yields (line number, record) pairs. Empty CSV cells are left out, so they
+# count as missing rather than as empty strings.
+def read_records(path):
+    with open(path, newline='', encoding='utf-8') as source:
+        if file_format(path) == 'csv':
+            reader = csv.DictReader(source)
+            for row in reader:
+                yield reader.line_num, {key: value for key, value in row.items() if value not in ('', None)}
+        else:
+            for line, text in enumerate(source, start=1):
+                if not text.strip():
+                    continue
+                try:
+                    record = json.loads(text)
+                except json.JSONDecodeError as e:
+                    yield line, e
+                    continue
+                yield line, record
+
+def _batches(records, size):
+    records = iter(records)
+    while batch := list(islice(records, size)):
+        yield batch
+
+class Importer:
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE):
+        self.batch_size = batch_size
+        # kind -> {source id: new id}, for the kinds imported in this run
+        self.id_maps = {}
+        self._autoinc_step = None
+
+    def import_file(self, kind, path):
+        result = ImportResult(kind)
+        self.id_maps.setdefault(kind, {})
+        start = time.perf_counter()
+        for batch in _batches(read_records(path), self.batch_size):
+            result.rows += len(batch)
+            rows = self._validate(kind, batch, result)
+            if rows:
+                result.created += getattr(self, f'_insert_{kind}')(rows, result)
+            db.session.commit()
+        result.seconds = time.perf_counter() - start
+        result.errors.sort(key=lambda error: error[0])
+        return result
+
+    # Returns {line: (source id, data, references)} of the rows that passed
+    # the schema, with references still as source ids. The batch is loaded
+    # with many=True: per-call overhead in the auto schemas' load() costs
+    # more than validating a row.
+    def _validate(self, kind, batch, result):
+        schema, reference_fields = IMPORT_SCHEMAS[kind]
+        lines, records = [], []
+        for line, record in batch:
+            if isinstance(record, Exception):
+                result.reject(line, {"_schema": [f"Invalid JSON: {record}"]})
+            elif not isinstance(record, dict):
+                result.reject(line, {"_schema": ["Expected an object."]})
+            else:
+                if isinstance(record.get('mechanic_ids'), str): #CSV: "3;7" or "3 7"
+                    record['mechanic_ids'] = [part for part in re.split(r'[;\s]+', record['mechanic_ids']) if part]
+                lines.append(line)
+                records.append(record)
+        if not records:
+            return {}
+
+        try:
+            loaded, errors = schema.load(records, many=True), {}
+        except ValidationError as e:
+            loaded, errors = e.valid_data, e.messages
+        rows = {}
+        for index, (line, data) in enumerate(zip(lines, loaded)):
+            if index in errors:
+                result.reject(line, errors[index])
+                continue
+            references = {field: data.pop(field) for field in reference_fields}
+            rows[line] = (data.pop('id', None), data, references)
+        return rows
+
+    # Maps source ids of `kind` to database ids. Kinds imported in this run
+    # go through the id map, others are checked against the table.
+    def _resolve(self, kind, model, ids):
+        if kind in self.id_maps:
+            id_map = self.id_maps[kind]
+            return {source_id: id_map[source_id] for source_id in ids if source_id in id_map}
+        query = select(model.id).where(model.id.in_(set(ids)))
+        return {record_id: record_id for record_id in db.session.execute(query).scalars()}
+
+    def _resolve_reference(self, rows, result, field, kind, model):
+        resolved = self._resolve(kind, model, [references[field] for _, _, references in rows.values()])
+        for line in list(rows):
+            source_id, data, references = rows[line]
+            if references[field] not in resolved:
+                result.reject(line, {field: [f"Unknown {field}."]})
+                del rows[line]
+            else:
+                references[field] = resolved[references[field]]
+
+    def _create(self, kind, model, rows, natural_key=None):
+        lines = sorted(rows)
+        if not lines:
+            return [], []
+        values = [rows[line][1] for line in lines]
+        if kind in SEARCH_KINDS or kind == 'tickets' or any(rows[line][0] is not None for line in lines):
+            new_ids = self._insert_returning_ids(model.__table__, values, natural_key)
+        else:
+            db.session.execute(insert(model.__table__), values) #nothing refers to the new ids
+            new_ids = [None] * len(lines)
+        id_map = self.id_maps[kind]
+        for line, new_id in zip(lines, new_ids):
+            source_id = rows[line][0]
+            if source_id is not None:
+                id_map[source_id] = new_id
+        if kind in SEARCH_KINDS:
+            search_kind = SEARCH_KINDS[kind]
+            columns = SEARCHABLE[search_kind][1]
+            index_records(db.session, search_kind, [
+                (new_id, *[rows[line][1].get(column) for column in columns]) for line, new_id in zip(lines, new_ids)
+            ], replace=False)
+        return lines, new_ids
+
+    def _insert_returning_ids(self, table, rows, natural_key=None):
+        return insert_returning_ids(table, rows, natural_key, self._consecutive_autoinc_step)
+
+    # consecutive_autoinc_step, looked up once per run
+    def _consecutive_autoinc_step(self, dialect):
+        if self._autoinc_step is None:
+            self._autoinc_step = consecutive_autoinc_step(dialect) or 0
+        return self._autoinc_step or None
+
+    def _reject_duplicate_emails(self, model, rows, result):
+        data = {line: row[1] for line, row in rows.items()}
+        errors = {}
+        reject_duplicate_emails(model, data, errors)
+        for line in sorted(errors):
+            result.reject(line, errors[line])
+            del rows[line]
+
+    def _insert_customers(self, rows, result):
+        self._reject_duplicate_emails(Customer, rows, result)
+        # hashes from the old system (werkzeug format) are kept, anything else is hashed here
+        plain = [line for line in sorted(rows) if not is_password_hash(rows[line][1]['password'])]
+        for line, password in zip(plain, hash_passwords([rows[line][1]['password'] for line in plain])):
+            rows[line][1]['password'] = password
+        return len(self._create('customers', Customer, rows, natural_key='email')[0])
+
+    def _insert_mechanics(self, rows, result):
+        self._reject_duplicate_emails(Mechanic, rows, result)
+        return len(self._create('mechanics', Mechanic, rows, natural_key='email')[0])
+
+    def _insert_items(self, rows, result):
+        return len(self._create('items', Item, rows)[0])
+
+    def _insert_tickets(self, rows, result):
+        customer_ids = self._resolve('customers', Customer, [row[1]['customer_id'] for row in rows.values()])
+        mechanic_ids = self._resolve('mechanics', Mechanic, [
+            mechanic_id for row in rows.values() for mechanic_id in row[2]['mechanic_ids']
+        ])
+        for line in list(rows):
+            data, references = rows[line][1], rows[line][2]
+            unknown = [mechanic_id for mechanic_id in references['mechanic_ids'] if mechanic_id not in mechanic_ids]
+            if data['customer_id'] not in customer_ids:
+                result.reject(line, {"customer_id": ["Unknown customer_id."]})
+                del rows[line]
+            elif unknown:
+                result.reject(line, {"mechanic_ids": [f"Unknown mechanic ids: {unknown}"]})
+                del rows[line]
+            else:
+                data['customer_id'] = customer_ids[data['customer_id']]
+                references['mechanic_ids'] = sorted({mechanic_ids[mechanic_id] for mechanic_id in references['mechanic_ids']})
+        lines, ticket_ids = self._create('tickets', ServiceTicket, rows)
+        assignments = [
+            {'ticket_id': ticket_id, 'mechanic_id': mechanic_id}
+            for line, ticket_id in zip(lines, ticket_ids) for mechanic_id in rows[line][2]['mechanic_ids']
+        ]
+        if assignments:
+            db.session.execute(insert(ticket_mechanic), assignments)
+        record_ticket_changes(ticket_ids)
+        return len(ticket_ids)
+
+    def _insert_ticket_items(self, rows, result):
+        self._resolve_reference(rows, result, 'ticket_id', 'tickets', ServiceTicket)
+        self._resolve_reference(rows, result, 'item_id', 'items', Item)
+        # a part listed twice for the same ticket becomes one line, as when
+        # it is added twice through the API
+        quantities = {}
+        for _, data, references in rows.values():
+            key = (references['ticket_id'], references['item_id'])
+            quantities[key] = quantities.get(key, 0) + data['quantity']
+        if not quantities:
+            return 0
+
+        add_service_item_rows([
+            {'service_id': ticket_id, 'item_id': item_id, 'quantity': quantity}
+            for (ticket_id, item_id), quantity in sorted(quantities.items())
+        ])
+        ticket_ids = sorted({ticket_id for ticket_id, _ in quantities})
+        touch_tickets(ticket_ids, refresh_totals=True)
+        invalidate_entities('ticket', ticket_ids)
+        return len(rows)
+
+# kind -> (schema, reference fields kept apart from the insert values)
+IMPORT_SCHEMAS = {
+    'customers': (customer_schema, ()),
+    'mechanics': (mechanic_schema, ()),
+    'items': (item_schema, ()),
+    'tickets': (TicketImportSchema(), ('mechanic_ids',)),
+    'ticket_items': (TicketItemImportSchema(), ('ticket_id', 'item_id')),
+}
+SEARCH_KINDS = {'customers': 'customer', 'items': 'item', 'tickets': 'ticket'}
@@ -0,0 +1,52 @@
+from sqlalchemy import cast, event, func, inspect, select, update
+from app.models import db, utcnow, Item, ServiceTicket, ServiceItems
+
+# ServiceTicket.parts_total is a denormalized sum(price * quantity) over the
+# ticket's service_items, so totals can be listed and sorted straight off
+# service_tickets. It is recomputed in SQL whenever a ticket's lines or the
+# price of one of its items change: Core part upserts pass refresh_totals to
+# touch_tickets, ORM changes are caught by the flush hook below.
+
+# Rounds an amount computed from Item.price to cents. price is a float
+# column (double precision on PostgreSQL, which has no round(double, int)),
+# so the amount is cast to a decimal first.
+def round_money(amount):
+    return func.round(cast(amount, db.Numeric(12, 2)), 2)
+
+def parts_total_subquery():
+    return (
+        select(round_money(func.coalesce(func.sum(Item.price * ServiceItems.quantity), 0)))
+        .select_from(ServiceItems)
+        .join(Item, Item.id == ServiceItems.item_id)
+        .where(ServiceItems.service_id == ServiceTicket.id)
+        .scalar_subquery()
+    )
+
+# Recompute parts_total for the tickets matching `where` (all when None) in
+# one UPDATE. `executor` is a session or connection.
+def refresh_parts_totals(executor, where=None):
+    statement = update(ServiceTicket.__table__).values(parts_total=parts_total_subquery(), updated_at=utcnow())
+    if where is not None:
+        statement = statement.where(where)
+    return executor.execute(statement)
+
+def _price_changed(item):
+    return inspect(item).attrs.price.history.has_changes()
+
+@event.listens_for(db.session, 'after_flush')
+def _refresh_changed_totals(session, flush_context):
+    ticket_ids = set()
+    item_ids = set()
+    dirty = session.dirty
+    for obj in list(session.new) + list(dirty) + list(session.deleted):
+        if isinstance(obj, ServiceItems):
+            ticket_ids.add(obj.service_id)
+        elif isinstance(obj, Item) and obj in dirty and _price_changed(obj):
+            item_ids.add(obj.id)
+    ticket_ids.discard(None)
+
+    if ticket_ids:
+        refresh_parts_totals(session.connection(), ServiceTicket.id.in_(ticket_ids))
+    if item_ids:
+        ticket_query = select(ServiceItems.service_id).where(ServiceItems.item_id.in_(item_ids))
+        refresh_parts_totals(session.connection(), ServiceTicket.id.in_(ticket_query))
@@ -0,0 +1,167 @@
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, jsonify, request
+from sqlalchemy import func, select, update
+from app.models import db, utcnow, Job
+
+# Background jobs for work that is too slow for a request: ticket exports,
+# reports and bulk creates. An endpoint that supports it queues a job when
+# the request carries `Prefer: respond-async` and answers 202 with the job;
+# the client polls GET /jobs/<id> for its status and result.
+#
+# Jobs are rows in the jobs table, so they need no broker. Each app process
+# runs them on a small thread pool (JOB_WORKERS); a job is claimed with a
+# conditional UPDATE, so it runs once even when several processes or a
+# `flask run-jobs` worker pick it up. Jobs still queued when a process
+# stops are run by `flask run-jobs`. With JOBS_EAGER (tests) a job runs
+# inside the request that queued it.
+#
+# While a job runs, a thread stamps its heartbeat_at every
+# JOB_HEARTBEAT_SECONDS. A job whose process is killed or restarted stops
+# beating, and `flask run-jobs` marks it failed once it missed
+# STALE_HEARTBEATS beats, so clients polling it get a final status. It is
+# not run again: a bulk create may already have committed its rows.
+#
+# Handlers are registered per kind with @job_handler, take the job's id and
+# params and return a JSON-serializable result. Large outputs are written to
+# a file under JOB_RESULTS_DIR (job_file_path) instead, which GET
+# /jobs/<id>/download serves.
+
+JOB_HANDLERS = {}
+# Seconds `flask run-jobs` waits before looking for new jobs again
+POLL_SECONDS = 1.0
+# Missed heartbeats after which a running job is taken as abandoned
+STALE_HEARTBEATS = 4
+
+_executor_lock = threading.Lock()
+
+def job_handler(kind):
+    def register(handler):
+        JOB_HANDLERS[kind] = handler
+        return handler
+    return register
+
+def wants_async():
+    return 'respond-async' in request.headers.get('Prefer', '').lower()
+
+def _workers():
+    executor = current_app.extensions.get('job_workers')
+    if executor is None:
+        with _executor_lock:
+            executor = current_app.extensions.get('job_workers')
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=current_app.config['JOB_WORKERS'],
+                    thread_name_prefix='job-worker',
+                )
+                current_app.extensions['job_workers'] = executor
+    return executor
+
+def submit_job(kind, params):
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job = Job(id=uuid.uuid4().hex, kind=kind, status='queued', params=current_app.json.dumps(params))
+    db.session.add(job)
+    db.session.commit()
+
+    if current_app.config['JOBS_EAGER']:
+        run_job(job.id)
+        db.session.refresh(job)
+    elif current_app.config['JOB_WORKERS'] > 0:
+        _workers().submit(_run_in_app, current_app._get_current_object(), job.id)
+    return job
+
+def _run_in_app(app, job_id):
+    with app.app_context():
+        run_job(job_id)
+
+def _claim(job_id):
+    claimed = db.session.execute(
+        update(Job).where(Job.id == job_id, Job.status == 'queued').values(status='running', started_at=utcnow(), heartbeat_at=utcnow())
+    ).rowcount
+    db.session.commit()
+    return claimed == 1
+
+def _finish(job_id, **values):
+    db.session.execute(update(Job).where(Job.id == job_id).values(finished_at=utcnow(), **values))
+    db.session.commit()
+
+# Stamps the job's heartbeat on its own connection until `stop` is set
+def _beat(app, job_id, stop):
+    while not stop.wait(app.config['JOB_HEARTBEAT_SECONDS']):
+        with app.app_context():
+            try:
+                with db.engine.begin() as connection:
+                    connection.execute(
+                        update(Job).where(Job.id == job_id, Job.status == 'running').values(heartbeat_at=utcnow())
+                    )
+            except Exception:
+                app.logger.exception('Heartbeat of job %s failed', job_id)
+
+# Runs a queued job unless another worker already claimed it
+def run_job(job_id):
+    if not _claim(job_id):
+        return False
+    job = db.session.get(Job, job_id)
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_beat, args=(current_app._get_current_object(), job_id, stop), daemon=True)
+    heartbeat.start()
+    try:
+        result = JOB_HANDLERS[job.kind](job.id, json.loads(job.params))
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.exception('Job %s (%s) failed', job_id, job.kind)
+        _finish(job_id, status='failed', error=str(e))
+    else:
+        _finish(job_id, status='succeeded', result=current_app.json.dumps(result))
+    finally:
+        stop.set()
+        heartbeat.join()
+    return True
+
+# Fails running jobs whose heartbeat stopped, returns how many
+def fail_stale_jobs():
+    deadline = utcnow() - timedelta(seconds=current_app.config['JOB_HEARTBEAT_SECONDS'] * STALE_HEARTBEATS)
+    failed = db.session.execute(
+        update(Job)
+        .where(Job.status == 'running', func.coalesce(Job.heartbeat_at, Job.started_at) < deadline)
+        .values(status='failed', error='The worker running this job stopped before it finished.', finished_at=utcnow())
+    ).rowcount
+    db.session.commit()
+    if failed:
+        current_app.logger.warning('Marked %d abandoned job(s) as failed', failed)
+    return failed
+
+def run_next_job():
+    query = select(Job.id).where(Job.status == 'queued').order_by(Job.created_at).limit(1)
+    while (job_id := db.session.execute(query).scalar()) is not None:
+        if run_job(job_id):
+            return True
+    return False
+
+# Worker loop behind `flask run-jobs`. With once=True it stops as soon as
+# the queue is empty.
+def work(once=False):
+    while True:
+        fail_stale_jobs()
+        if not run_next_job():
+            if once:
+                return
+            time.sleep(POLL_SECONDS)
+
+def job_file_path(job_id, extension):
+    directory = current_app.config['JOB_RESULTS_DIR'] or os.path.join(current_app.instance_path, 'job-results')
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f'{job_id}{extension}')
+
+def job_accepted(job, schema):
+    response = jsonify(schema.dump(job))
+    response.status_code = 202
+    response.headers['Location'] = f'/jobs/{job.id}'
+    response.headers['Preference-Applied'] = 'respond-async'
+    return response
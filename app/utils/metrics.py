@@ -0,0 +1,189 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from app.models import db
+from app.utils.database import pool_metrics
+
+# Per-route request instrumentation, exposed at /metrics in the Prometheus
+# text format: latency, SQL statements and database time per request, and
+# time spent serializing responses. SQL is measured with engine events, so
+# statements issued while serializing (lazy loads, N+1s) count as well.
+#
+# Like the pool counters these are per process; scrape every worker, or
+# read them as a sample when running several.
+#
+# With SLOW_REQUEST_MS set, requests slower than that are logged together
+# with every statement they ran and its duration.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 3, 5, 10, 25, 50, 100, 250)
+# Statements listed per slow request log entry
+SLOW_LOG_MAX_STATEMENTS = 50
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative_counts(self):
+        counts = []
+        total = 0
+        for count in self.bucket_counts:
+            total += count
+            counts.append(total)
+        return counts
+
+# name -> (help, buckets)
+HISTOGRAMS = {
+    'http_request_duration_seconds': ("Time to handle a request, by route.", LATENCY_BUCKETS),
+    'http_request_sql_statements': ("SQL statements executed per request, by route.", STATEMENT_BUCKETS),
+    'http_request_db_seconds': ("Time spent executing SQL per request, by route.", LATENCY_BUCKETS),
+    'http_request_serialization_seconds': ("Time spent serializing the response body, by route.", LATENCY_BUCKETS),
+}
+
+class RequestMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {name: {} for name in HISTOGRAMS}
+
+    def _observe(self, name, labels, value):
+        series = self.histograms[name]
+        if labels not in series:
+            series[labels] = Histogram(HISTOGRAMS[name][1])
+        series[labels].observe(value)
+
+    def record(self, endpoint, method, status, stats, duration):
+        with self._lock:
+            self._observe('http_request_duration_seconds', (('endpoint', endpoint), ('method', method), ('status', str(status))), duration)
+            labels = (('endpoint', endpoint), ('method', method))
+            self._observe('http_request_sql_statements', labels, stats.statements)
+            self._observe('http_request_db_seconds', labels, stats.db_seconds)
+            if stats.serialization_seconds:
+                self._observe('http_request_serialization_seconds', labels, stats.serialization_seconds)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name, (help_text, buckets) in HISTOGRAMS.items():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for labels, histogram in sorted(self.histograms[name].items()):
+                    bounds = [_number(bound) for bound in buckets] + ['+Inf']
+                    for bound, count in zip(bounds, histogram.cumulative_counts()):
+                        lines.append(f'{name}_bucket{_labels(labels + (("le", bound),))} {count}')
+                    lines.append(f'{name}_sum{_labels(labels)} {_number(histogram.sum)}')
+                    lines.append(f'{name}_count{_labels(labels)} {histogram.count}')
+        return lines
+
+request_metrics = RequestMetrics()
+
+class RequestStats:
+    def __init__(self, capture_sql=False):
+        self.start = time.perf_counter()
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.serialization_seconds = 0.0
+        self.sql = [] if capture_sql else None
+
+def _current_stats():
+    return g.get('request_stats') if has_request_context() else None
+
+@contextmanager
+def serialization_timer():
+    stats = _current_stats()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            stats.serialization_seconds += time.perf_counter() - start
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _labels(labels):
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats()
+    if stats is None:
+        return
+    elapsed = time.perf_counter() - context._metrics_start
+    stats.statements += 1
+    stats.db_seconds += elapsed
+    if stats.sql is not None:
+        stats.sql.append((elapsed, statement))
+
+def _start_request():
+    g.request_stats = RequestStats(capture_sql=bool(current_app.config.get('SLOW_REQUEST_MS')))
+
+def _finish_request(response):
+    stats = g.pop('request_stats', None)
+    if stats is None:
+        return response
+    duration = time.perf_counter() - stats.start
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    request_metrics.record(endpoint, request.method, response.status_code, stats, duration)
+
+    slow_ms = current_app.config.get('SLOW_REQUEST_MS')
+    if slow_ms and duration * 1000 >= slow_ms:
+        _log_slow_request(stats, duration, response.status_code)
+    return response
+
+def _log_slow_request(stats, duration, status):
+    lines = [
+        f'Slow request: {request.method} {request.full_path.rstrip("?")} {status} took {duration * 1000:.1f} ms '
+        f'({stats.statements} SQL statements, {stats.db_seconds * 1000:.1f} ms in the database, '
+        f'{stats.serialization_seconds * 1000:.1f} ms serializing)'
+    ]
+    for elapsed, statement in stats.sql[:SLOW_LOG_MAX_STATEMENTS]:
+        lines.append(f'  {elapsed * 1000:8.2f} ms  {" ".join(statement.split())}')
+    if len(stats.sql) > SLOW_LOG_MAX_STATEMENTS:
+        lines.append(f'  ... {len(stats.sql) - SLOW_LOG_MAX_STATEMENTS} more statements')
+    current_app.logger.warning('\n'.join(lines))
+
+def pool_metric_lines():
+    snapshot = pool_metrics.snapshot()
+    metrics = [
+        ('db_pool_checkouts_total', 'counter', "Connections checked out of the pool.", snapshot['checkouts']),
+        ('db_pool_connects_total', 'counter', "New database connections opened.", snapshot['connects']),
+        ('db_pool_invalidations_total', 'counter', "Connections invalidated.", snapshot['invalidations']),
+        ('db_pool_timeouts_total', 'counter', "Checkouts that timed out waiting for a connection.", snapshot['timeouts']),
+        ('db_pool_wait_seconds_total', 'counter', "Time spent waiting for a connection.", snapshot['wait_seconds_total']),
+        ('db_pool_checked_out', 'gauge', "Connections currently checked out.", snapshot['checked_out']),
+    ]
+    lines = []
+    for name, kind, help_text, value in metrics:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}', f'{name} {_number(value)}']
+    return lines
+
+def render_metrics():
+    return '\n'.join(request_metrics.render() + pool_metric_lines()) + '\n'
+
+def register_metrics(app):
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
@@ -0,0 +1,114 @@
+import base64
+import binascii
+import json
+import math
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from flask import request
+from marshmallow import ValidationError
+from sqlalchemy import literal, tuple_
+from app.models import db
+from app.utils.metrics import serialization_timer
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor, field='cursor'):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError):
+        raise ValidationError({field: ["Invalid cursor."]})
+    if not isinstance(values, list) or not values:
+        raise ValidationError({field: ["Invalid cursor."]})
+    return values
+
+def page_args():
+    limit = request.args.get('limit', DEFAULT_LIMIT)
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValidationError({"limit": ["Not a valid integer."]})
+    if limit < 1 or limit > MAX_LIMIT:
+        raise ValidationError({"limit": [f"Must be between 1 and {MAX_LIMIT}."]})
+
+    cursor = request.args.get('cursor')
+    return limit, decode_cursor(cursor) if cursor else None
+
+# Keyset pagination on a unique, indexed key (the primary key). The page is
+# fetched with WHERE key > last_seen ORDER BY key LIMIT n+1, so every page
+# costs one index range scan no matter how deep it is, and the extra row only
+# tells us whether a next page exists. No COUNT query is issued. Pass
+# scalars=False for column-tuple queries.
+#
+# With sort_column the page is ordered by (sort_column, key) instead, the
+# cursor holds both values and the next page starts after that pair. An index
+# on (sort_column, key) keeps this a range scan too.
+def paginate(query, key_column, scalars=True, sort_column=None, descending=False):
+    query, limit, columns = page_window(query, key_column, sort_column, descending)
+    result = db.session.execute(query)
+    rows = (result.scalars() if scalars else result).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([_to_cursor(getattr(rows[-1], column.key)) for column in columns])
+    return rows, next_cursor
+
+# The request's page of `query` plus the look-ahead row, in page order.
+# Returns (query, limit, ordering columns).
+def page_window(query, key_column, sort_column=None, descending=False):
+    limit, cursor = page_args()
+    columns = [key_column] if sort_column is None else [sort_column, key_column]
+    if cursor is not None:
+        if len(cursor) != len(columns):
+            raise ValidationError({"cursor": ["Invalid cursor."]})
+        values = [_from_cursor(column, value) for column, value in zip(columns, cursor)]
+        if len(columns) == 1:
+            after = key_column < values[0] if descending else key_column > values[0]
+        else:
+            position = tuple_(*[literal(value, column.type) for column, value in zip(columns, values)])
+            after = tuple_(*columns) < position if descending else tuple_(*columns) > position
+        query = query.where(after)
+    query = query.order_by(*[column.desc() if descending else column for column in columns]).limit(limit + 1)
+    return query, limit, columns
+
+# Cursor values are JSON, so decimals and dates travel as strings and are
+# converted back to the column's type before they are compared.
+def _to_cursor(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+def _from_cursor(column, value):
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    try:
+        if python_type is Decimal:
+            number = Decimal(str(value))
+            if number.is_finite():
+                return number
+        if python_type in (date, datetime) and isinstance(value, str):
+            return python_type.fromisoformat(value)
+        if python_type in (int, float) and isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+            return value
+        if python_type is str and isinstance(value, str):
+            return value
+    except (InvalidOperation, ValueError):
+        pass
+    raise ValidationError({"cursor": ["Invalid cursor."]})
+
+def paginated_response(schema, rows, next_cursor):
+    with serialization_timer():
+        response = schema.jsonify(rows)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
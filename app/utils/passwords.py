@@ -0,0 +1,67 @@
+import hmac
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+HASH_PREFIXES = ('scrypt:', 'pbkdf2:')
+
+_executor_lock = threading.Lock()
+
+# Hashes run on a small per-app thread pool. scrypt and pbkdf2 release the
+# GIL, so other requests in the same worker keep running while a login is
+# hashing, and the pool size caps how many hashes can run at once: a burst
+# of logins queues for the hasher instead of starving every other thread.
+def _hasher():
+    executor = current_app.extensions.get('password_hasher')
+    if executor is None:
+        with _executor_lock:
+            executor = current_app.extensions.get('password_hasher')
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=current_app.config['PASSWORD_HASH_WORKERS'],
+                    thread_name_prefix='password-hasher',
+                )
+                current_app.extensions['password_hasher'] = executor
+    return executor
+
+def _method():
+    return current_app.config['PASSWORD_HASH_METHOD']
+
+@lru_cache(maxsize=8)
+def _method_prefix(method):
+    # werkzeug fills in default parameters (e.g. 'pbkdf2:sha256' becomes
+    # 'pbkdf2:sha256:1000000'), so read the effective prefix off a real hash
+    return generate_password_hash('', method=method).split('$', 1)[0]
+
+def is_password_hash(value):
+    return value.startswith(HASH_PREFIXES) and value.count('$') == 2
+
+def needs_rehash(stored):
+    return not is_password_hash(stored) or stored.split('$', 1)[0] != _method_prefix(_method())
+
+def hash_password(password):
+    method = _method()
+    return _hasher().submit(generate_password_hash, password, method=method).result()
+
+# Many hashes at once (bulk imports), spread over the same bounded pool
+def hash_passwords(passwords):
+    method = _method()
+    return list(_hasher().map(lambda password: generate_password_hash(password, method=method), passwords))
+
+# Returns (is_valid, new_hash). new_hash is set when the stored value should be
+# replaced: it is a plaintext password from before hashing was introduced, or
+# it was hashed with different parameters than PASSWORD_HASH_METHOD.
+def verify_password(stored, password):
+    if not stored:
+        return False, None
+
+    if is_password_hash(stored):
+        valid = _hasher().submit(check_password_hash, stored, password).result()
+    else:
+        valid = hmac.compare_digest(stored.encode(), password.encode())
+
+    if valid and needs_rehash(stored):
+        return True, hash_password(password)
+    return valid, None
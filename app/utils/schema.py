@@ -0,0 +1,118 @@
+from sqlalchemy import delete, func, inspect, insert, literal, select, text, update
+from sqlalchemy.schema import CreateColumn, CreateIndex
+from app.models import db, utcnow, Base, SearchTrigram, ServiceItems, ServiceTicket, TicketChange, ticket_mechanic
+from app.utils.invoices import refresh_parts_totals
+from app.utils.search import rebuild_search_index
+
+# Bring an existing database up to the schema declared in app/models.py.
+# db.create_all() only creates missing tables, so databases created before
+# an index, constraint or column was added never get it. This fills those
+# gaps in place and is safe to run repeatedly; it never drops anything.
+def upgrade_schema():
+    engine = db.engine
+    Base.metadata.create_all(engine)
+    applied = []
+
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        for table in Base.metadata.sorted_tables:
+            existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing_columns:
+                    column_ddl = CreateColumn(column).compile(dialect=connection.dialect)
+                    connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column_ddl}'))
+                    _backfill_default(connection, table, column)
+                    applied.append(f'add column {table.name}.{column.name}')
+
+        # Tables created before these keys existed may hold duplicate rows,
+        # which have to be merged before a unique index can be built.
+        if not inspector.get_pk_constraint('ticket_mechanic')['constrained_columns']:
+            _deduplicate_ticket_mechanic(connection)
+            _create_unique_index(connection, inspector, 'ticket_mechanic', 'uq_ticket_mechanic_ticket_mechanic', ['ticket_id', 'mechanic_id'], applied)
+
+        existing_uniques = {constraint['name'] for constraint in inspector.get_unique_constraints('service_items')}
+        if 'uq_service_items_service_item' not in existing_uniques:
+            _merge_duplicate_service_items(connection)
+            _create_unique_index(connection, inspector, 'service_items', 'uq_service_items_service_item', ['service_id', 'item_id'], applied)
+
+        if 'add column service_tickets.parts_total' in applied:
+            refresh_parts_totals(connection)
+
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                _create_index(connection, inspector, index, applied)
+
+        _seed_ticket_changes(connection, applied)
+        _seed_search_index(connection, applied)
+
+    return applied
+
+# Existing rows get the column's Python-side default (e.g. updated_at = now),
+# which ALTER TABLE can't apply itself.
+def _backfill_default(connection, table, column):
+    default = column.default
+    if default is None or not (default.is_scalar or default.is_callable):
+        return
+    value = default.arg(None) if default.is_callable else default.arg
+    connection.execute(update(table).where(column.is_(None)).values({column.name: value}))
+
+# Tickets created before the change log existed have no entry, so a client
+# syncing from scratch would never see them. An empty log next to existing
+# tickets only happens right after the log is introduced.
+def _seed_ticket_changes(connection, applied):
+    if connection.execute(select(TicketChange.id).limit(1)).first() is not None:
+        return
+    result = connection.execute(
+        insert(TicketChange.__table__).from_select(
+            ['ticket_id', 'changed_at'],
+            select(ServiceTicket.id, literal(utcnow(), TicketChange.changed_at.type)).order_by(ServiceTicket.id),
+        )
+    )
+    if result.rowcount:
+        applied.append(f'seed ticket_changes with {result.rowcount} tickets')
+
+# Same for the search index: records created before it existed are indexed once.
+def _seed_search_index(connection, applied):
+    if connection.execute(select(SearchTrigram.kind).limit(1)).first() is not None:
+        return
+    count = rebuild_search_index(connection)
+    if count:
+        applied.append(f'build search index for {count} records')
+
+def _create_index(connection, inspector, index, applied):
+    existing = {existing_index['name'] for existing_index in inspector.get_indexes(index.table.name)}
+    if index.name not in existing:
+        connection.execute(CreateIndex(index))
+        applied.append(f'create index {index.name}')
+
+# Stands in for a primary key or unique constraint that can't be added to an
+# existing table on every dialect (SQLite has no ALTER TABLE ADD CONSTRAINT).
+def _create_unique_index(connection, inspector, table_name, name, columns, applied):
+    existing = {existing_index['name'] for existing_index in inspector.get_indexes(table_name)}
+    if name not in existing:
+        connection.execute(text(f'CREATE UNIQUE INDEX {name} ON {table_name} ({", ".join(columns)})'))
+        applied.append(f'create unique index {name}')
+
+def _deduplicate_ticket_mechanic(connection):
+    columns = (ticket_mechanic.c.ticket_id, ticket_mechanic.c.mechanic_id)
+    duplicates = connection.execute(
+        select(*columns).group_by(*columns).having(func.count() > 1)
+    ).all()
+    for ticket_id, mechanic_id in duplicates:
+        connection.execute(delete(ticket_mechanic).where(
+            ticket_mechanic.c.ticket_id == ticket_id, ticket_mechanic.c.mechanic_id == mechanic_id,
+        ))
+        connection.execute(insert(ticket_mechanic).values(ticket_id=ticket_id, mechanic_id=mechanic_id))
+
+def _merge_duplicate_service_items(connection):
+    table = ServiceItems.__table__
+    duplicates = connection.execute(
+        select(table.c.service_id, table.c.item_id, func.min(table.c.id), func.sum(table.c.quantity))
+        .group_by(table.c.service_id, table.c.item_id)
+        .having(func.count() > 1)
+    ).all()
+    for service_id, item_id, keep_id, quantity in duplicates:
+        connection.execute(update(table).where(table.c.id == keep_id).values(quantity=quantity))
+        connection.execute(delete(table).where(
+            table.c.service_id == service_id, table.c.item_id == item_id, table.c.id != keep_id,
+        ))
@@ -0,0 +1,167 @@
+import re
+import unicodedata
+from sqlalchemy import delete, event, func, inspect, insert, select
+from app.models import db, Customer, Item, ServiceTicket, SearchTrigram
+
+# Typeahead search over ticket VINs, customer names/emails and item names.
+#
+# Every searchable record is broken into trigrams (pg_trgm style: each word
+# is padded with two leading blanks and one trailing blank) and stored in
+# search_trigrams. A search looks up the trigrams of the typed text through
+# the primary key and ranks records by how many of them they share, so a
+# lookup costs a few index range scans whatever the table sizes. Query words
+# are only padded at the front, which makes an unfinished word a full match
+# for every word it is a prefix of; typos and fragments from the middle of a
+# VIN still score on the trigrams they share.
+#
+# Queries with no word of three letters or more match a large share of the
+# index ("ex" is in every example.com email), and grouping all of those hits
+# costs more than a typeahead keystroke can. Their longest word is looked up
+# as a prefix instead: the trigram made of a word's first letters already
+# says that some word of the record starts with them, so one primary key
+# range scan that stops at `limit` rows answers it.
+#
+# This is the same on every dialect. MySQL/PostgreSQL full-text indexes work
+# on whole words and can't match the middle of a VIN, so they are not used.
+#
+# The index is updated in the same flush as the record (hook below) and
+# rebuilt with `flask rebuild-search-index`; upgrade_schema builds it once
+# for databases that predate it.
+
+# kind -> (model, searchable columns)
+SEARCHABLE = {
+    'ticket': (ServiceTicket, ('vin',)),
+    'customer': (Customer, ('name', 'email')),
+    'item': (Item, ('name',)),
+}
+MODEL_KINDS = {model: kind for kind, (model, _) in SEARCHABLE.items()}
+
+# Share of the query's trigrams a record must contain to be returned
+MIN_SIMILARITY = 0.5
+REBUILD_BATCH_SIZE = 1000
+
+# Lowercased, accents stripped ("José" matches "jose"), split into words
+def words(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char)).casefold()
+    return re.findall(r'[^\W_]+', text)
+
+def _trigrams(word, trailing=' '):
+    padded = '  ' + word + trailing
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def record_trigrams(*values):
+    return set().union(*[_trigrams(word) for value in values for word in words(value)])
+
+def query_trigrams(text):
+    return set().union(*[_trigrams(word, trailing='') for word in words(text)])
+
+def _index_rows(kind, rows):
+    return [
+        {'trigram': trigram, 'kind': kind, 'entity_id': row[0]}
+        for row in rows for trigram in record_trigrams(*row[1:])
+    ]
+
+# (Re)index records of one kind from (id, *searchable values) tuples.
+# `executor` is a session or connection; replace=False skips removing old
+# entries for records that are known to be new.
+def index_records(executor, kind, rows, replace=True):
+    rows = list(rows)
+    if not rows:
+        return
+    if replace:
+        remove_records(executor, kind, [row[0] for row in rows])
+    index_rows = _index_rows(kind, rows)
+    if index_rows:
+        executor.execute(insert(SearchTrigram.__table__), index_rows)
+
+def remove_records(executor, kind, ids):
+    if ids:
+        executor.execute(delete(SearchTrigram).where(SearchTrigram.kind == kind, SearchTrigram.entity_id.in_(ids)))
+
+def rebuild_search_index(connection):
+    connection.execute(delete(SearchTrigram))
+    count = 0
+    for kind, (model, columns) in SEARCHABLE.items():
+        query = select(model.id, *[getattr(model, column) for column in columns]).order_by(model.id).limit(REBUILD_BATCH_SIZE)
+        last_id = 0
+        # keyset batches rather than a streaming cursor, so the inserts can
+        # run on the same connection in between
+        while True:
+            batch = connection.execute(query.where(model.id > last_id)).all()
+            if not batch:
+                break
+            index_rows = _index_rows(kind, batch)
+            if index_rows:
+                connection.execute(insert(SearchTrigram.__table__), index_rows)
+            count += len(batch)
+            last_id = batch[-1][0]
+    return count
+
+# Returns [(kind, id, score)], best match first
+def search(text, kinds=None, limit=10):
+    trigrams = query_trigrams(text)
+    if not trigrams:
+        return []
+    query_words = words(text)
+    if max(len(word) for word in query_words) < 3:
+        return _prefix_search(max(query_words, key=len), len(trigrams), kinds, limit)
+    hits = func.count().label('hits')
+    query = (
+        select(SearchTrigram.kind, SearchTrigram.entity_id, hits)
+        .where(SearchTrigram.trigram.in_(trigrams))
+        .group_by(SearchTrigram.kind, SearchTrigram.entity_id)
+        .having(func.count() >= max(1, round(len(trigrams) * MIN_SIMILARITY)))
+        .order_by(hits.desc(), SearchTrigram.kind, SearchTrigram.entity_id)
+        .limit(limit)
+    )
+    if kinds:
+        query = query.where(SearchTrigram.kind.in_(kinds))
+    return [(kind, entity_id, hits / len(trigrams)) for kind, entity_id, hits in db.session.execute(query)]
+
+def _prefix_search(word, trigram_count, kinds, limit):
+    prefix = ('  ' + word)[-3:]
+    query = (
+        select(SearchTrigram.kind, SearchTrigram.entity_id)
+        .where(SearchTrigram.trigram == prefix)
+        .order_by(SearchTrigram.kind, SearchTrigram.entity_id)
+        .limit(limit)
+    )
+    if kinds:
+        query = query.where(SearchTrigram.kind.in_(kinds))
+    score = len(_trigrams(word, trailing='')) / trigram_count
+    return [(kind, entity_id, score) for kind, entity_id in db.session.execute(query)]
+
+def _searchable_changed(obj, columns):
+    state = inspect(obj)
+    return any(state.attrs[column].history.has_changes() for column in columns)
+
+@event.listens_for(db.session, 'after_flush')
+def _update_search_index(session, flush_context):
+    # session.new/dirty/deleted build a new set on every access
+    new, dirty, deleted = session.new, session.dirty, session.deleted
+    created = {}
+    changed = {}
+    removed = {}
+    for group, objects in ((created, new), (changed, dirty)):
+        for obj in objects:
+            kind = MODEL_KINDS.get(type(obj))
+            if kind is None:
+                continue
+            columns = SEARCHABLE[kind][1]
+            if objects is new or _searchable_changed(obj, columns):
+                group.setdefault(kind, []).append((obj.id, *[getattr(obj, column) for column in columns]))
+    for obj in deleted:
+        kind = MODEL_KINDS.get(type(obj))
+        if kind is not None:
+            removed.setdefault(kind, []).append(obj.id)
+
+    if not (created or changed or removed):
+        return
+    connection = session.connection()
+    for kind, rows in created.items():
+        index_records(connection, kind, rows, replace=False)
+    for kind, rows in changed.items():
+        index_records(connection, kind, rows)
+    for kind, ids in removed.items():
+        remove_records(connection, kind, ids)
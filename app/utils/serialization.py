@@ -0,0 +1,187 @@
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+from marshmallow import fields
+from sqlalchemy import select
+from app.models import db, Mechanic, Item, ServiceTicket, ServiceItems, ticket_mechanic
+from app.utils.pagination import paginate
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+# Fast path for list endpoints. Instead of loading ORM objects and running
+# them through marshmallow, the page is fetched as plain column tuples and
+# turned into dicts with converters compiled once from the schema's own
+# fields, so the JSON is byte-for-byte what the schema would have produced
+# (tests/test_serialization.py checks this). Enabled with FAST_SERIALIZATION.
+
+def fast_serialization_enabled():
+    return current_app.config.get('FAST_SERIALIZATION', False)
+
+def _optional(convert):
+    return lambda value: None if value is None else convert(value)
+
+# Same conversion the field's _serialize does, minus the per-call dispatch.
+# Anything not listed here (Decimal quantizing, custom fields) goes through
+# the field itself.
+def _converter(field, name):
+    if isinstance(field, (fields.Date, fields.DateTime)):
+        format_func = field.SERIALIZATION_FUNCS.get(field.format or field.DEFAULT_FORMAT)
+        if format_func:
+            return _optional(format_func)
+    if type(field) is fields.Integer and not field.as_string:
+        return _optional(int)
+    if type(field) is fields.Float and not field.as_string:
+        return _optional(float)
+    if type(field) is fields.String:
+        return _optional(str)
+    return lambda value: field._serialize(value, name, None)
+
+class RowSerializer:
+    def __init__(self, model, schema):
+        self.model = model
+        self.schema = schema
+        self._compiled = None
+
+    # Compiled on first use: schema fields referring to other schemas by
+    # name can only be resolved once every blueprint has been imported.
+    def compile(self):
+        if self._compiled is None:
+            self._compiled = [
+                (name, self.model.__table__.c[field.attribute or name], _converter(field, name))
+                for name, field in self.schema.dump_fields.items()
+            ]
+        return self._compiled
+
+    def column_list(self):
+        return [column for _, column, _ in self.compile()]
+
+    # Column-tuple version of an ORM query: keeps its WHERE clause, drops
+    # loader options, ordering and limits (paginate adds its own).
+    def select(self, query):
+        rows_query = select(*self.column_list())
+        if query.whereclause is not None:
+            rows_query = rows_query.where(query.whereclause)
+        return rows_query
+
+    def dump(self, rows):
+        compiled = self.compile()
+        return [
+            {name: convert(value) for (name, _, convert), value in zip(compiled, row)}
+            for row in rows
+        ]
+
+    def jsonify(self, rows):
+        return current_app.json.response(self.dump(rows))
+
+# Tickets: the ticket's own columns come from the page query, and the
+# mechanics and items for the whole page are fetched with one query each,
+# in the same order as the ServiceTicket relationships.
+class TicketRowSerializer(RowSerializer):
+    def __init__(self, schema):
+        super().__init__(ServiceTicket, schema)
+        self.mechanic_serializer = None
+        self._item_columns = None
+
+    def compile(self):
+        if self._compiled is None:
+            schema_fields = self.schema.dump_fields
+            self.mechanic_serializer = RowSerializer(Mechanic, schema_fields['mechanics'].schema)
+            self._item_columns = [
+                (name, _item_column(field.attribute or name), _converter(field, name))
+                for name, field in schema_fields['items'].schema.dump_fields.items()
+            ]
+            self._compiled = [
+                (name, ServiceTicket.__table__.c[field.attribute or name], _converter(field, name))
+                for name, field in schema_fields.items() if not isinstance(field, fields.Nested)
+            ]
+        return self._compiled
+
+    def _mechanics_by_ticket(self, ticket_ids):
+        query = (
+            select(ticket_mechanic.c.ticket_id, *self.mechanic_serializer.column_list())
+            .join(Mechanic, Mechanic.id == ticket_mechanic.c.mechanic_id)
+            .where(ticket_mechanic.c.ticket_id.in_(ticket_ids))
+            .order_by(ticket_mechanic.c.ticket_id, Mechanic.id)
+        )
+        grouped = {}
+        for row in db.session.execute(query):
+            grouped.setdefault(row[0], []).append(row[1:])
+        return {ticket_id: self.mechanic_serializer.dump(rows) for ticket_id, rows in grouped.items()}
+
+    def _items_by_ticket(self, ticket_ids):
+        query = (
+            select(ServiceItems.service_id, *[column for _, column, _ in self._item_columns])
+            .join(Item, Item.id == ServiceItems.item_id)
+            .where(ServiceItems.service_id.in_(ticket_ids))
+            .order_by(ServiceItems.service_id, ServiceItems.id)
+        )
+        grouped = {}
+        for row in db.session.execute(query):
+            grouped.setdefault(row[0], []).append(
+                {name: convert(value) for (name, _, convert), value in zip(self._item_columns, row[1:])}
+            )
+        return grouped
+
+    def dump(self, rows):
+        tickets = super().dump(rows)
+        if not tickets:
+            return tickets
+
+        ticket_ids = [ticket['id'] for ticket in tickets]
+        mechanics = self._mechanics_by_ticket(ticket_ids)
+        items = self._items_by_ticket(ticket_ids)
+        for ticket in tickets:
+            ticket['mechanics'] = mechanics.get(ticket['id'], [])
+            ticket['items'] = items.get(ticket['id'], [])
+        return tickets
+
+# ItemInTicketSchema reads 'item.<column>' off the ServiceItems row
+def _item_column(attribute):
+    if attribute.startswith('item.'):
+        return Item.__table__.c[attribute.split('.', 1)[1]]
+    return ServiceItems.__table__.c[attribute]
+
+# Schema response when the fast path is off, column-tuple rows when it is
+# on. Returns (serializer, rows, next_cursor); both kinds of serializer have
+# a jsonify(rows) method for paginated_response. `sort` is passed on to
+# paginate() (sort_column, descending).
+def paginate_serialized(query, key_column, schema, row_serializer, **sort):
+    if fast_serialization_enabled():
+        rows, next_cursor = paginate(row_serializer.select(query), key_column, scalars=False, **sort)
+        return row_serializer, rows, next_cursor
+    rows, next_cursor = paginate(query, key_column, **sort)
+    return schema, rows, next_cursor
+
+# JSON provider backed by orjson, used when JSON_PROVIDER is 'orjson' and the
+# package is installed. Keys are sorted and anything orjson can't encode
+# natively (Decimal, dates) goes through Flask's default hook, so responses
+# match the stock provider except that non-ASCII text is written as UTF-8
+# rather than \u escapes.
+class OrjsonProvider(DefaultJSONProvider):
+    def _options(self, indent=False):
+        options = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._options(kwargs.get('indent'))).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._options(indent)) + b'\n'
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+def configure_json_provider(app):
+    if app.config.get('JSON_PROVIDER') != 'orjson':
+        return
+    if orjson is None:
+        app.logger.warning('JSON_PROVIDER is orjson but orjson is not installed, using the default provider')
+        return
+    app.json = OrjsonProvider(app)
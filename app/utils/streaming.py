@@ -0,0 +1,32 @@
+from flask import Response, current_app, request, stream_with_context
+from app.models import db
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+STREAM_BATCH_SIZE = 1000
+
+def wants_stream():
+    if request.args.get('stream', '').lower() in ('1', 'true'):
+        return True
+    return request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+# Export a whole query as newline-delimited JSON, one object per line.
+# yield_per fetches rows from a server-side cursor in batches and the
+# generator serializes them one at a time, so memory stays flat no matter
+# how large the table is. Eager loader options on the query (selectinload)
+# run once per batch.
+def ndjson_lines(query, key_column, schema):
+    query = query.order_by(key_column).execution_options(yield_per=STREAM_BATCH_SIZE)
+    for row in db.session.execute(query).scalars():
+        yield current_app.json.dumps(schema.dump(row)) + '\n'
+
+def stream_response(query, key_column, schema):
+    return Response(stream_with_context(ndjson_lines(query, key_column, schema)), mimetype=NDJSON_MIMETYPE)
+
+# The same export written to a file (background jobs). Returns the row count.
+def write_ndjson(query, key_column, schema, path):
+    count = 0
+    with open(path, 'w', encoding='utf-8') as output:
+        for line in ndjson_lines(query, key_column, schema):
+            output.write(line)
+            count += 1
+    return count
@@ -2,42 +2,146 @@ import jose
 from jose import jwt
 from datetime import datetime, timedelta, timezone
 from functools import wraps
-from flask import request, jsonify
+from flask import request, jsonify, g
+from collections import OrderedDict
+from app.extensions import token_store, token_store_key
+import hashlib
+import threading
+import time
+import uuid
 import os
 
 SECRET_KEY = os.environ.get('SECRET_KEY') or "super secret, secret key"
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 4096))
+# Access tokens are short lived; clients renew them with the refresh token
+# instead of logging in again, so shortening them adds no database traffic.
+ACCESS_TOKEN_MINUTES = int(os.environ.get('ACCESS_TOKEN_MINUTES', 15))
+REFRESH_TOKEN_DAYS = int(os.environ.get('REFRESH_TOKEN_DAYS', 14))
 
-def encode_token(user_id): #using unique pieces of info to make our tokens user specific
+# Bounded LRU of tokens whose signature has already been verified, keyed by a
+# hash of the token so raw tokens are never kept in memory. Entries are only
+# served until the token's own `exp`, so a cached token expires exactly when
+# jwt.decode would have started rejecting it.
+class VerifiedTokenCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token_hash):
+        with self._lock:
+            claims = self._entries.get(token_hash)
+            if claims is None:
+                return None
+            if claims['exp'] <= time.time():
+                del self._entries[token_hash]
+                return None
+            self._entries.move_to_end(token_hash)
+            return claims
+
+    def set(self, token_hash, claims):
+        with self._lock:
+            self._entries[token_hash] = claims
+            self._entries.move_to_end(token_hash)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+verified_tokens = VerifiedTokenCache(TOKEN_CACHE_SIZE)
+
+def _encode(user_id, token_type, lifetime):
     payload = {
-        'exp': datetime.now(timezone.utc) + timedelta(days=0,hours=1), #Setting the expiration time to an hour past now
+        'exp': datetime.now(timezone.utc) + lifetime, #Setting the expiration time
         'iat': datetime.now(timezone.utc), #Issued at
-        'sub': str(user_id) #This needs to be a string or the token will be malformed and won't be able to be decoded.
+        'sub': str(user_id), #This needs to be a string or the token will be malformed and won't be able to be decoded.
+        'jti': uuid.uuid4().hex, #Unique token id, used to revoke this token on logout
+        'type': token_type
     }
 
     token = jwt.encode(payload, SECRET_KEY, algorithm='HS256')
     return token
 
+def encode_token(user_id): #using unique pieces of info to make our tokens user specific
+    return _encode(user_id, 'access', timedelta(minutes=ACCESS_TOKEN_MINUTES))
+
+def encode_refresh_token(user_id):
+    return _encode(user_id, 'refresh', timedelta(days=REFRESH_TOKEN_DAYS))
+
+# Revoked token ids live in the shared token store until the token would
+# have expired anyway, so a logout is seen by every worker with one key lookup.
+def _revoked_key(jti):
+    return token_store_key(f'revoked-token:{jti}')
+
+def _remaining_lifetime(claims):
+    return max(int(claims['exp'] - time.time()), 1)
+
+def revoke_token(claims):
+    if claims.get('jti'):
+        token_store.set(_revoked_key(claims['jti']), True, timeout=_remaining_lifetime(claims))
+
+# Revokes a single-use token, returning False if it was already revoked. The
+# add is atomic on the backend, so of two concurrent uses only one wins.
+def claim_token(claims):
+    if not claims.get('jti'):
+        return False
+    return token_store.add(_revoked_key(claims['jti']), True, timeout=_remaining_lifetime(claims))
+
+def is_token_revoked(claims):
+    return bool(claims.get('jti')) and token_store.get(_revoked_key(claims['jti'])) is not None
+
+def decode_token(token):
+    token_hash = hashlib.sha256(token.encode()).hexdigest()
+    claims = verified_tokens.get(token_hash)
+    if claims is None:
+        data = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
+        claims = {'sub': data['sub'], 'exp': data.get('exp', 0), 'jti': data.get('jti'), 'type': data.get('type', 'access')}
+        verified_tokens.set(token_hash, claims)
+    return claims
+
+# Returns the claims of a valid, unrevoked refresh token, or None
+def decode_refresh_token(token):
+    try:
+        claims = decode_token(token)
+    except jose.exceptions.JWTError:
+        return None
+    if claims['type'] != 'refresh' or is_token_revoked(claims):
+        return None
+    return claims
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
         token = None
         # Look for the token in the Authorization header
         if 'Authorization' in request.headers:
-            token = request.headers['Authorization'].split(" ")[1]
+            parts = request.headers['Authorization'].split()
+            if len(parts) != 2 or parts[0].lower() != 'bearer':
+                return jsonify({'message': 'Invalid authorization header!'}), 400
+            token = parts[1]
         
         if not token:
             return jsonify({'message': 'Token is missing!'}), 400
 
         try:
-            # Decode the token
-            data = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-            user_id = data['sub']  # Fetch the user ID
+            # Decode the token, or reuse an earlier verification of it
+            claims = decode_token(token)
+            user_id = claims['sub']  # Fetch the user ID
             
         except jose.exceptions.ExpiredSignatureError:
              return jsonify({'message': 'Token has expired!'}), 400
         except jose.exceptions.JWTError:
              return jsonify({'message': 'Invalid token!'}), 400
 
+        if claims['type'] != 'access':
+            return jsonify({'message': 'Invalid token!'}), 400
+
+        if is_token_revoked(claims):
+            return jsonify({'message': 'Token has been revoked!'}), 400
+
+        g.token_claims = claims
         return f(user_id, *args, **kwargs)
 
-    return decorated
\ No newline at end of file
+    return decorated
@@ -0,0 +1,46 @@
+"""Per-request overhead of token_required, with and without the verified-token cache.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_auth --requests 20000
+
+"uncached" clears the cache before every call, which is what every
+authenticated request paid before the cache existed: a full jwt.decode with
+signature verification. "cached" is a repeat request from the same session.
+Both include the revocation lookup.
+"""
+import argparse
+import time
+from app import create_app
+from app.utils.util import encode_token, token_required, verified_tokens
+
+@token_required
+def protected_view(user_id):
+    return user_id
+
+def microseconds_per_request(app, headers, requests, clear_cache):
+    with app.test_request_context('/', headers=headers):
+        protected_view()
+        start = time.perf_counter()
+        for _ in range(requests):
+            if clear_cache:
+                verified_tokens.clear()
+            protected_view()
+        return (time.perf_counter() - start) / requests * 1_000_000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=10000)
+    args = parser.parse_args()
+
+    app = create_app('TestingConfig')
+    headers = {'Authorization': 'Bearer ' + encode_token(1)}
+
+    uncached = microseconds_per_request(app, headers, args.requests, clear_cache=True)
+    cached = microseconds_per_request(app, headers, args.requests, clear_cache=False)
+    print(f'uncached: {uncached:8.1f} us/request')
+    print(f'cached:   {cached:8.1f} us/request')
+    print(f'speedup:  {uncached / cached:8.1f}x')
+
+if __name__ == '__main__':
+    main()
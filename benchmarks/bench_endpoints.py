@@ -0,0 +1,261 @@
+"""Latency, queries per request and memory for every API route on a large dataset.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_endpoints
+    python -m benchmarks.bench_endpoints --customers 100000 --tickets 1000000 --requests 200
+    python -m benchmarks.bench_endpoints --skip-seed --routes tickets. reports.
+    python -m benchmarks.bench_endpoints --save-baseline
+
+Seeds instance/benchmark.db (BenchmarkConfig; set BENCHMARK_DATABASE_URI to
+use a local MySQL or PostgreSQL database instead) with benchmarks/seed.py,
+then sends --requests requests to each route through the Flask test client
+and reports p50/p95/p99 latency, SQL statements per request and the peak
+Python memory allocated while handling one request.
+
+Results are compared with benchmarks/baseline.json: a route regresses when it
+runs more statements per request than the baseline, or when its p95 latency
+is more than --tolerance above it. Regressions make the command exit with
+status 1. Latencies depend on the machine, so refresh the baseline with
+--save-baseline on the machine that runs the comparison; statement counts
+are machine independent.
+
+With --url the same requests go over HTTP to a running server instead, e.g.
+one started against the same database with
+
+    BENCHMARK_DATABASE_URI=sqlite:////abs/path/instance/benchmark.db \\
+        gunicorn -w 4 'app:create_app("BenchmarkConfig")'
+
+using --concurrency client threads. Only latency and throughput are measured
+in that mode.
+"""
+import argparse
+import json
+import math
+import os
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import event
+from app import create_app
+from app.extensions import cache
+from app.models import db
+from app.utils.util import encode_token
+from benchmarks.seed import seed
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+# Latency regressions smaller than this are noise
+MIN_REGRESSION_MS = 1.0
+
+class Route:
+    def __init__(self, name, method, path, body=None, auth=False, uncached=False):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body
+        self.auth = auth
+        # clear the response caches before each request (not timed)
+        self.uncached = uncached
+
+# `path` and `body` take the request number, so single-record routes walk
+# through different rows instead of measuring cache hits. Ids are 1..n as
+# seeded. Login, logout and token refresh are covered by bench_passwords and
+# bench_auth; deletes are left out so every run sees the same data.
+def routes(volumes):
+    customers, mechanics, items, tickets = (volumes[key] for key in ('customers', 'mechanics', 'items', 'tickets'))
+    def spread(count):
+        return lambda i: 1 + (i * 7919) % count
+    customer, mechanic, item, ticket = spread(customers), spread(mechanics), spread(items), spread(tickets)
+    return [
+        Route('customers.list', 'GET', lambda i: '/customers/'),
+        Route('customers.get', 'GET', lambda i: f'/customers/{customer(i)}'),
+        Route('customers.by_email', 'GET', lambda i: f'/customers/?email=customer{customer(i)}@example.com'),
+        Route('mechanics.list', 'GET', lambda i: '/mechanics/'),
+        Route('mechanics.get', 'GET', lambda i: f'/mechanics/{mechanic(i)}'),
+        Route('mechanics.most_worked', 'GET', lambda i: '/mechanics/most-worked?limit=10'),
+        Route('mechanics.update', 'PUT', lambda i: f'/mechanics/{mechanic(i)}', lambda i: {
+            'name': 'updated mechanic', 'email': f'mechanic{mechanic(i)}@example.com',
+            'address': '1 Workshop Road', 'phone': '555-0000000', 'salary': 50000,
+        }),
+        Route('items.list', 'GET', lambda i: '/inventory/'),
+        Route('items.get', 'GET', lambda i: f'/inventory/{item(i)}'),
+        Route('items.by_price', 'GET', lambda i: '/inventory/?sort=-price&price[lte]=100'),
+        Route('items.create', 'POST', lambda i: '/inventory/', lambda i: {'name': f'bench item {i}', 'price': 9.99}),
+        Route('tickets.list', 'GET', lambda i: '/service-tickets/'),
+        Route('tickets.list_500', 'GET', lambda i: '/service-tickets/?limit=500'),
+        Route('tickets.get', 'GET', lambda i: f'/service-tickets/{ticket(i)}'),
+        Route('tickets.by_date', 'GET', lambda i: '/service-tickets/?sort=-service_date&service_date[gte]=2025-06-01'),
+        Route('tickets.my_tickets', 'GET', lambda i: '/service-tickets/my-tickets', auth=True),
+        Route('tickets.totals', 'GET', lambda i: '/service-tickets/totals'),
+        Route('tickets.invoice', 'GET', lambda i: f'/service-tickets/{ticket(i)}/invoice'),
+        Route('tickets.changes', 'GET', lambda i: '/service-tickets/changes?limit=100'),
+        Route('tickets.create', 'POST', lambda i: '/service-tickets/', lambda i: {
+            'vin': f'BENCH{i:012d}', 'service_date': '2026-01-01',
+            'service_description': 'benchmark ticket', 'customer_id': customer(i),
+        }),
+        Route('tickets.edit_mechanics', 'PUT', lambda i: f'/service-tickets/{ticket(i)}/edit',
+              lambda i: {'add_mechanic_ids': [mechanic(i)], 'remove_mechanic_ids': []}),
+        Route('tickets.add_part', 'PUT', lambda i: f'/service-tickets/add-part/{item(i)}/to-ticket/{ticket(i)}'),
+        Route('tickets.add_parts', 'PUT', lambda i: f'/service-tickets/{ticket(i)}/parts',
+              lambda i: [{'item_id': item(i), 'quantity': 2}, {'item_id': item(i + 1), 'quantity': 1}]),
+        Route('reports.revenue_by_month', 'GET', lambda i: '/reports/revenue-by-month', uncached=True),
+        Route('reports.parts_usage', 'GET', lambda i: '/reports/parts-usage?limit=20', uncached=True),
+        Route('reports.mechanic_workload', 'GET', lambda i: '/reports/mechanic-workload?start_date=2025-10-01', uncached=True),
+        Route('reports.top_customers', 'GET', lambda i: '/reports/top-customers', uncached=True),
+        Route('search.vin_prefix', 'GET', lambda i: '/search/?q=1HG'),
+        Route('search.name', 'GET', lambda i: '/search/?q=maria gar'),
+        Route('search.short_prefix', 'GET', lambda i: '/search/?q=ex'),
+    ]
+
+def percentiles(latencies):
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {'p50_ms': cuts[49] * 1000, 'p95_ms': cuts[94] * 1000, 'p99_ms': cuts[98] * 1000}
+
+def run_in_process(app, route, requests, headers):
+    client = app.test_client()
+    statements = [0]
+    def count(*args):
+        statements[0] += 1
+
+    def send(i):
+        if route.uncached:
+            with app.app_context():
+                cache.clear()
+        body = route.body(i) if route.body else None
+        start = time.perf_counter()
+        response = client.open(route.path(i), method=route.method, json=body, headers=headers if route.auth else None)
+        elapsed = time.perf_counter() - start
+        if response.status_code >= 400:
+            raise RuntimeError(f'{route.name}: {route.method} {route.path(i)} returned {response.status_code}: {response.get_data(as_text=True)[:200]}')
+        return elapsed
+
+    send(requests)  # warm up
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', count)
+        try:
+            latencies = [send(i) for i in range(requests)]
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count)
+
+    tracemalloc.start()
+    send(requests + 1)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    result = percentiles(latencies)
+    result['queries'] = round(statements[0] / requests, 2)
+    result['peak_kib'] = round(peak / 1024)
+    return result
+
+def run_over_http(base_url, route, requests, headers, concurrency):
+    def send(i):
+        body = route.body(i) if route.body else None
+        request = urllib.request.Request(
+            base_url.rstrip('/') + route.path(i), method=route.method,
+            data=json.dumps(body).encode() if body is not None else None,
+            headers={'Content-Type': 'application/json', **(headers if route.auth else {})},
+        )
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+        except urllib.error.HTTPError as error:
+            raise RuntimeError(f'{route.name}: {route.method} {route.path(i)} returned {error.code}')
+        return time.perf_counter() - start
+
+    send(requests)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = list(pool.map(send, range(requests)))
+    result = percentiles(latencies)
+    result['requests_per_second'] = round(requests / (time.perf_counter() - start), 1)
+    return result
+
+def compare(results, baseline, tolerance, same_volumes):
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if not expected:
+            continue
+        # a route whose statement count depends on the data (edit_mechanics
+        # skips mechanics already assigned) averages a fraction; only more
+        # than it ever ran per request counts, so other volumes compare too
+        if 'queries' in result and result['queries'] > math.ceil(expected['queries'] - 0.01) + 0.01:
+            regressions.append(f"{name}: {result['queries']} statements per request, baseline {expected['queries']}")
+        if same_volumes:
+            limit = max(expected['p95_ms'] * (1 + tolerance), expected['p95_ms'] + MIN_REGRESSION_MS)
+            if result['p95_ms'] > limit:
+                regressions.append(f"{name}: p95 {result['p95_ms']:.2f} ms, baseline {expected['p95_ms']:.2f} ms")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--customers', type=int, default=10000)
+    parser.add_argument('--mechanics', type=int, default=200)
+    parser.add_argument('--items', type=int, default=500)
+    parser.add_argument('--tickets', type=int, default=50000)
+    parser.add_argument('--requests', type=int, default=100, help='timed requests per route')
+    parser.add_argument('--routes', nargs='*', help='only run routes whose name starts with one of these')
+    parser.add_argument('--skip-seed', action='store_true', help='reuse the data from the previous run')
+    parser.add_argument('--url', help='benchmark a running server at this base URL instead of the test client')
+    parser.add_argument('--concurrency', type=int, default=8, help='client threads with --url')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='write the results to --baseline')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed p95 increase over the baseline (0.5 = 50%%)')
+    args = parser.parse_args()
+
+    app = create_app('BenchmarkConfig')
+    volumes = {'customers': args.customers, 'mechanics': args.mechanics, 'items': args.items, 'tickets': args.tickets}
+    if not args.skip_seed and not args.url:
+        print(f"Seeding {app.config['SQLALCHEMY_DATABASE_URI']} with {volumes}")
+        seed(app, **volumes)
+
+    with app.app_context():
+        headers = {'Authorization': 'Bearer ' + encode_token(1)}
+    selected = [route for route in routes(volumes) if not args.routes or route.name.startswith(tuple(args.routes))]
+
+    results = {}
+    extra = 'req/s' if args.url else 'queries  peak KiB'
+    print(f"{'route':28} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  {extra}")
+    for route in selected:
+        if args.url:
+            result = run_over_http(args.url, route, args.requests, headers, args.concurrency)
+            extra = f"{result['requests_per_second']:>8}"
+        else:
+            result = run_in_process(app, route, args.requests, headers)
+            extra = f"{result['queries']:>7} {result['peak_kib']:>9}"
+        results[route.name] = result
+        print(f"{route.name:28} {result['p50_ms']:9.2f} {result['p95_ms']:9.2f} {result['p99_ms']:9.2f}  {extra}")
+    if not args.url:
+        print(f"peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024} MiB")
+
+    if args.save_baseline:
+        rounded = {name: {key: round(value, 2) for key, value in result.items()} for name, result in results.items()}
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump({'volumes': volumes, 'requests': args.requests, 'routes': rounded}, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write('\n')
+        print(f'Baseline written to {args.baseline}')
+        return
+
+    if not os.path.exists(args.baseline):
+        return
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    same_volumes = baseline['volumes'] == volumes
+    if not same_volumes:
+        print(f"Baseline was taken with {baseline['volumes']}; comparing statement counts only")
+    regressions = compare(results, baseline['routes'], args.tolerance, same_volumes and not args.url)
+    if regressions:
+        print('Regressions against the baseline:')
+        for regression in regressions:
+            print('  ' + regression)
+        sys.exit(1)
+    print('No regressions against the baseline')
+
+if __name__ == '__main__':
+    main()
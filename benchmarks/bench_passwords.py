@@ -0,0 +1,62 @@
+"""Login throughput at different password hashing costs.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_passwords
+    python -m benchmarks.bench_passwords --methods scrypt:16384:8:1 pbkdf2:sha256:600000 --threads 8
+
+For each method it reports how many password verifications (the CPU cost of
+one login) a single worker can do per second, sequentially and with
+--threads concurrent logins going through the bounded hasher pool.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app import create_app
+from app.utils.passwords import hash_password, verify_password
+
+DEFAULT_METHODS = [
+    'pbkdf2:sha256:600000',
+    'pbkdf2:sha256:1000000',
+    'scrypt:16384:8:1',
+    'scrypt:32768:8:1',
+    'scrypt:65536:8:1',
+]
+
+def logins_per_second(app, stored, password, logins, threads):
+    def login(_):
+        with app.app_context():
+            valid, _ = verify_password(stored, password)
+            assert valid
+
+    start = time.perf_counter()
+    if threads == 1:
+        for i in range(logins):
+            login(i)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(login, range(logins)))
+    return logins / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--methods', nargs='+', default=DEFAULT_METHODS)
+    parser.add_argument('--logins', type=int, default=20, help='logins measured per method')
+    parser.add_argument('--threads', type=int, default=4, help='concurrent logins for the second measurement')
+    parser.add_argument('--hash-workers', type=int, default=2, help='PASSWORD_HASH_WORKERS for the run')
+    args = parser.parse_args()
+
+    app = create_app('TestingConfig')
+    app.config['PASSWORD_HASH_WORKERS'] = args.hash_workers
+
+    print(f"{'method':<26}{'sequential/s':>14}{f'{args.threads} threads/s':>16}{'ms/login':>12}")
+    for method in args.methods:
+        app.config['PASSWORD_HASH_METHOD'] = method
+        with app.app_context():
+            stored = hash_password('benchmark-password')
+        sequential = logins_per_second(app, stored, 'benchmark-password', args.logins, 1)
+        concurrent = logins_per_second(app, stored, 'benchmark-password', args.logins, args.threads)
+        print(f'{method:<26}{sequential:>14.1f}{concurrent:>16.1f}{1000 / sequential:>12.1f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""List endpoint throughput with marshmallow schemas vs the fast serializer.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --tickets 5000 --limit 500 --requests 50
+
+Seeds instance/benchmark.db (BenchmarkConfig) with tickets that each have
+two mechanics and two parts, then times full pages of GET /service-tickets/
+and GET /mechanics/ through the test client with FAST_SERIALIZATION off and
+on, and with the orjson provider when it is installed.
+"""
+import argparse
+import time
+from datetime import date
+from app import create_app
+from app.models import db, Customer, Mechanic, Item, ServiceTicket, ServiceItems
+from app.utils.serialization import OrjsonProvider, orjson
+
+def seed(app, tickets):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        customer = Customer(name='bench', email='bench@email.com', phone='555-555-5555', password='bench')
+        mechanics = [
+            Mechanic(name=f'mechanic_{i}', email=f'mechanic_{i}@email.com', address='address', phone='555-555-5555', salary=1000 + i)
+            for i in range(max(tickets // 10, 2))
+        ]
+        items = [Item(name=f'item_{i}', price=10 + i / 4) for i in range(max(tickets // 10, 2))]
+        db.session.add_all([customer] + mechanics + items)
+        db.session.flush()
+        for i in range(tickets):
+            ticket = ServiceTicket(vin=f'VIN{i:012d}', service_date=date(2025, 1, 1 + i % 28),
+                                   service_description='benchmark ticket', customer_id=customer.id)
+            ticket.mechanics.extend([mechanics[i % len(mechanics)], mechanics[(i + 1) % len(mechanics)]])
+            ticket.service_items.extend([
+                ServiceItems(item=items[i % len(items)], quantity=1),
+                ServiceItems(item=items[(i + 1) % len(items)], quantity=2),
+            ])
+            db.session.add(ticket)
+        db.session.commit()
+
+def rows_per_second(client, url, requests):
+    rows = len(client.get(url).json)
+    start = time.perf_counter()
+    for _ in range(requests):
+        client.get(url)
+    elapsed = time.perf_counter() - start
+    return rows * requests / elapsed, elapsed / requests * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tickets', type=int, default=2000)
+    parser.add_argument('--limit', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_app('BenchmarkConfig')
+    seed(app, args.tickets)
+    client = app.test_client()
+
+    modes = [('schema', False, None), ('fast', True, None)]
+    if orjson is not None:
+        modes.append(('fast+orjson', True, OrjsonProvider(app)))
+    default_provider = app.json
+
+    for url in (f'/service-tickets/?limit={args.limit}', f'/mechanics/?limit={args.limit}'):
+        print(url)
+        baseline = None
+        for name, fast, provider in modes:
+            app.config['FAST_SERIALIZATION'] = fast
+            app.json = provider or default_provider
+            rate, ms = rows_per_second(client, url, args.requests)
+            baseline = baseline or rate
+            print(f'  {name:12} {rate:10.0f} rows/s  {ms:8.2f} ms/page  {rate / baseline:5.1f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Seed a database with a large, reproducible dataset for benchmarks.
+
+Rows are written with batched Core inserts, which is far faster than going
+through the ORM at these volumes. The derived data the ORM hooks normally
+maintain (parts totals, the ticket change log and the search index) is then
+built in bulk, so the database looks like one filled through the API.
+"""
+import random
+import string
+import time
+from datetime import date, timedelta
+from sqlalchemy import insert
+from app.models import db, Customer, Mechanic, Item, ServiceTicket, ServiceItems, ticket_mechanic
+from app.utils.invoices import refresh_parts_totals
+from app.utils.passwords import hash_password
+from app.utils.schema import upgrade_schema
+
+BATCH_SIZE = 5000
+PASSWORD = 'benchmark'
+FIRST_NAMES = ['john', 'jane', 'maria', 'jose', 'li', 'omar', 'anna', 'peter', 'sara', 'david']
+LAST_NAMES = ['smith', 'garcia', 'chen', 'khan', 'muller', 'rossi', 'silva', 'brown', 'novak', 'kim']
+VIN_CHARS = 'ABCDEFGHJKLMNPRSTUVWXYZ0123456789'
+FIRST_SERVICE_DATE = date(2024, 1, 1)
+SERVICE_DAYS = 730
+
+def _insert_generated(connection, table, count, make_row):
+    batch = []
+    for i in range(1, count + 1):
+        batch.append(make_row(i))
+        if len(batch) == BATCH_SIZE:
+            connection.execute(insert(table), batch)
+            batch = []
+    if batch:
+        connection.execute(insert(table), batch)
+
+def vin(rnd):
+    return ''.join(rnd.choices(VIN_CHARS, k=17))
+
+# Drops every table and fills the database. Ids are 1..n for each table, so
+# benchmarks can address rows without looking them up. Returns the volumes.
+def seed(app, customers=10000, mechanics=200, items=500, tickets=50000, seed_value=42, log=print):
+    rnd = random.Random(seed_value)
+
+    with app.app_context():
+        password = hash_password(PASSWORD)
+        db.drop_all()
+        db.create_all()
+        start = time.perf_counter()
+        with db.engine.begin() as connection:
+            _insert_generated(connection, Customer.__table__, customers, lambda i: {
+                'name': f'{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)}',
+                'email': f'customer{i}@example.com',
+                'phone': f'555-{i:07d}',
+                'password': password,
+            })
+            _insert_generated(connection, Mechanic.__table__, mechanics, lambda i: {
+                'name': f'{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)}',
+                'email': f'mechanic{i}@example.com',
+                'address': f'{i} Workshop Road',
+                'phone': f'555-{i:07d}',
+                'salary': rnd.randrange(40000, 90000),
+            })
+            _insert_generated(connection, Item.__table__, items, lambda i: {
+                'name': f'{rnd.choice(["oil", "air", "fuel", "cabin"])} filter {string.ascii_uppercase[i % 26]}{i}',
+                'price': round(rnd.uniform(5, 500), 2),
+            })
+            log(f'  customers, mechanics, items: {time.perf_counter() - start:.1f}s')
+
+            # tickets go in with their assignments and parts batch by batch,
+            # so memory stays flat at any volume
+            for first in range(1, tickets + 1, BATCH_SIZE):
+                ticket_rows, assignments, parts = [], [], []
+                for i in range(first, min(first + BATCH_SIZE, tickets + 1)):
+                    ticket_rows.append({
+                        'vin': vin(rnd),
+                        'service_date': FIRST_SERVICE_DATE + timedelta(days=rnd.randrange(SERVICE_DAYS)),
+                        'service_description': 'scheduled maintenance',
+                        'customer_id': rnd.randint(1, customers),
+                    })
+                    if i == 1:
+                        ticket_rows[-1]['customer_id'] = 1 #the benchmarks' logged-in customer needs a ticket
+                    for mechanic_id in rnd.sample(range(1, mechanics + 1), min(rnd.randint(1, 3), mechanics)):
+                        assignments.append({'ticket_id': i, 'mechanic_id': mechanic_id})
+                    for item_id in rnd.sample(range(1, items + 1), min(rnd.randint(1, 4), items)):
+                        parts.append({'service_id': i, 'item_id': item_id, 'quantity': rnd.randint(1, 5)})
+                connection.execute(insert(ServiceTicket.__table__), ticket_rows)
+                connection.execute(insert(ticket_mechanic), assignments)
+                connection.execute(insert(ServiceItems.__table__), parts)
+            log(f'  tickets, assignments, parts: {time.perf_counter() - start:.1f}s')
+
+            refresh_parts_totals(connection)
+        # change log and search index
+        upgrade_schema()
+        log(f'  derived data: {time.perf_counter() - start:.1f}s')
+
+    return {'customers': customers, 'mechanics': mechanics, 'items': items, 'tickets': tickets}
@@ -1,7 +1,14 @@
 from app import create_app
 from app.models import db, Customer
 import unittest
-from app.utils.util import encode_token
+import json
+from app.utils.util import encode_token, encode_refresh_token, verified_tokens
+from sqlalchemy import event
+from jose import jwt
+from unittest import mock
+from app.blueprints.customers.schemas import customer_schema
+from app.utils.caching import get_cached_entity
+from app.extensions import cache, cache_key
 
 class TestCustomer(unittest.TestCase):
     def setUp(self):
@@ -26,6 +33,21 @@ class TestCustomer(unittest.TestCase):
         self.assertEqual(response.json['status'], 'success')
         return response.json['token']
 
+    def test_login_upgrades_plaintext_password(self):
+        self.test_login_customer()
+        with self.app.app_context():
+            stored = db.session.get(Customer, 1).password
+        self.assertTrue(stored.startswith('pbkdf2:sha256:1000$'))
+        self.test_login_customer()
+
+    def test_login_rehashes_when_cost_changes(self):
+        self.test_login_customer()
+        self.app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:2000'
+        self.test_login_customer()
+        with self.app.app_context():
+            stored = db.session.get(Customer, 1).password
+        self.assertTrue(stored.startswith('pbkdf2:sha256:2000$'))
+
     def test_invalid_login(self):
         credentials = {
             "email": "bad_email@email.com",
@@ -47,6 +69,16 @@ class TestCustomer(unittest.TestCase):
         response = self.client.post('/customers/', json=customer_payload)
         self.assertEqual(response.status_code, 201)
         self.assertEqual(response.json['name'], "John Doe")
+        self.assertNotIn('password', response.json)
+
+        with self.app.app_context():
+            stored = db.session.get(Customer, response.json['id']).password
+        self.assertNotEqual(stored, "123")
+
+        response = self.client.post('/customers/login', json={"email": "jd@email.com", "password": "123"})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post('/customers/login', json={"email": "jd@email.com", "password": "1234"})
+        self.assertEqual(response.status_code, 401)
 
     def test_invalid_customer_creation(self):
         customer_payload = {
@@ -59,6 +91,86 @@ class TestCustomer(unittest.TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json['email'], ['Missing data for required field.'])
 
+    def test_bulk_create_customers(self):
+        customers_payload = [
+            {"name": "John Doe", "email": "jd@email.com", "phone": "555-555-5555", "password": "123"},
+            {"name": "Jane Doe", "email": "test@email.com", "phone": "555-555-5555", "password": "123"},
+            {"name": "Jane Doe", "phone": "555-555-5555", "password": "123"},
+            {"name": "Jim Doe", "email": "jd@email.com", "phone": "555-555-5555", "password": "123"},
+            {"name": "Jim Doe", "email": "jim@email.com", "phone": "555-555-5555", "password": "456"},
+        ]
+        response = self.client.post('/customers/bulk', json=customers_payload)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json['created_count'], 2)
+        self.assertEqual(response.json['created_ids'], [2, 3])
+        self.assertEqual(response.json['errors'], [
+            {"index": 1, "errors": {"email": ["Email already used"]}},
+            {"index": 2, "errors": {"email": ["Missing data for required field."]}},
+            {"index": 3, "errors": {"email": ["Email appears more than once in this request"]}},
+        ])
+
+        with self.app.app_context():
+            self.assertEqual(db.session.get(Customer, 3).name, "Jim Doe")
+            self.assertNotEqual(db.session.get(Customer, 3).password, "456")
+        response = self.client.post('/customers/login', json={"email": "jim@email.com", "password": "456"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_bulk_create_customers_without_executemany_returning(self):
+        # as on MySQL: one INSERT for the batch, ids read back by email
+        customers_payload = [
+            {"name": "Jim Doe", "email": "jim@email.com", "phone": "555-555-5555", "password": "123"},
+            {"name": "Ann Roe", "email": "ann@email.com", "phone": "555-555-5555", "password": "456"},
+        ]
+        statements = []
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        with self.app.app_context():
+            dialect = db.engine.dialect
+            event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+            try:
+                with mock.patch.object(dialect, 'insert_executemany_returning_sort_by_parameter_order', False):
+                    response = self.client.post('/customers/bulk', json=customers_payload)
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json['created_ids'], [2, 3])
+        self.assertEqual(len([statement for statement in statements if statement.startswith('INSERT INTO customers')]), 1)
+
+        response = self.client.get('/search/?q=ann roe&type=customer')
+        self.assertEqual([result['id'] for result in response.json], [3])
+        response = self.client.post('/customers/login', json={"email": "ann@email.com", "password": "456"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_bulk_create_customers_hashes_hash_shaped_passwords(self):
+        customers_payload = [{"name": "John Doe", "email": "jd@email.com", "phone": "555-555-5555", "password": "pbkdf2:sha256:1$ab$cd"}]
+        response = self.client.post('/customers/bulk', json=customers_payload)
+        self.assertEqual(response.status_code, 201)
+        with self.app.app_context():
+            self.assertNotEqual(db.session.get(Customer, 2).password, "pbkdf2:sha256:1$ab$cd")
+        response = self.client.post('/customers/login', json={"email": "jd@email.com", "password": "pbkdf2:sha256:1$ab$cd"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_bulk_create_customers_rejects_invalid_payloads(self):
+        response = self.client.post('/customers/bulk', json={"name": "John Doe"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('_schema', response.json)
+
+        response = self.client.post('/customers/bulk', json=[])
+        self.assertEqual(response.status_code, 400)
+
+        self.app.config['BULK_MAX_ROWS'] = 1
+        response = self.client.post('/customers/bulk', json=[{}, {}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json['_schema'], ['At most 1 rows per request.'])
+
+    def test_bulk_create_customers_without_valid_rows(self):
+        response = self.client.post('/customers/bulk', json=[{"name": "John Doe"}, "not an object"])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json['created_count'], 0)
+        self.assertEqual([error['index'] for error in response.json['errors']], [0, 1])
+        with self.app.app_context():
+            self.assertEqual(db.session.query(Customer).count(), 1)
+
     def test_get_all_customers(self):
         response = self.client.get('/customers/')
         self.assertEqual(response.status_code, 200)
@@ -66,12 +178,95 @@ class TestCustomer(unittest.TestCase):
         self.assertEqual(response.json[0]['email'], 'test@email.com')
         self.assertEqual(response.json[0]['id'], 1)
 
+    def test_get_customers_with_cursor_pagination(self):
+        with self.app.app_context():
+            for i in range(4):
+                db.session.add(Customer(name=f"customer_{i}", email=f"customer_{i}@email.com", phone="555-555-5555", password='test'))
+            db.session.commit()
+
+        response = self.client.get('/customers/?limit=2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c['id'] for c in response.json], [1, 2])
+        cursor = response.headers['X-Next-Cursor']
+
+        response = self.client.get(f'/customers/?limit=2&cursor={cursor}')
+        self.assertEqual([c['id'] for c in response.json], [3, 4])
+        cursor = response.headers['X-Next-Cursor']
+
+        response = self.client.get(f'/customers/?limit=2&cursor={cursor}')
+        self.assertEqual([c['id'] for c in response.json], [5])
+        self.assertNotIn('X-Next-Cursor', response.headers)
+
+    def test_get_customers_invalid_pagination(self):
+        response = self.client.get('/customers/?limit=0')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('limit', response.json)
+
+        response = self.client.get('/customers/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json['cursor'], ['Invalid cursor.'])
+
+    def test_stream_customers_as_ndjson(self):
+        response = self.client.get('/customers/', headers={'Accept': 'application/x-ndjson'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['email'], 'test@email.com')
+
     def test_get_specific_customer(self):
         response = self.client.get('/customers/1')
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json['name'], 'test_user')
         self.assertEqual(response.json['email'], 'test@email.com')
 
+    def test_cached_customer_is_invalidated_by_update(self):
+        response = self.client.get('/customers/1')
+        self.assertEqual(response.json['name'], 'test_user')
+
+        headers = {'Authorization': "Bearer " + self.test_login_customer()}
+        update_payload = {
+            "name": "Peter",
+            "phone": "",
+            "email": "test@email.com",
+            "password": "test"
+        }
+        self.client.put('/customers/', json=update_payload, headers=headers)
+
+        response = self.client.get('/customers/1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['name'], 'Peter')
+
+        self.client.delete('/customers/', headers=headers)
+        response = self.client.get('/customers/1')
+        self.assertEqual(response.status_code, 404)
+
+    def test_cache_skips_rows_loaded_before_a_commit(self):
+        with self.app.app_context():
+            # a reader loads the row, then a write commits before it caches it
+            def load_then_commit(customer_id):
+                stale = db.session.get(Customer, customer_id)
+                db.session.expunge(stale)
+                db.session.get(Customer, customer_id).name = 'Peter'
+                db.session.commit()
+                return stale
+
+            data = get_cached_entity('customer', 1, customer_schema, load_then_commit)
+            self.assertEqual(data['name'], 'test_user')
+        response = self.client.get('/customers/1')
+        self.assertEqual(response.json['name'], 'Peter')
+
+    def test_cached_entry_in_old_shape_is_a_miss(self):
+        app = create_app("SharedCacheTestingConfig")
+        with app.app_context():
+            cache.clear()
+            cache.set(cache_key('entity:customer:1'), {"name": "old shape"})
+        response = app.test_client().get('/customers/1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['name'], 'test_user')
+        with app.app_context():
+            cache.clear()
+
     def test_update_customer(self):
         update_payload = {
             "name": "Peter",
@@ -98,3 +293,96 @@ class TestCustomer(unittest.TestCase):
         response = self.client.delete('/customers/')
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json['message'], 'Token is missing!')
+
+    def test_malformed_authorization_header(self):
+        for header in ['Bearer', 'Bearer a b', 'Token ' + self.token]:
+            response = self.client.delete('/customers/', headers={'Authorization': header})
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json['message'], 'Invalid authorization header!')
+
+    def test_verified_token_is_cached(self):
+        verified_tokens.clear()
+        headers = {'Authorization': "Bearer " + self.token}
+        with mock.patch('app.utils.util.jwt.decode', wraps=jwt.decode) as decode:
+            self.client.post('/customers/logout', headers={'Authorization': "Bearer " + encode_token(2)})
+            self.assertEqual(decode.call_count, 1)
+            self.client.get('/service-tickets/my-tickets', headers=headers)
+            self.client.get('/service-tickets/my-tickets', headers=headers)
+            self.assertEqual(decode.call_count, 2)
+
+    def test_logout_revokes_token(self):
+        headers = {'Authorization': "Bearer " + self.test_login_customer()}
+        response = self.client.post('/customers/logout', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['message'], 'Successfully Logged Out')
+
+        response = self.client.delete('/customers/', headers=headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json['message'], 'Token has been revoked!')
+
+        headers = {'Authorization': "Bearer " + self.test_login_customer()}
+        response = self.client.delete('/customers/', headers=headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_revocation_survives_cache_clear_and_version_bump(self):
+        headers = {'Authorization': "Bearer " + self.test_login_customer()}
+        self.client.post('/customers/logout', headers=headers)
+        with self.app.app_context():
+            cache.clear()
+        self.app.config['CACHE_VERSION'] = 'next'
+
+        response = self.client.delete('/customers/', headers=headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json['message'], 'Token has been revoked!')
+
+    def test_refresh_token(self):
+        credentials = {"email": "test@email.com", "password": "test"}
+        refresh_token = self.client.post('/customers/login', json=credentials).json['refresh_token']
+
+        statements = []
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        with self.app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+            try:
+                response = self.client.post('/customers/token/refresh', json={"refresh_token": refresh_token})
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(statements, [])
+
+        headers = {'Authorization': "Bearer " + response.json['token']}
+        response = self.client.get('/service-tickets/my-tickets', headers=headers)
+        self.assertEqual(response.json['error'], 'No tickets associated with you')
+
+        # Refresh tokens are single use
+        response = self.client.post('/customers/token/refresh', json={"refresh_token": refresh_token})
+        self.assertEqual(response.status_code, 401)
+
+    def test_concurrent_refresh_uses_one_token_once(self):
+        refresh_token = encode_refresh_token(1)
+        response = self.client.post('/customers/token/refresh', json={"refresh_token": refresh_token})
+        self.assertEqual(response.status_code, 200)
+
+        # a second request that passed the revocation check at the same time
+        with mock.patch('app.utils.util.is_token_revoked', return_value=False):
+            response = self.client.post('/customers/token/refresh', json={"refresh_token": refresh_token})
+        self.assertEqual(response.status_code, 401)
+
+    def test_refresh_token_is_not_an_access_token(self):
+        headers = {'Authorization': "Bearer " + encode_refresh_token(1)}
+        response = self.client.delete('/customers/', headers=headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json['message'], 'Invalid token!')
+
+        response = self.client.post('/customers/token/refresh', json={"refresh_token": self.token})
+        self.assertEqual(response.status_code, 401)
+
+    def test_logout_revokes_refresh_token(self):
+        refresh_token = encode_refresh_token(1)
+        headers = {'Authorization': "Bearer " + self.token}
+        response = self.client.post('/customers/logout', json={"refresh_token": refresh_token}, headers=headers)
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.post('/customers/token/refresh', json={"refresh_token": refresh_token})
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,127 @@
+from app import create_app
+from app.models import db, Customer, Mechanic, Item, ServiceTicket, ServiceItems
+from app.utils.util import encode_token
+from sqlalchemy import event
+import unittest
+from datetime import date
+
+class TestFiltering(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("TestingConfig")
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            alice = Customer(name="alice", email="alice@email.com", phone="", password='test')
+            bob = Customer(name="bob", email="bob@email.com", phone="", password='test')
+            mechanics = [
+                Mechanic(name="zed", email="zed@email.com", address="address", phone="", salary=0),
+                Mechanic(name="amy", email="amy@email.com", address="address", phone="", salary=0),
+            ]
+            oil = Item(name="oil", price=20)
+            filter_ = Item(name="filter", price=5.5)
+            tyre = Item(name="tyre", price=120)
+            db.session.add_all([alice, bob, oil, filter_, tyre] + mechanics)
+            db.session.flush()
+            tickets = [
+                ServiceTicket(vin="VIN1", service_date=date(2026, 1, 10), service_description="oil", customer_id=alice.id),
+                ServiceTicket(vin="VIN2", service_date=date(2025, 12, 1), service_description="tyres", customer_id=bob.id),
+                ServiceTicket(vin="VIN3", service_date=date(2026, 2, 3), service_description="filter", customer_id=alice.id),
+                ServiceTicket(vin="VIN4", service_date=date(2026, 1, 10), service_description="check", customer_id=bob.id),
+            ]
+            tickets[0].service_items.append(ServiceItems(item=oil, quantity=1))
+            tickets[1].service_items.append(ServiceItems(item=tyre, quantity=4))
+            tickets[2].service_items.append(ServiceItems(item=filter_, quantity=2))
+            db.session.add_all(tickets)
+            db.session.commit()
+        self.client = self.app.test_client()
+
+    def get(self, url, fast=False):
+        self.app.config['FAST_SERIALIZATION'] = fast
+        return self.client.get(url)
+
+    def test_equality_filters(self):
+        for fast in (False, True):
+            with self.subTest(fast=fast):
+                response = self.get('/customers/?email=bob@email.com', fast)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual([c['name'] for c in response.json], ['bob'])
+                self.assertEqual([t['id'] for t in self.get('/service-tickets/?vin=VIN3', fast).json], [3])
+                self.assertEqual([m['name'] for m in self.get('/mechanics/?name=amy', fast).json], ['amy'])
+                self.assertEqual(self.get('/inventory/?name=none', fast).json, [])
+
+    def test_repeated_value_matches_any(self):
+        response = self.get('/service-tickets/?vin=VIN1&vin=VIN4')
+        self.assertEqual([t['id'] for t in response.json], [1, 4])
+
+    def test_range_filters(self):
+        response = self.get('/service-tickets/?service_date[gte]=2026-01-01&service_date[lt]=2026-02-01')
+        self.assertEqual([t['id'] for t in response.json], [1, 4])
+        response = self.get('/inventory/?price[gt]=10')
+        self.assertEqual([i['name'] for i in response.json], ['oil', 'tyre'])
+        response = self.get('/service-tickets/?parts_total[gte]=40&customer_id=1')
+        self.assertEqual(response.json, [])
+
+    def test_sort_with_pagination(self):
+        for fast in (False, True):
+            with self.subTest(fast=fast):
+                response = self.get('/service-tickets/?sort=-service_date&limit=2', fast)
+                self.assertEqual([t['id'] for t in response.json], [3, 4])
+                cursor = response.headers['X-Next-Cursor']
+                response = self.get(f'/service-tickets/?sort=-service_date&limit=2&cursor={cursor}', fast)
+                self.assertEqual([t['id'] for t in response.json], [1, 2])
+                self.assertNotIn('X-Next-Cursor', response.headers)
+
+        self.assertEqual([m['name'] for m in self.get('/mechanics/?sort=name').json], ['amy', 'zed'])
+        self.assertEqual([i['name'] for i in self.get('/inventory/?sort=-price').json], ['tyre', 'oil', 'filter'])
+        self.assertEqual([c['id'] for c in self.get('/customers/?sort=-id').json], [2, 1])
+
+    def test_sorted_page_etag_changes_when_rows_move(self):
+        first = self.get('/service-tickets/?sort=service_date&limit=2')
+        self.assertEqual([t['id'] for t in first.json], [2, 1])
+        with self.app.app_context():
+            db.session.get(ServiceTicket, 3).service_date = date(2025, 1, 1)
+            db.session.commit()
+        response = self.client.get('/service-tickets/?sort=service_date&limit=2', headers={'If-None-Match': first.headers['ETag']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t['id'] for t in response.json], [3, 2])
+
+    def test_invalid_filters(self):
+        response = self.get('/customers/?password=test')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json, {'password': ['Unknown filter.']})
+        response = self.get('/customers/?email[gte]=a')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email[gte]', response.json)
+        self.assertEqual(self.get('/service-tickets/?service_date=yesterday').status_code, 400)
+        self.assertEqual(self.get('/service-tickets/?sort=description').status_code, 400)
+        self.assertEqual(self.get('/inventory/?price[gte]=cheap').status_code, 400)
+        for value in ('sNaN', 'NaN', 'inf', '-Infinity'):
+            with self.subTest(value=value):
+                response = self.get(f'/service-tickets/?parts_total[gt]={value}')
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json, {'parts_total[gt]': ['Not a valid value.']})
+                self.assertEqual(self.get(f'/inventory/?price[lt]={value}').status_code, 400)
+
+    def test_my_tickets_filtered(self):
+        headers = {'Authorization': 'Bearer ' + encode_token(1)}
+        response = self.client.get('/service-tickets/my-tickets?service_date[gte]=2026-02-01', headers=headers)
+        self.assertEqual([t['id'] for t in response.json], [3])
+        response = self.client.get('/service-tickets/my-tickets?vin=VIN2', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, [])
+
+    def test_filter_streams(self):
+        response = self.client.get('/customers/?stream=1&name=alice')
+        self.assertEqual(len(response.get_data(as_text=True).splitlines()), 1)
+
+    def test_filter_is_applied_in_sql(self):
+        statements = []
+        def capture(conn, cursor, statement, *args):
+            statements.append(statement)
+        with self.app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', capture)
+            try:
+                self.get('/customers/?email=alice@email.com', fast=True)
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', capture)
+        self.assertTrue(all('customers.email = ?' in statement for statement in statements))
@@ -0,0 +1,137 @@
+from app import create_app
+from app.models import db, Customer, Mechanic, Item, ServiceTicket
+import json
+from datetime import date
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+CUSTOMERS_CSV = """id,name,email,phone,password
+10,José Núñez,jose@email.com,555-555-0001,secret
+11,Ann Lee,ann@email.com,555-555-0002,secret
+12,No Email,,555-555-0003,secret
+13,Duplicate,jose@email.com,555-555-0004,secret
+"""
+
+ITEMS = [
+    {"id": 7, "name": "Oil filter", "price": 12.5},
+    {"id": 8, "name": "Brake pad", "price": "40"},
+    {"id": 9, "name": "No price"},
+]
+
+TICKETS_CSV = """id,vin,service_date,service_description,customer_id,mechanic_ids
+100,1HGBH41JXMN109186,2026-02-01,oil change,10,1;1
+101,2HGBH41JXMN109186,2026-02-02,brakes,11,
+102,3HGBH41JXMN109186,2026-02-03,unknown customer,99,
+103,4HGBH41JXMN109186,2026-02-04,unknown mechanic,10,5
+"""
+
+TICKET_ITEMS_CSV = """ticket_id,item_id,quantity
+100,7,2
+100,7,1
+100,8,1
+101,8,0
+102,7,1
+"""
+
+class TestImport(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("TestingConfig")
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            db.session.add(Mechanic(name="test_mechanic", email="test_mechanic@email.com", address="address", phone="555-555-5555", salary=200))
+            db.session.commit()
+        self.client = self.app.test_client()
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def run_import(self, *args):
+        with self.app.app_context():
+            return self.app.test_cli_runner().invoke(args=['import-data', *args])
+
+    def test_import_resolves_ids_across_files(self):
+        self.check_import_resolves_ids_across_files()
+
+    def test_import_without_executemany_returning(self):
+        # as on MySQL: customers are read back by email, the rest row by row
+        with self.app.app_context():
+            dialect = db.engine.dialect
+        with mock.patch.object(dialect, 'insert_executemany_returning_sort_by_parameter_order', False):
+            self.check_import_resolves_ids_across_files()
+
+    def check_import_resolves_ids_across_files(self):
+        items = '\n'.join(json.dumps(item) for item in ITEMS) + '\nnot json\n'
+        result = self.run_import(
+            '--customers', self.write('customers.csv', CUSTOMERS_CSV),
+            '--items', self.write('items.ndjson', items),
+            '--tickets', self.write('tickets.csv', TICKETS_CSV),
+            '--ticket-items', self.write('ticket_items.csv', TICKET_ITEMS_CSV),
+            '--batch-size', '2',
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('customers: 2 imported, 2 rejected of 4 rows', result.output)
+        self.assertIn('items: 2 imported, 2 rejected of 4 rows', result.output)
+        self.assertIn('tickets: 2 imported, 2 rejected of 4 rows', result.output)
+        self.assertIn('ticket_items: 3 imported, 2 rejected of 5 rows', result.output)
+        self.assertIn("customers.csv:4: {'email': ['Missing data for required field.']}", result.stderr)
+        self.assertIn("customers.csv:5: {'email': ['Email already used']}", result.stderr)
+        self.assertIn("items.ndjson:4: {'_schema': ['Invalid JSON", result.stderr)
+        self.assertIn("tickets.csv:4: {'customer_id': ['Unknown customer_id.']}", result.stderr)
+        self.assertIn("tickets.csv:5: {'mechanic_ids': ['Unknown mechanic ids: [5]']}", result.stderr)
+        self.assertIn("ticket_items.csv:5: {'quantity': ['Must be greater than or equal to 1.']}", result.stderr)
+
+        # old ids 10/7/100 became 1/1/1; the mechanic was taken from the database
+        response = self.client.get('/service-tickets/1')
+        self.assertEqual(response.json['customer_id'], 1)
+        self.assertEqual([mechanic['id'] for mechanic in response.json['mechanics']], [1])
+        self.assertEqual([(item['name'], item['quantity']) for item in response.json['items']], [("Oil filter", 3), ("Brake pad", 1)])
+        self.assertEqual(response.json['parts_total'], '77.50')
+
+        response = self.client.post('/customers/login', json={"email": "jose@email.com", "password": "secret"})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get('/search/?q=nunez')
+        self.assertEqual(response.json[0]['label'], 'José Núñez')
+        response = self.client.get('/service-tickets/changes')
+        self.assertEqual([ticket['id'] for ticket in response.json['tickets']], [1, 2])
+
+    def test_references_to_existing_records(self):
+        with self.app.app_context():
+            db.session.add(Customer(name="test_user", email="test@email.com", phone="555-555-5555", password="test"))
+            db.session.add(Item(name="test_item", price=10))
+            db.session.commit()
+            db.session.add(ServiceTicket(vin="1HGBH41JXMN109186", service_date=date(2026, 1, 1), service_description="existing", customer_id=1))
+            db.session.commit()
+
+        tickets = json.dumps({"vin": "5HGBH41JXMN109186", "service_date": "2026-03-01", "service_description": "new", "customer_id": 1, "mechanic_ids": [1]})
+        result = self.run_import('--tickets', self.write('tickets.jsonl', tickets + '\n'))
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('tickets: 1 imported, 0 rejected', result.output)
+
+        # tickets are not part of this run, so ticket_id is a database id
+        result = self.run_import('--ticket-items', self.write('ticket_items.csv', "ticket_id,item_id,quantity\n1,1,2\n"))
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('ticket_items: 1 imported, 0 rejected', result.output)
+
+        response = self.client.get('/service-tickets/1')
+        self.assertEqual(response.json['parts_total'], '20.00')
+        response = self.client.get('/service-tickets/2')
+        self.assertEqual(response.json['mechanics'][0]['id'], 1)
+
+    def test_import_requires_a_file(self):
+        result = self.run_import()
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIn('Pass at least one file to import.', result.stderr)
+
+        result = self.run_import('--items', self.write('items.txt', 'name,price\n'))
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIn("Invalid value for --items: expected a .csv, .ndjson or .jsonl file.", result.stderr)
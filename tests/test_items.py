@@ -1,5 +1,6 @@
 from app import create_app
 from app.models import db, Item
+from app.extensions import cache
 import unittest
 
 class TestItem(unittest.TestCase):
@@ -31,6 +32,18 @@ class TestItem(unittest.TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json['price'], ['Missing data for required field.'])
 
+    def test_bulk_create_items(self):
+        items_payload = [{"name": f"Item {i}", "price": i} for i in range(1, 51)]
+        items_payload.append({"name": "No price"})
+        response = self.client.post('/inventory/bulk', json=items_payload)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json['created_count'], 50)
+        self.assertEqual(response.json['created_ids'], list(range(2, 52)))
+        self.assertEqual(response.json['errors'], [{"index": 50, "errors": {"price": ["Missing data for required field."]}}])
+
+        response = self.client.get('/search/?q=item 42&type=item')
+        self.assertEqual(response.json[0]['id'], 43)
+
     def test_get_all_items(self):
         response = self.client.get('/inventory/')
         self.assertEqual(response.status_code, 200)
@@ -38,6 +51,11 @@ class TestItem(unittest.TestCase):
         self.assertEqual(response.json[0]['price'], 200)
         self.assertEqual(response.json[0]['id'], 1)
 
+    def test_get_items_limit_is_capped(self):
+        response = self.client.get('/inventory/?limit=100000')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('limit', response.json)
+
     def test_get_specific_item(self):
         response = self.client.get('/inventory/1')
         self.assertEqual(response.status_code, 200)
@@ -58,3 +76,61 @@ class TestItem(unittest.TestCase):
         response = self.client.delete('/inventory/1')
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json['message'], 'Item with id: 1, successfully deleted.')
+
+    def test_shared_cache_is_consistent_across_workers(self):
+        worker_a = create_app("SharedCacheTestingConfig")
+        worker_b = create_app("SharedCacheTestingConfig")
+        with worker_a.app_context():
+            cache.clear()
+
+        client_a = worker_a.test_client()
+        client_b = worker_b.test_client()
+        response = client_a.get('/inventory/1')
+        self.assertEqual(response.json['name'], 'test_item')
+
+        client_b.put('/inventory/1', json={"name": "Test Item Updated", "price": 300})
+
+        response = client_a.get('/inventory/1')
+        self.assertEqual(response.json['name'], 'Test Item Updated')
+        with worker_a.app_context():
+            cache.clear()
+
+    def test_get_items_conditional(self):
+        response = self.client.get('/inventory/')
+        etag = response.headers['ETag']
+        self.assertNotIn('Last-Modified', response.headers)
+
+        response = self.client.get('/inventory/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b'')
+
+        self.client.put('/inventory/1', json={"name": "Test Item Updated", "price": 300})
+        response = self.client.get('/inventory/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json[0]['name'], 'Test Item Updated')
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_get_items_conditional_after_delete(self):
+        response = self.client.get('/inventory/')
+        etag = response.headers['ETag']
+        self.client.delete('/inventory/1')
+
+        response = self.client.get('/inventory/', headers={'If-None-Match': etag, 'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, [])
+
+    def test_get_items_conditional_changes_with_page(self):
+        etag = self.client.get('/inventory/').headers['ETag']
+        response = self.client.get('/inventory/?limit=5', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+
+        self.client.post('/inventory/', json={"name": "new_item", "price": 10})
+        response = self.client.get('/inventory/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json), 2)
+
+    def test_get_item_conditional(self):
+        response = self.client.get('/inventory/1')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get('/inventory/1', headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(response.status_code, 304)
@@ -0,0 +1,169 @@
+from app import create_app
+from app.models import db, utcnow, Customer, Item, Job, ServiceTicket
+from app.extensions import cache
+from app.utils.jobs import JOB_HANDLERS, job_handler, submit_job
+import json
+import time
+import unittest
+from datetime import date, timedelta
+
+ASYNC = {'Prefer': 'respond-async'}
+
+@job_handler('test-failure')
+def failing_job(job_id, params):
+    raise RuntimeError(params['message'])
+
+@job_handler('test-sleep')
+def sleeping_job(job_id, params):
+    time.sleep(params['seconds'])
+    return {}
+
+class TestJobs(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("TestingConfig")
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            cache.clear()
+            db.session.add(Customer(name="test_user", email="test@email.com", phone="555-555-5555", password='test'))
+            db.session.add(Item(name="oil", price=20))
+            db.session.commit()
+            for vin in ["VIN1", "VIN2", "VIN3"]:
+                db.session.add(ServiceTicket(vin=vin, service_date=date(2026, 1, 5), service_description="service", customer_id=1))
+            db.session.commit()
+        self.client = self.app.test_client()
+
+    def test_bulk_create_as_job(self):
+        items_payload = [{"name": "filter", "price": 5}, {"name": "no price"}]
+        response = self.client.post('/inventory/bulk', json=items_payload, headers=ASYNC)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.headers['Preference-Applied'], 'respond-async')
+        self.assertEqual(response.headers['Location'], f"/jobs/{response.json['id']}")
+        self.assertEqual(response.json['type'], 'bulk-items')
+
+        response = self.client.get(response.headers['Location'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['status'], 'succeeded')
+        self.assertEqual(response.json['result']['created_ids'], [2])
+        self.assertEqual(response.json['result']['errors'][0]['index'], 1)
+        self.assertIsNotNone(response.json['finished_at'])
+
+    def test_bulk_customers_job_does_not_store_passwords(self):
+        customers_payload = [{"name": "Jane Doe", "email": "jane@email.com", "phone": "555-555-0001", "password": "hunter2"}]
+        response = self.client.post('/customers/bulk', json=customers_payload, headers=ASYNC)
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json['id']
+        with self.app.app_context():
+            params = db.session.get(Job, job_id).params
+        self.assertNotIn('hunter2', params)
+        params = json.loads(params)
+        self.assertTrue(params['hashed'])
+        self.assertTrue(params['rows'][0]['password'].startswith(('scrypt:', 'pbkdf2:')))
+
+        job = self.client.get(f'/jobs/{job_id}').json
+        self.assertEqual(job['result']['created_count'], 1)
+        response = self.client.post('/customers/login', json={"email": "jane@email.com", "password": "hunter2"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_invalid_bulk_payload_is_rejected_before_queueing(self):
+        response = self.client.post('/inventory/bulk', json={"name": "filter"}, headers=ASYNC)
+        self.assertEqual(response.status_code, 400)
+        with self.app.app_context():
+            self.assertEqual(db.session.query(Job).count(), 0)
+
+    def test_report_as_job(self):
+        response = self.client.get('/reports/revenue-by-month?start_date=2026-01-01', headers=ASYNC)
+        self.assertEqual(response.status_code, 202)
+        job = self.client.get(response.headers['Location']).json
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual(job['result'], self.client.get('/reports/revenue-by-month?start_date=2026-01-01').json)
+
+        response = self.client.get('/reports/revenue-by-month?start_date=nope', headers=ASYNC)
+        self.assertEqual(response.status_code, 400)
+
+    def test_ticket_export_as_job(self):
+        response = self.client.get('/service-tickets/?stream=1&vin=VIN1&vin=VIN3', headers=ASYNC)
+        self.assertEqual(response.status_code, 202)
+        job = self.client.get(response.headers['Location']).json
+        self.assertEqual(job['result']['rows'], 2)
+
+        response = self.client.get(job['result']['download'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        tickets = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([ticket['vin'] for ticket in tickets], ['VIN1', 'VIN3'])
+        response.close()
+
+    def test_failed_job(self):
+        with self.app.app_context():
+            job_id = submit_job('test-failure', {"message": "out of paper"}).id
+        response = self.client.get(f'/jobs/{job_id}')
+        self.assertEqual(response.json['status'], 'failed')
+        self.assertEqual(response.json['error'], 'out of paper')
+        self.assertIsNone(response.json['result'])
+
+        response = self.client.get(f'/jobs/{job_id}/download')
+        self.assertEqual(response.status_code, 404)
+
+    def test_unknown_job(self):
+        response = self.client.get('/jobs/0123456789abcdef')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json['error'], 'Job not found.')
+
+        with self.app.app_context():
+            self.assertNotIn('nope', JOB_HANDLERS)
+            with self.assertRaises(ValueError):
+                submit_job('nope', {})
+
+    def test_worker_pool_runs_queued_jobs(self):
+        self.app.config['JOBS_EAGER'] = False
+        self.app.config['JOB_WORKERS'] = 1
+        response = self.client.post('/inventory/bulk', json=[{"name": "filter", "price": 5}], headers=ASYNC)
+        self.assertEqual(response.status_code, 202)
+        location = response.headers['Location']
+
+        for _ in range(100):
+            job = self.client.get(location).json
+            if job['status'] in ('succeeded', 'failed'):
+                break
+            time.sleep(0.05)
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual(job['result']['created_count'], 1)
+        self.app.extensions['job_workers'].shutdown()
+
+    def test_run_jobs_command(self):
+        self.app.config['JOBS_EAGER'] = False
+        self.app.config['JOB_WORKERS'] = 0
+        response = self.client.get('/reports/top-customers', headers=ASYNC)
+        self.assertEqual(response.json['status'], 'queued')
+
+        with self.app.app_context():
+            result = self.app.test_cli_runner().invoke(args=['run-jobs', '--once'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        job = self.client.get(response.headers['Location']).json
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual(job['result'][0]['name'], 'test_user')
+
+    def test_running_job_records_heartbeats(self):
+        self.app.config['JOB_HEARTBEAT_SECONDS'] = 0.05
+        with self.app.app_context():
+            job_id = submit_job('test-sleep', {"seconds": 0.3}).id
+            job = db.session.get(Job, job_id)
+            self.assertEqual(job.status, 'succeeded')
+            self.assertGreater(job.heartbeat_at, job.started_at)
+
+    def test_run_jobs_fails_abandoned_jobs(self):
+        with self.app.app_context():
+            long_ago = utcnow() - timedelta(minutes=10)
+            db.session.add(Job(id='a' * 32, kind='bulk-items', status='running', params='[]', started_at=long_ago, heartbeat_at=long_ago))
+            db.session.add(Job(id='b' * 32, kind='bulk-items', status='running', params='[]', started_at=long_ago, heartbeat_at=utcnow()))
+            db.session.commit()
+            result = self.app.test_cli_runner().invoke(args=['run-jobs', '--once'])
+        self.assertEqual(result.exit_code, 0, result.output)
+
+        job = self.client.get(f"/jobs/{'a' * 32}").json
+        self.assertEqual(job['status'], 'failed')
+        self.assertEqual(job['error'], 'The worker running this job stopped before it finished.')
+        self.assertIsNotNone(job['finished_at'])
+        # still beating, so still running
+        self.assertEqual(self.client.get(f"/jobs/{'b' * 32}").json['status'], 'running')
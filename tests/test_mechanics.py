@@ -37,6 +37,23 @@ class TestMechanic(unittest.TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json['phone'], ['Missing data for required field.'])
 
+    def test_bulk_create_mechanics(self):
+        mechanics_payload = [
+            {"name": "Mechanic A", "email": "a@email.com", "address": "A street", "phone": "555-555-5555", "salary": 300},
+            {"name": "Mechanic B", "email": "test_mechanic@email.com", "address": "B street", "phone": "555-555-5555", "salary": 300},
+            {"name": "Mechanic C", "email": "c@email.com", "address": "C street", "phone": "555-555-5555", "salary": "lots"},
+        ]
+        response = self.client.post('/mechanics/bulk', json=mechanics_payload)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json['created_count'], 1)
+        self.assertEqual(response.json['created_ids'], [2])
+        self.assertEqual([error['index'] for error in response.json['errors']], [1, 2])
+        self.assertEqual(response.json['errors'][0]['errors'], {"email": ["Email already used"]})
+        self.assertIn('salary', response.json['errors'][1]['errors'])
+
+        response = self.client.get('/mechanics/2')
+        self.assertEqual(response.json['name'], "Mechanic A")
+
     def test_get_all_mechanics(self):
         response = self.client.get('/mechanics/')
         self.assertEqual(response.status_code, 200)
@@ -107,3 +124,52 @@ class TestMechanic(unittest.TestCase):
         self.assertEqual(response.json[0]['name'], 'test_mechanic')
         self.assertEqual(response.json[1]['name'], 'mechanic_3')
         self.assertEqual(response.json[2]['name'], 'mechanic_2')
+        self.assertEqual([m['ticket_count'] for m in response.json], [3, 2, 1])
+        self.assertEqual([m['rank'] for m in response.json], [1, 2, 3])
+
+    def add_tickets_for_mechanic(self, mechanic_id, service_dates):
+        with self.app.app_context():
+            if not db.session.get(Customer, 1):
+                db.session.add(Customer(name="test_customer", email="customer@email.com", phone="555-555-5558", password="test"))
+            mechanic = db.session.get(Mechanic, mechanic_id)
+            for service_date in service_dates:
+                ticket = ServiceTicket(vin="VIN111111111111", service_date=service_date, service_description="Service", customer_id=1)
+                ticket.mechanics.append(mechanic)
+                db.session.add(ticket)
+            db.session.commit()
+
+    def test_get_most_worked_mechanics_with_limit(self):
+        with self.app.app_context():
+            db.session.add(Mechanic(name="mechanic_2", email="mechanic2@email.com", address="address_2", phone="555-555-5556", salary=300))
+            db.session.commit()
+        self.add_tickets_for_mechanic(2, [date(2025, 12, 21), date(2025, 12, 22)])
+        self.add_tickets_for_mechanic(1, [date(2025, 12, 23)])
+
+        response = self.client.get('/mechanics/most-worked?limit=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json), 1)
+        self.assertEqual(response.json[0]['name'], 'mechanic_2')
+        self.assertEqual(response.json[0]['ticket_count'], 2)
+
+    def test_get_most_worked_mechanics_in_date_window(self):
+        with self.app.app_context():
+            db.session.add(Mechanic(name="mechanic_2", email="mechanic2@email.com", address="address_2", phone="555-555-5556", salary=300))
+            db.session.commit()
+        self.add_tickets_for_mechanic(1, [date(2025, 11, 1), date(2025, 11, 2), date(2025, 11, 3)])
+        self.add_tickets_for_mechanic(2, [date(2025, 12, 1)])
+
+        response = self.client.get('/mechanics/most-worked?start_date=2025-12-01&end_date=2025-12-31')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json[0]['name'], 'mechanic_2')
+        self.assertEqual(response.json[0]['ticket_count'], 1)
+        self.assertEqual(response.json[1]['name'], 'test_mechanic')
+        self.assertEqual(response.json[1]['ticket_count'], 0)
+
+    def test_get_most_worked_mechanics_invalid_params(self):
+        response = self.client.get('/mechanics/most-worked?limit=0')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('limit', response.json)
+
+        response = self.client.get('/mechanics/most-worked?start_date=2025-12-31&end_date=2025-12-01')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('start_date', response.json)
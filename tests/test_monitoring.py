@@ -0,0 +1,83 @@
+from app import create_app
+from app.models import db, Item
+from app.utils.database import pool_metrics
+from app.utils.metrics import request_metrics
+import unittest
+
+class TestMonitoring(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("TestingConfig")
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            db.session.add(Item(name="test_item", price=200))
+            db.session.commit()
+        pool_metrics.reset()
+        request_metrics.reset()
+        self.client = self.app.test_client()
+
+    def test_engine_options(self):
+        options = self.app.config['SQLALCHEMY_ENGINE_OPTIONS']
+        self.assertTrue(options['pool_pre_ping'])
+        self.assertEqual(options['pool_recycle'], 280)
+        with self.app.app_context():
+            self.assertEqual(type(db.engine.pool).__name__, 'InstrumentedQueuePool')
+            # logs like a plain QueuePool, not under Flask's `app` logger
+            self.assertEqual(db.engine.pool.logger.name, 'sqlalchemy.pool.impl.QueuePool')
+
+    def test_get_pool_stats(self):
+        self.client.get('/inventory/')
+        self.client.get('/inventory/')
+
+        response = self.client.get('/pool-stats')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['pool_class'], 'InstrumentedQueuePool')
+        self.assertEqual(response.json['checkouts'], 2)
+        self.assertEqual(response.json['checked_out'], 0)
+        self.assertEqual(response.json['peak_checked_out'], 1)
+        self.assertEqual(response.json['timeouts'], 0)
+        self.assertGreaterEqual(response.json['wait_seconds_total'], 0)
+
+    def metric(self, body, line_start):
+        lines = [line for line in body.splitlines() if line.startswith(line_start)]
+        self.assertEqual(len(lines), 1, line_start)
+        return float(lines[0].rsplit(' ', 1)[1])
+
+    def test_get_metrics(self):
+        self.client.get('/inventory/')
+        self.client.get('/inventory/1')
+        self.client.get('/inventory/1')
+        self.client.get('/inventory/99')
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+        body = response.get_data(as_text=True)
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+
+        labels = 'endpoint="/inventory/<int:item_id>",method="GET"'
+        self.assertEqual(self.metric(body, 'http_request_duration_seconds_count{' + labels + ',status="200"}'), 2)
+        self.assertEqual(self.metric(body, 'http_request_duration_seconds_count{' + labels + ',status="404"}'), 1)
+        self.assertEqual(self.metric(body, 'http_request_duration_seconds_bucket{' + labels + ',status="200",le="+Inf"}'), 2)
+        # the second lookup is served from the entity cache
+        self.assertEqual(self.metric(body, 'http_request_sql_statements_sum{' + labels + '}'), 2)
+        self.assertEqual(self.metric(body, 'http_request_sql_statements_bucket{' + labels + ',le="1"}'), 3)
+        # ETag validators and page
+        self.assertEqual(self.metric(body, 'http_request_sql_statements_sum{endpoint="/inventory/",method="GET"}'), 2)
+        self.assertEqual(self.metric(body, 'http_request_serialization_seconds_count{endpoint="/inventory/",method="GET"}'), 1)
+        self.assertGreater(self.metric(body, 'http_request_db_seconds_sum{endpoint="/inventory/",method="GET"}'), 0)
+        self.assertEqual(self.metric(body, 'db_pool_checkouts_total'), 3)
+
+    def test_slow_request_log(self):
+        self.client.get('/inventory/')
+        with self.assertNoLogs(self.app.logger, 'WARNING'):
+            self.client.get('/inventory/')
+
+        self.app.config['SLOW_REQUEST_MS'] = 0.001
+        with self.assertLogs(self.app.logger, 'WARNING') as logs:
+            self.client.get('/inventory/?limit=10')
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('Slow request: GET /inventory/?limit=10 200', logs.output[0])
+        self.assertIn('(2 SQL statements', logs.output[0])
+        self.assertIn('FROM items', logs.output[0])
+
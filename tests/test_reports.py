@@ -0,0 +1,104 @@
+from app import create_app
+from app.models import db, Customer, Mechanic, Item, ServiceTicket, ServiceItems
+from app.extensions import cache
+import unittest
+from unittest import mock
+from sqlalchemy.dialects import postgresql
+from app.blueprints.reports.queries import parts_usage
+from datetime import date
+
+class TestReports(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("TestingConfig")
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            cache.clear()
+            alice = Customer(name="alice", email="alice@email.com", phone="", password='test')
+            bob = Customer(name="bob", email="bob@email.com", phone="", password='test')
+            mechanic_1 = Mechanic(name="mechanic_1", email="mechanic_1@email.com", address="address", phone="", salary=0)
+            mechanic_2 = Mechanic(name="mechanic_2", email="mechanic_2@email.com", address="address", phone="", salary=0)
+            oil = Item(name="oil", price=20)
+            filter_ = Item(name="filter", price=5.5)
+            db.session.add_all([alice, bob, mechanic_1, mechanic_2, oil, filter_])
+            db.session.flush()
+
+            # 2025-12-29 is a Monday, 2026-01-04 the Sunday of the same week
+            first = ServiceTicket(vin="VIN1", service_date=date(2025, 12, 29), service_description="oil change", customer_id=alice.id)
+            second = ServiceTicket(vin="VIN2", service_date=date(2026, 1, 4), service_description="filter", customer_id=bob.id)
+            third = ServiceTicket(vin="VIN3", service_date=date(2026, 1, 5), service_description="both", customer_id=bob.id)
+            first.mechanics.append(mechanic_1)
+            second.mechanics.extend([mechanic_1, mechanic_2])
+            third.mechanics.append(mechanic_2)
+            first.service_items.append(ServiceItems(item=oil, quantity=2))
+            second.service_items.append(ServiceItems(item=filter_, quantity=1))
+            third.service_items.extend([ServiceItems(item=oil, quantity=3), ServiceItems(item=filter_, quantity=2)])
+            db.session.add_all([first, second, third])
+            db.session.commit()
+        self.client = self.app.test_client()
+
+    def test_revenue_by_month(self):
+        response = self.client.get('/reports/revenue-by-month')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, [
+            {'month': '2025-12', 'ticket_count': 1, 'revenue': '40.00'},
+            {'month': '2026-01', 'ticket_count': 2, 'revenue': '76.50'},
+        ])
+
+    def test_revenue_by_month_in_range(self):
+        response = self.client.get('/reports/revenue-by-month?start_date=2026-01-05&end_date=2026-01-31')
+        self.assertEqual(response.json, [{'month': '2026-01', 'ticket_count': 1, 'revenue': '71.00'}])
+
+    def test_parts_usage(self):
+        response = self.client.get('/reports/parts-usage')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, [
+            {'item_id': 1, 'name': 'oil', 'quantity': 5, 'revenue': '100.00'},
+            {'item_id': 2, 'name': 'filter', 'quantity': 3, 'revenue': '16.50'},
+        ])
+        response = self.client.get('/reports/parts-usage?limit=1&end_date=2026-01-04')
+        self.assertEqual(response.json, [{'item_id': 1, 'name': 'oil', 'quantity': 2, 'revenue': '40.00'}])
+
+    def test_parts_usage_compiles_for_postgresql(self):
+        # PostgreSQL has no round(double precision, integer)
+        with self.app.app_context():
+            with mock.patch.object(db.session, 'execute') as execute:
+                parts_usage({'limit': 10})
+            sql = str(execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+        self.assertIn('round(CAST(', sql)
+
+    def test_mechanic_workload(self):
+        response = self.client.get('/reports/mechanic-workload')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, [
+            {'mechanic_id': 1, 'name': 'mechanic_1', 'week': '2025-12-29', 'ticket_count': 2},
+            {'mechanic_id': 2, 'name': 'mechanic_2', 'week': '2025-12-29', 'ticket_count': 1},
+            {'mechanic_id': 2, 'name': 'mechanic_2', 'week': '2026-01-05', 'ticket_count': 1},
+        ])
+
+    def test_top_customers(self):
+        response = self.client.get('/reports/top-customers')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, [
+            {'customer_id': 2, 'name': 'bob', 'ticket_count': 2, 'total_spend': '76.50'},
+            {'customer_id': 1, 'name': 'alice', 'ticket_count': 1, 'total_spend': '40.00'},
+        ])
+        response = self.client.get('/reports/top-customers?limit=1&end_date=2025-12-31')
+        self.assertEqual(response.json, [{'customer_id': 1, 'name': 'alice', 'ticket_count': 1, 'total_spend': '40.00'}])
+
+    def test_invalid_range(self):
+        response = self.client.get('/reports/revenue-by-month?start_date=2026-02-01&end_date=2026-01-01')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('start_date', response.json)
+        response = self.client.get('/reports/top-customers?limit=0')
+        self.assertEqual(response.status_code, 400)
+
+    def test_reports_are_cached_per_range(self):
+        self.assertEqual(len(self.client.get('/reports/revenue-by-month').json), 2)
+        with self.app.app_context():
+            ticket = ServiceTicket(vin="VIN4", service_date=date(2026, 3, 1), service_description="new", customer_id=1)
+            db.session.add(ticket)
+            db.session.commit()
+        # same range is served from the cache, a new range is computed
+        self.assertEqual(len(self.client.get('/reports/revenue-by-month').json), 2)
+        self.assertEqual(len(self.client.get('/reports/revenue-by-month?start_date=2025-01-01').json), 3)
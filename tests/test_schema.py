@@ -0,0 +1,79 @@
+from app import create_app
+from app.models import db
+from app.utils.schema import upgrade_schema
+from sqlalchemy import inspect, text
+import unittest
+
+LEGACY_SCHEMA = [
+    "CREATE TABLE customers (id INTEGER PRIMARY KEY, name VARCHAR(255) NOT NULL, email VARCHAR(254) NOT NULL UNIQUE, phone VARCHAR(25), password VARCHAR(255) NOT NULL)",
+    "CREATE TABLE mechanics (id INTEGER PRIMARY KEY, name VARCHAR(255) NOT NULL, email VARCHAR(254) NOT NULL UNIQUE, address VARCHAR(360) NOT NULL, phone VARCHAR(25), salary NUMERIC(10, 2))",
+    "CREATE TABLE items (id INTEGER PRIMARY KEY, name VARCHAR(255) NOT NULL, price FLOAT NOT NULL)",
+    "CREATE TABLE service_tickets (id INTEGER PRIMARY KEY, vin VARCHAR(25) NOT NULL, service_date DATE, service_description VARCHAR(360) NOT NULL, customer_id INTEGER REFERENCES customers (id))",
+    "CREATE TABLE ticket_mechanic (ticket_id INTEGER REFERENCES service_tickets (id), mechanic_id INTEGER REFERENCES mechanics (id))",
+    "CREATE TABLE service_items (id INTEGER PRIMARY KEY, service_id INTEGER NOT NULL REFERENCES service_tickets (id), item_id INTEGER NOT NULL REFERENCES items (id), quantity INTEGER NOT NULL)",
+    "INSERT INTO customers VALUES (1, 'test_user', 'test@email.com', '555-555-5555', 'test')",
+    "INSERT INTO mechanics VALUES (1, 'test_mechanic', 'mechanic@email.com', 'address', '555-555-5555', 100)",
+    "INSERT INTO items VALUES (1, 'test_item', 200)",
+    "INSERT INTO service_tickets VALUES (1, '111111111111111', '2025-12-21', 'description', 1)",
+    "INSERT INTO ticket_mechanic VALUES (1, 1)",
+    "INSERT INTO ticket_mechanic VALUES (1, 1)",
+    "INSERT INTO service_items VALUES (1, 1, 1, 2)",
+    "INSERT INTO service_items VALUES (2, 1, 1, 3)",
+]
+
+class TestSchemaUpgrade(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("TestingConfig")
+        with self.app.app_context():
+            db.drop_all()
+            with db.engine.begin() as connection:
+                for statement in LEGACY_SCHEMA:
+                    connection.execute(text(statement))
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def test_upgrade_legacy_database(self):
+        with self.app.app_context():
+            applied = upgrade_schema()
+            self.assertIn('create unique index uq_ticket_mechanic_ticket_mechanic', applied)
+            self.assertIn('create unique index uq_service_items_service_item', applied)
+            self.assertIn('create index ix_service_tickets_customer_id', applied)
+            self.assertIn('create index ix_service_tickets_service_date', applied)
+            self.assertIn('create index ix_ticket_mechanic_mechanic_id', applied)
+            self.assertIn('add column service_tickets.updated_at', applied)
+            self.assertIn('create index ix_items_updated_at', applied)
+            self.assertIn('seed ticket_changes with 1 tickets', applied)
+            self.assertIn('build search index for 3 records', applied)
+
+            with db.engine.connect() as connection:
+                self.assertEqual(connection.execute(text("SELECT COUNT(*) FROM ticket_mechanic")).scalar(), 1)
+                rows = connection.execute(text("SELECT quantity FROM service_items")).scalars().all()
+                self.assertEqual(rows, [5])
+                missing = connection.execute(text("SELECT COUNT(*) FROM service_tickets WHERE updated_at IS NULL")).scalar()
+                self.assertEqual(missing, 0)
+
+            self.assertEqual(upgrade_schema(), [])
+
+        response = self.client.get('/service-tickets/1')
+        self.assertEqual(response.json['items'][0]['quantity'], 5)
+        self.assertEqual(response.json['parts_total'], '1000.00')
+        self.assertEqual(len(response.json['mechanics']), 1)
+
+        response = self.client.put('/service-tickets/add-part/1/to-ticket/1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['items'][0]['quantity'], 6)
+        self.assertEqual(response.json['parts_total'], '1200.00')
+
+        response = self.client.get('/service-tickets/changes')
+        self.assertEqual([t['id'] for t in response.json['tickets']], [1])
+
+    def test_upgrade_current_database_is_a_no_op(self):
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            self.assertEqual(upgrade_schema(), [])
+            indexes = {index['name'] for index in inspect(db.engine).get_indexes('service_tickets')}
+            self.assertIn('ix_service_tickets_customer_id', indexes)
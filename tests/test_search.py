@@ -0,0 +1,86 @@
+from app import create_app
+from app.models import db, Customer, Item, ServiceTicket, SearchTrigram
+from app.utils.search import rebuild_search_index, record_trigrams, query_trigrams
+from sqlalchemy import func, select
+import unittest
+from datetime import date
+
+class TestSearch(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("TestingConfig")
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            jose = Customer(name="José Núñez", email="jose@email.com", phone="", password='test')
+            john = Customer(name="John Smith", email="jsmith@email.com", phone="", password='test')
+            db.session.add_all([jose, john, Item(name="Oil filter", price=12), Item(name="Air filter", price=20)])
+            db.session.flush()
+            db.session.add_all([
+                ServiceTicket(vin="1HGBH41JXMN109186", service_date=date(2026, 1, 1), service_description="oil change", customer_id=jose.id),
+                ServiceTicket(vin="2T1BURHE0JC034512", service_date=date(2026, 1, 2), service_description="brakes", customer_id=john.id),
+            ])
+            db.session.commit()
+        self.client = self.app.test_client()
+
+    def search(self, query):
+        response = self.client.get('/search/?' + query)
+        self.assertEqual(response.status_code, 200)
+        return [(result['type'], result['id']) for result in response.json]
+
+    def test_trigrams(self):
+        self.assertEqual(record_trigrams('Ab'), {'  a', ' ab', 'ab '})
+        self.assertEqual(query_trigrams('Ab'), {'  a', ' ab'})
+        self.assertEqual(record_trigrams('José'), record_trigrams('jose'))
+
+    def test_prefix_search(self):
+        self.assertEqual(self.search('q=1HGB'), [('ticket', 1)])
+        self.assertEqual(self.search('q=jo')[:2], [('customer', 1), ('customer', 2)])
+        self.assertEqual(self.search('q=smi'), [('customer', 2)])
+        self.assertEqual(self.search('q=jsmith@em'), [('customer', 2)])
+
+    def test_short_query_matches_word_prefixes(self):
+        response = self.client.get('/search/?q=fi')
+        self.assertEqual([(result['id'], result['score']) for result in response.json], [(1, 1.0), (2, 1.0)])
+        self.assertEqual(self.search('q=O'), [('item', 1)])
+        self.assertEqual(self.search('q=em&type=customer&limit=1'), [('customer', 1)])
+        # the longest word is looked up
+        self.assertEqual(self.search('q=j sm'), [('customer', 2)])
+
+    def test_partial_and_fuzzy_search(self):
+        # middle of a VIN
+        self.assertIn(('ticket', 1), self.search('q=41JXMN'))
+        # accents and typos
+        self.assertEqual(self.search('q=jose nunez')[0], ('customer', 1))
+        self.assertEqual(self.search('q=smiht'), [('customer', 2)])
+        self.assertEqual(self.search('q=xyz'), [])
+
+    def test_result_fields_and_type_filter(self):
+        response = self.client.get('/search/?q=filter&type=item&limit=1')
+        self.assertEqual(response.json, [{'type': 'item', 'id': 1, 'label': 'Oil filter', 'detail': None, 'score': 1.0}])
+        response = self.client.get('/search/?q=1HGBH41JXMN109186')
+        self.assertEqual(response.json[0]['detail'], 'oil change')
+
+    def test_invalid_query(self):
+        self.assertEqual(self.client.get('/search/').status_code, 400)
+        self.assertEqual(self.client.get('/search/?q=a&type=mechanic').status_code, 400)
+        self.assertEqual(self.client.get('/search/?q=a&limit=0').status_code, 400)
+        self.assertEqual(self.search('q=%20%21'), [])
+
+    def test_index_follows_writes(self):
+        self.client.put('/inventory/1', json={'name': 'Spark plug', 'price': 12})
+        self.assertEqual(self.search('q=spark'), [('item', 1)])
+        self.assertEqual(self.search('q=oil&type=item'), [])
+
+        self.client.post('/inventory/', json={'name': 'Sparkle wax', 'price': 8})
+        self.assertEqual(self.search('q=spark'), [('item', 1), ('item', 3)])
+
+        self.client.delete('/inventory/3')
+        self.assertEqual(self.search('q=spark'), [('item', 1)])
+
+    def test_rebuild(self):
+        with self.app.app_context():
+            before = db.session.execute(select(func.count()).select_from(SearchTrigram)).scalar()
+            with db.engine.begin() as connection:
+                self.assertEqual(rebuild_search_index(connection), 6)
+            after = db.session.execute(select(func.count()).select_from(SearchTrigram)).scalar()
+        self.assertEqual(before, after)
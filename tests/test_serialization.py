@@ -0,0 +1,124 @@
+from app import create_app
+from app.models import db, ServiceTicket, Customer, Mechanic, Item, ServiceItems
+from app.utils.serialization import OrjsonProvider, orjson
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+import unittest
+from datetime import date
+from app.utils.util import encode_token
+
+LIST_URLS = ['/customers/', '/mechanics/', '/inventory/', '/service-tickets/', '/service-tickets/?limit=2']
+
+class TestSerialization(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("TestingConfig")
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            customer = Customer(name="test_user", email="test@email.com", phone="555-555-5555", password='test')
+            no_phone = Customer(name="José Ñúñez", email="jose@email.com", phone="", password='test')
+            mechanics = [
+                Mechanic(name="mechanic_1", email="mechanic_1@email.com", address="address 1", phone="111", salary=1234.5),
+                Mechanic(name="mechanic_2", email="mechanic_2@email.com", address="address 2", phone="", salary=0),
+                Mechanic(name="mechanic_3", email="mechanic_3@email.com", address="address 3", phone="333", salary=99999.99),
+            ]
+            items = [Item(name="oil", price=19.99), Item(name="filter", price=5), Item(name="tyre", price=120.125)]
+            db.session.add_all([customer, no_phone] + mechanics + items)
+            db.session.flush()
+
+            first = ServiceTicket(vin="VIN1", service_date=date(2025, 12, 21), service_description="oil change", customer_id=customer.id)
+            second = ServiceTicket(vin="VIN2", service_date=date(2025, 12, 31), service_description="no mechanics yet", customer_id=customer.id)
+            third = ServiceTicket(vin="VIN3", service_date=date(2026, 1, 2), service_description="brakes", customer_id=no_phone.id)
+            # appended out of id order, responses list them by id either way
+            first.mechanics.extend([mechanics[2], mechanics[0]])
+            third.mechanics.append(mechanics[1])
+            first.service_items.extend([ServiceItems(item=items[1], quantity=1), ServiceItems(item=items[0], quantity=3)])
+            third.service_items.append(ServiceItems(item=items[2], quantity=4))
+            db.session.add_all([first, second, third])
+            db.session.commit()
+        self.token = encode_token(1)
+        self.client = self.app.test_client()
+
+    def get(self, url, fast, headers=None):
+        self.app.config['FAST_SERIALIZATION'] = fast
+        response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_fast_path_is_byte_identical_to_schemas(self):
+        for url in LIST_URLS:
+            with self.subTest(url=url):
+                schema_response = self.get(url, fast=False)
+                fast_response = self.get(url, fast=True)
+                self.assertEqual(fast_response.get_data(), schema_response.get_data())
+                self.assertEqual(fast_response.headers.get('X-Next-Cursor'), schema_response.headers.get('X-Next-Cursor'))
+
+    def test_fast_path_is_byte_identical_in_compact_mode(self):
+        self.app.json.compact = True
+        for url in LIST_URLS:
+            with self.subTest(url=url):
+                self.assertEqual(self.get(url, fast=True).get_data(), self.get(url, fast=False).get_data())
+
+    def test_fast_path_pages_match(self):
+        cursor = self.get('/service-tickets/?limit=2', fast=True).headers['X-Next-Cursor']
+        schema_page = self.get(f'/service-tickets/?limit=2&cursor={cursor}', fast=False)
+        fast_page = self.get(f'/service-tickets/?limit=2&cursor={cursor}', fast=True)
+        self.assertEqual(fast_page.get_data(), schema_page.get_data())
+        self.assertEqual([t['vin'] for t in fast_page.json], ['VIN3'])
+
+    def test_fast_path_my_tickets(self):
+        headers = {'Authorization': 'Bearer ' + self.token}
+        schema_response = self.get('/service-tickets/my-tickets', fast=False, headers=headers)
+        fast_response = self.get('/service-tickets/my-tickets', fast=True, headers=headers)
+        self.assertEqual(fast_response.get_data(), schema_response.get_data())
+        self.assertEqual([t['vin'] for t in fast_response.json], ['VIN1', 'VIN2'])
+
+    def test_fast_path_values(self):
+        tickets = self.get('/service-tickets/', fast=True).json
+        self.assertEqual([m['name'] for m in tickets[0]['mechanics']], ['mechanic_1', 'mechanic_3'])
+        self.assertEqual(tickets[0]['mechanics'][0]['salary'], '1234.50')
+        self.assertEqual(tickets[0]['items'], [
+            {'id': 2, 'name': 'filter', 'price': 5.0, 'quantity': 1},
+            {'id': 1, 'name': 'oil', 'price': 19.99, 'quantity': 3},
+        ])
+        self.assertEqual(tickets[1]['service_date'], '2025-12-31')
+        self.assertEqual(tickets[1]['mechanics'], [])
+        self.assertEqual(tickets[1]['items'], [])
+
+    def test_fast_path_statement_count_is_constant(self):
+        statements = []
+        def count(*args):
+            statements.append(1)
+        with self.app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', count)
+            try:
+                self.get('/service-tickets/', fast=True)
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', count)
+        # ETag validators, page, mechanics, items
+        self.assertEqual(len(statements), 4)
+
+    @unittest.skipIf(orjson is None, "orjson is not installed")
+    def test_orjson_provider_matches_default_provider(self):
+        default_bodies = {url: self.get(url, fast=True).get_data() for url in LIST_URLS}
+        self.app.json = OrjsonProvider(self.app)
+        for url in LIST_URLS:
+            with self.subTest(url=url):
+                body = self.get(url, fast=True).get_data()
+                self.assertEqual(self.app.json.loads(body), DefaultJSONProvider(self.app).loads(default_bodies[url]))
+                # identical bytes except for non-ASCII text, which the stock
+                # provider escapes
+                if url.startswith(('/mechanics', '/inventory')):
+                    self.assertEqual(body, default_bodies[url])
+
+    @unittest.skipIf(orjson is None, "orjson is not installed")
+    def test_orjson_provider_is_used_when_configured(self):
+        import config
+        class OrjsonTestingConfig(config.TestingConfig):
+            JSON_PROVIDER = 'orjson'
+        config.OrjsonTestingConfig = OrjsonTestingConfig
+        try:
+            app = create_app("OrjsonTestingConfig")
+        finally:
+            del config.OrjsonTestingConfig
+        self.assertIsInstance(app.json, OrjsonProvider)
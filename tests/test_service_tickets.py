@@ -1,8 +1,16 @@
 from app import create_app
-from app.models import db, ServiceTicket, Customer, Mechanic, Item
+from app.models import db, ServiceTicket, Customer, Mechanic, Item, ServiceItems
+from sqlalchemy import event
 import unittest
+import json
 from datetime import date
 from app.utils.util import encode_token
+from app.extensions import cache, cache_key
+from app.blueprints.service_ticket.queries import ticket_invoice_lines
+from app.utils.invoices import refresh_parts_totals
+from app.utils.pagination import encode_cursor
+from sqlalchemy.dialects import postgresql
+from unittest import mock
 
 class TestServiceTicket(unittest.TestCase):
     def setUp(self):
@@ -50,6 +58,39 @@ class TestServiceTicket(unittest.TestCase):
         self.assertEqual(response.json[0]['service_date'], '2025-12-21')
         self.assertEqual(response.json[0]['customer_id'], 1)
 
+    def test_get_all_tickets_with_cursor_pagination(self):
+        self.add_tickets_with_mechanics_and_items(0, 3)
+        response = self.client.get('/service-tickets/?limit=3')
+        self.assertEqual([t['id'] for t in response.json], [1, 2, 3])
+
+        cursor = response.headers['X-Next-Cursor']
+        response = self.client.get(f'/service-tickets/?limit=3&cursor={cursor}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t['id'] for t in response.json], [4])
+        self.assertEqual(response.json[0]['mechanics'][0]['name'], 'mechanic_2')
+        self.assertNotIn('X-Next-Cursor', response.headers)
+
+    def test_stream_all_tickets_as_ndjson(self):
+        self.add_tickets_with_mechanics_and_items(0, 3)
+        response = self.client.get('/service-tickets/?stream=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+
+        tickets = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([t['id'] for t in tickets], [1, 2, 3, 4])
+        self.assertEqual(tickets[1]['mechanics'][0]['name'], 'mechanic_0')
+        self.assertEqual(tickets[1]['items'][0]['name'], 'item_0')
+        self.assertEqual(tickets[0]['service_date'], '2025-12-21')
+
+    def test_stream_tickets_for_specific_customer_with_accept_header(self):
+        headers = {'Authorization': 'Bearer ' + self.token, 'Accept': 'application/x-ndjson'}
+        response = self.client.get('/service-tickets/my-tickets', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['vin'], '111111111111111')
+
     def test_get_specific_ticket(self):
         response = self.client.get('/service-tickets/1')
         self.assertEqual(response.status_code, 200)
@@ -102,6 +143,72 @@ class TestServiceTicket(unittest.TestCase):
         self.assertEqual(response.json['service_description'], "test_ticket_description")
         self.assertEqual(len(response.json['mechanics']), 0)
 
+    def test_edit_missing_ticket(self):
+        payload = {
+            "add_mechanic_ids": [1],
+            "remove_mechanic_ids": []
+        }
+        response = self.client.put('/service-tickets/99/edit', json=payload)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json['error'], 'Ticket not found.')
+
+    def test_assign_same_mechanic_twice_does_not_duplicate(self):
+        payload = {
+            "add_mechanic_ids": [1, 1, 42],
+            "remove_mechanic_ids": []
+        }
+        self.client.put('/service-tickets/1/edit', json=payload)
+        response = self.client.put('/service-tickets/1/edit', json=payload)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([m['id'] for m in response.json['mechanics']], [1])
+
+    def test_bulk_edit_mechanic_assignments(self):
+        self.add_tickets_with_mechanics_and_items(0, 3)
+        payload = [
+            {"ticket_id": 1, "add_mechanic_ids": [1, 2], "remove_mechanic_ids": []},
+            {"ticket_id": 2, "add_mechanic_ids": [1], "remove_mechanic_ids": [2]},
+            {"ticket_id": 3, "add_mechanic_ids": [], "remove_mechanic_ids": [3]},
+        ]
+        response = self.client.put('/service-tickets/edit', json=payload)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t['id'] for t in response.json], [1, 2, 3])
+        self.assertEqual(sorted(m['id'] for m in response.json[0]['mechanics']), [1, 2])
+        self.assertEqual([m['id'] for m in response.json[1]['mechanics']], [1])
+        self.assertEqual(response.json[2]['mechanics'], [])
+
+    def test_bulk_edit_statement_count_is_constant(self):
+        self.add_tickets_with_mechanics_and_items(0, 20)
+        statements = []
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        def run(payload):
+            statements.clear()
+            with self.app.app_context():
+                event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+                try:
+                    response = self.client.put('/service-tickets/edit', json=payload)
+                finally:
+                    event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+            self.assertEqual(response.status_code, 200)
+            return len(statements)
+
+        few = run([{"ticket_id": 2, "add_mechanic_ids": [1], "remove_mechanic_ids": [2]}])
+        many = run([{"ticket_id": ticket_id, "add_mechanic_ids": [1, 5, 9], "remove_mechanic_ids": [ticket_id]} for ticket_id in range(1, 22)])
+        self.assertEqual(few, many)
+
+    def test_bulk_edit_with_missing_ticket(self):
+        payload = [
+            {"ticket_id": 1, "add_mechanic_ids": [1], "remove_mechanic_ids": []},
+            {"ticket_id": 99, "add_mechanic_ids": [1], "remove_mechanic_ids": []},
+        ]
+        response = self.client.put('/service-tickets/edit', json=payload)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json['ticket_ids'], [99])
+
+        response = self.client.get('/service-tickets/1')
+        self.assertEqual(response.json['mechanics'], [])
+
     def test_add_part_for_ticket(self):
         response = self.client.put('/service-tickets/add-part/1/to-ticket/1')
         self.assertEqual(response.status_code, 200)
@@ -110,3 +217,304 @@ class TestServiceTicket(unittest.TestCase):
         self.assertEqual(len(response.json['items']), 1)
         self.assertEqual(response.json['items'][0]['id'], 1)
         self.assertEqual(response.json['items'][0]['name'], 'test_item')
+
+    def count_statements(self, path, headers=None):
+        statements = []
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with self.app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+            try:
+                response = self.client.get(path, headers=headers)
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        return response, len(statements)
+
+    def add_tickets_with_mechanics_and_items(self, start, count):
+        with self.app.app_context():
+            for i in range(start, start + count):
+                mechanic = Mechanic(name=f"mechanic_{i}", email=f"mechanic_{i}@email.com", address="address", phone="555-555-5555", salary=100)
+                item = Item(name=f"item_{i}", price=10 + i)
+                ticket = ServiceTicket(vin=f"VIN{i:012d}", service_date=date(2025, 12, 22), service_description="description", customer_id=1)
+                ticket.mechanics.append(mechanic)
+                ticket.service_items.append(ServiceItems(item=item, quantity=2))
+                db.session.add(ticket)
+            db.session.commit()
+
+    def test_get_all_tickets_statement_count_is_constant(self):
+        self.add_tickets_with_mechanics_and_items(0, 1)
+        response, few_tickets_statements = self.count_statements('/service-tickets/')
+        self.assertEqual(len(response.json), 2)
+
+        self.add_tickets_with_mechanics_and_items(1, 20)
+        response, many_tickets_statements = self.count_statements('/service-tickets/')
+        self.assertEqual(len(response.json), 22)
+        self.assertEqual(response.json[-1]['mechanics'][0]['name'], 'mechanic_20')
+        self.assertEqual(response.json[-1]['items'][0]['name'], 'item_20')
+        self.assertEqual(response.json[-1]['items'][0]['quantity'], 2)
+
+        self.assertEqual(few_tickets_statements, many_tickets_statements)
+        # ETag validators, page, mechanics, items
+        self.assertLessEqual(many_tickets_statements, 4)
+
+    def test_get_tickets_for_specific_customer_statement_count_is_constant(self):
+        headers = {'Authorization': 'Bearer ' + self.token}
+        _, few_tickets_statements = self.count_statements('/service-tickets/my-tickets', headers)
+
+        self.add_tickets_with_mechanics_and_items(0, 20)
+        response, many_tickets_statements = self.count_statements('/service-tickets/my-tickets', headers)
+        self.assertEqual(len(response.json), 21)
+        self.assertEqual(few_tickets_statements, many_tickets_statements)
+
+    def test_add_same_part_twice_increments_quantity(self):
+        self.client.put('/service-tickets/add-part/1/to-ticket/1')
+        response = self.client.put('/service-tickets/add-part/1/to-ticket/1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json['items']), 1)
+        self.assertEqual(response.json['items'][0]['quantity'], 2)
+
+    def test_add_part_to_missing_ticket(self):
+        response = self.client.put('/service-tickets/add-part/1/to-ticket/99')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json['error'], 'Ticket not found.')
+
+    def test_add_many_parts_for_ticket(self):
+        with self.app.app_context():
+            db.session.add(Item(name="brake_pad", price=40))
+            db.session.commit()
+        self.client.put('/service-tickets/add-part/1/to-ticket/1')
+
+        payload = [
+            {"item_id": 1, "quantity": 3},
+            {"item_id": 2, "quantity": 4},
+            {"item_id": 2},
+        ]
+        response = self.client.put('/service-tickets/1/parts', json=payload)
+        self.assertEqual(response.status_code, 200)
+        quantities = {item['name']: item['quantity'] for item in response.json['items']}
+        self.assertEqual(quantities, {'test_item': 4, 'brake_pad': 5})
+
+    def test_add_many_parts_with_missing_item(self):
+        payload = [
+            {"item_id": 1, "quantity": 1},
+            {"item_id": 99, "quantity": 1},
+        ]
+        response = self.client.put('/service-tickets/1/parts', json=payload)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json['item_ids'], [99])
+
+        response = self.client.get('/service-tickets/1')
+        self.assertEqual(response.json['items'], [])
+
+    def test_add_many_parts_invalid_quantity(self):
+        response = self.client.put('/service-tickets/1/parts', json=[{"item_id": 1, "quantity": 0}])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('quantity', response.json['0'])
+
+    def test_get_specific_ticket_is_cached(self):
+        response, first_statements = self.count_statements('/service-tickets/1')
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(first_statements, 0)
+
+        response, cached_statements = self.count_statements('/service-tickets/1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['vin'], '111111111111111')
+        self.assertEqual(cached_statements, 0)
+
+    def test_cached_ticket_is_invalidated_by_edits(self):
+        self.client.get('/service-tickets/1')
+        self.client.put('/service-tickets/1/edit', json={"add_mechanic_ids": [1], "remove_mechanic_ids": []})
+        response = self.client.get('/service-tickets/1')
+        self.assertEqual(response.json['mechanics'][0]['name'], 'test_mechanic_1')
+
+        self.client.put('/service-tickets/add-part/1/to-ticket/1')
+        response = self.client.get('/service-tickets/1')
+        self.assertEqual(response.json['items'][0]['quantity'], 1)
+
+        self.client.put('/inventory/1', json={"name": "renamed_item", "price": 10})
+        self.client.put('/mechanics/1', json={"name": "renamed_mechanic", "email": "test_mechanic_1@email.com", "address": "address", "phone": "111-111-1111", "salary": 100})
+        response = self.client.get('/service-tickets/1')
+        self.assertEqual(response.json['items'][0]['name'], 'renamed_item')
+        self.assertEqual(response.json['mechanics'][0]['name'], 'renamed_mechanic')
+
+    def test_cached_ticket_is_invalidated_by_delete(self):
+        self.client.get('/service-tickets/1')
+        self.client.delete('/service-tickets/1')
+        response = self.client.get('/service-tickets/1')
+        self.assertEqual(response.status_code, 404)
+
+    def test_cached_ticket_after_version_expires(self):
+        def expire_version():
+            with self.app.app_context():
+                cache.delete(cache_key('entity:ticket:*:version'))
+
+        self.client.put('/service-tickets/1/edit', json={"add_mechanic_ids": [1], "remove_mechanic_ids": []})
+        expire_version()
+        self.client.get('/service-tickets/1')
+        self.client.put('/mechanics/1', json={"name": "renamed_mechanic", "email": "test_mechanic_1@email.com", "address": "address", "phone": "111-111-1111", "salary": 100})
+        expire_version()
+        response = self.client.get('/service-tickets/1')
+        self.assertEqual(response.json['mechanics'][0]['name'], 'renamed_mechanic')
+
+    def test_my_tickets_conditional(self):
+        headers = {'Authorization': 'Bearer ' + self.token}
+        response = self.client.get('/service-tickets/my-tickets', headers=headers)
+        etag = response.headers['ETag']
+
+        response = self.client.get('/service-tickets/my-tickets', headers=dict(headers, **{'If-None-Match': etag}))
+        self.assertEqual(response.status_code, 304)
+
+        self.client.put('/service-tickets/1/edit', json={"add_mechanic_ids": [1], "remove_mechanic_ids": []})
+        response = self.client.get('/service-tickets/my-tickets', headers=dict(headers, **{'If-None-Match': etag}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json[0]['mechanics'][0]['id'], 1)
+        etag = response.headers['ETag']
+
+        # an embedded mechanic changing also changes the ticket list
+        self.client.put('/mechanics/1', json={"name": "renamed", "email": "test_mechanic_1@email.com", "address": "address", "phone": "111-111-1111", "salary": 100})
+        response = self.client.get('/service-tickets/my-tickets', headers=dict(headers, **{'If-None-Match': etag}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json[0]['mechanics'][0]['name'], 'renamed')
+
+    def test_parts_change_ticket_etag(self):
+        response = self.client.get('/service-tickets/')
+        etag = response.headers['ETag']
+        self.client.put('/service-tickets/add-part/1/to-ticket/1')
+        response = self.client.get('/service-tickets/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json[0]['items'][0]['quantity'], 1)
+
+        response = self.client.get('/service-tickets/1')
+        response = self.client.get('/service-tickets/1', headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    def test_ticket_changes(self):
+        response = self.client.get('/service-tickets/changes')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t['id'] for t in response.json['tickets']], [1])
+        self.assertEqual(response.json['deleted'], [])
+        self.assertFalse(response.json['has_more'])
+        cursor = response.json['cursor']
+
+        response = self.client.get(f'/service-tickets/changes?since={cursor}')
+        self.assertEqual(response.json['tickets'], [])
+        self.assertEqual(response.json['cursor'], cursor)
+
+        self.client.put('/service-tickets/1/edit', json={"add_mechanic_ids": [1], "remove_mechanic_ids": []})
+        response = self.client.get(f'/service-tickets/changes?since={cursor}')
+        self.assertEqual([t['id'] for t in response.json['tickets']], [1])
+        self.assertEqual(response.json['tickets'][0]['mechanics'][0]['id'], 1)
+        cursor = response.json['cursor']
+
+        # editing an embedded mechanic changes the ticket too
+        self.client.put('/mechanics/1', json={"name": "renamed", "email": "test_mechanic_1@email.com", "address": "address", "phone": "111-111-1111", "salary": 100})
+        response = self.client.get(f'/service-tickets/changes?since={cursor}')
+        self.assertEqual(response.json['tickets'][0]['mechanics'][0]['name'], 'renamed')
+        cursor = response.json['cursor']
+
+        self.client.delete('/service-tickets/1')
+        response = self.client.get(f'/service-tickets/changes?since={cursor}')
+        self.assertEqual(response.json['tickets'], [])
+        self.assertEqual(response.json['deleted'], [1])
+
+    def test_ticket_changes_pages(self):
+        self.add_tickets_with_mechanics_and_items(0, 3)
+        self.client.put('/service-tickets/add-part/1/to-ticket/1')
+
+        response = self.client.get('/service-tickets/changes?limit=3')
+        self.assertEqual([t['id'] for t in response.json['tickets']], [2, 3, 4])
+        self.assertTrue(response.json['has_more'])
+
+        response = self.client.get(f"/service-tickets/changes?limit=3&since={response.json['cursor']}")
+        # ticket 1 changed again after the others, so it comes last
+        self.assertEqual([t['id'] for t in response.json['tickets']], [1])
+        self.assertEqual(response.json['tickets'][0]['items'][0]['quantity'], 1)
+        self.assertFalse(response.json['has_more'])
+
+    def test_ticket_changes_invalid_since(self):
+        response = self.client.get('/service-tickets/changes?since=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json['since'], ['Invalid cursor.'])
+
+    def test_ticket_invoice(self):
+        self.client.put('/service-tickets/1/parts', json=[{"item_id": 1, "quantity": 3}])
+        response = self.client.get('/service-tickets/1/invoice')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['ticket_id'], 1)
+        self.assertEqual(response.json['lines'], [
+            {"item_id": 1, "name": "test_item", "unit_price": 200.0, "quantity": 3, "line_total": "600.00"},
+        ])
+        self.assertEqual(response.json['parts_total'], "600.00")
+
+        response = self.client.get('/service-tickets/1')
+        self.assertEqual(response.json['parts_total'], "600.00")
+
+    def test_money_rounding_compiles_for_postgresql(self):
+        # PostgreSQL has no round(double precision, integer)
+        with self.app.app_context():
+            with mock.patch.object(db.session, 'execute') as execute:
+                ticket_invoice_lines(1)
+                refresh_parts_totals(db.session)
+            for call in execute.call_args_list:
+                sql = str(call.args[0].compile(dialect=postgresql.dialect()))
+                self.assertIn('round(CAST(', sql)
+                self.assertNotRegex(sql, r'round\((?!CAST)')
+
+    def test_ticket_invoice_without_parts(self):
+        response = self.client.get('/service-tickets/1/invoice')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['lines'], [])
+        self.assertEqual(response.json['parts_total'], "0.00")
+
+        response = self.client.get('/service-tickets/99/invoice')
+        self.assertEqual(response.status_code, 404)
+
+    def test_parts_total_is_maintained(self):
+        self.add_tickets_with_mechanics_and_items(0, 2)
+        response = self.client.get('/service-tickets/2')
+        self.assertEqual(response.json['parts_total'], "20.00")
+
+        self.client.put('/service-tickets/add-part/2/to-ticket/2')
+        response = self.client.get('/service-tickets/2')
+        self.assertEqual(response.json['parts_total'], "30.00")
+
+        self.client.put('/inventory/2', json={"name": "item_0", "price": 12.5})
+        response = self.client.get('/service-tickets/2')
+        self.assertEqual(response.json['parts_total'], "37.50")
+        response = self.client.get('/service-tickets/2/invoice')
+        self.assertEqual(response.json['parts_total'], "37.50")
+
+    def test_get_ticket_totals(self):
+        self.add_tickets_with_mechanics_and_items(0, 4)
+        self.client.put('/service-tickets/1/parts', json=[{"item_id": 1, "quantity": 1}])
+
+        response = self.client.get('/service-tickets/totals?limit=3')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(t['id'], t['parts_total']) for t in response.json],
+                         [(1, "200.00"), (5, "26.00"), (4, "24.00")])
+        self.assertNotIn('items', response.json[0])
+
+        response = self.client.get(f"/service-tickets/totals?limit=3&cursor={response.headers['X-Next-Cursor']}")
+        self.assertEqual([t['id'] for t in response.json], [3, 2])
+        self.assertNotIn('X-Next-Cursor', response.headers)
+
+        response = self.client.get('/service-tickets/totals?order=asc&limit=2')
+        self.assertEqual([t['id'] for t in response.json], [2, 3])
+        response = self.client.get('/service-tickets/totals?sort=id&order=asc')
+        self.assertEqual([t['id'] for t in response.json], [1, 2, 3, 4, 5])
+
+    def test_get_ticket_totals_invalid_params(self):
+        response = self.client.get('/service-tickets/totals?sort=vin')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('sort', response.json)
+
+        response = self.client.get('/service-tickets/totals?cursor=WzFd')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json['cursor'], ['Invalid cursor.'])
+
+        for value in ('sNaN', 'NaN', 'Infinity'):
+            with self.subTest(value=value):
+                response = self.client.get(f"/service-tickets/totals?cursor={encode_cursor([value, 1])}")
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json['cursor'], ['Invalid cursor.'])